@@ -0,0 +1,313 @@
+"""
+benchmarks/bench_sync.py
+
+Purpose:
+    Benchmarks the full sync pipeline (`ensure_standard_fields()` + `sync_relation_field_names()` from
+    `notion_utils/sync_pipeline.py`) against synthetic workspaces served by the in-memory fake Notion backend.
+    Results are written as JSON, so regressions in the sync engine show up as numbers.
+
+Features:
+    - Preset scenarios (`small`, `medium`, `large`) or custom target/page counts
+    - Page counts per target can be fixed (`--pages 500`) or spread geometrically (`--pages 100:50000`)
+    - Per stage: wall time, API calls per endpoint, 429s, peak RSS and source pages/second
+    - Per pipeline stage and endpoint: latency percentiles, retries and errors (from `instrumentation.py`)
+    - Stages: schema setup, initial sync, and a no-op re-sync of the unchanged workspace
+    - Every scenario runs in a fresh interpreter, so caches and peak RSS never leak between scenarios
+    - Per-stage budgets: API calls per endpoint (scaled to the scenario), wall time (preset scenarios at the
+      default rate and no latency) and no-op writes (none when re-syncing an unchanged workspace). The exit code
+      is 1 when any stage exceeds its budget, so the benchmark can gate a change
+
+Usage:
+    python benchmarks/bench_sync.py                           # small + medium
+    python benchmarks/bench_sync.py --scenario large --async
+    python benchmarks/bench_sync.py --targets 5 --pages 100:2000 --latency 0.05 --output result.json
+
+Functions:
+    - run_scenario(): Run one scenario in the current process and return its measurements
+    - stage_budgets(): The budgets of every stage of a scenario
+    - check_budgets(): Compare a scenario's measurements with its budgets
+    - main(): Command-line entrypoint (spawns one process per scenario)
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (number of target databases, (min pages, max pages) per target)
+SCENARIOS = {
+    "small": (3, (100, 100)),
+    "medium": (10, (100, 5000)),
+    "large": (50, (100, 50000)),
+}
+
+DEFAULT_RATE = 1000.0
+
+# Wall time budgets in seconds of the preset scenarios, for every engine (about twice the slowest engine's
+# time on a developer machine). They only apply at the default rate and without simulated latency; the
+# large scenario is too slow to run routinely and has call budgets only.
+WALL_TIME_BUDGETS = {
+    "small": {"ensure_standard_fields": 1.0, "sync_initial": 2.0, "sync_unchanged": 1.0},
+    "medium": {"ensure_standard_fields": 1.0, "sync_initial": 90.0, "sync_unchanged": 75.0},
+}
+
+# Endpoints that write; re-syncing an unchanged workspace must not call them
+WRITE_ENDPOINTS = ("pages.create", "pages.update")
+
+
+def page_counts(target_count, min_pages, max_pages):
+    """
+    Spread page counts geometrically between `min_pages` and `max_pages` across the targets.
+
+    Returns:
+        List[int]: Number of pages of each target database.
+    """
+    if target_count == 1 or min_pages == max_pages:
+        return [max_pages] * target_count
+    ratio = (max_pages / min_pages) ** (1 / (target_count - 1))
+    return [round(min_pages * ratio ** index) for index in range(target_count)]
+
+
+def peak_rss_mb():
+    # Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(name, target_count, pages, latency=0.0, use_async=False, rate=DEFAULT_RATE, fused=False):
+    """
+    Run one scenario in the current process. Must run in a fresh interpreter: the backend and rate limit
+    are chosen through environment variables read when `notion_utils` is first imported.
+
+    Args:
+        name (str): Scenario name (for the report).
+        target_count (int): Number of target databases.
+        pages (List[int]): Number of pages of each target database.
+        latency (float): Simulated latency of every API call, in seconds.
+        use_async (bool): Use the asyncio engine instead of the threaded one.
+        rate (float): Client-side rate limit in requests/second.
+        fused (bool): Use the fused single-scan reconcile instead of the staged engine.
+
+    Returns:
+        dict: Scenario parameters and per-stage measurements.
+    """
+    os.environ["NOTION_BACKEND"] = "fake"
+    os.environ["NOTION_RATE_LIMIT"] = str(rate)
+    state_dir = tempfile.mkdtemp()
+    os.environ["NOTION_SYNC_STATE_PATH"] = os.path.join(state_dir, "sync_state.json")
+    os.environ["NOTION_JOURNAL_DIR"] = os.path.join(state_dir, "journal")
+    os.environ.pop("NOTION_PERSISTENT_CACHE", None)
+    sys.path.insert(0, ROOT_DIR)
+
+    from notion_utils.client import get_notion_client
+    from notion_utils.fake_notion import build_synthetic_workspace
+    from notion_utils.instrumentation import recorder
+    from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+    workspace = get_notion_client().client.workspace
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, target_count, pages)
+    workspace.latency = latency
+    total_pages = sum(pages)
+
+    def no_progress(_):
+        pass
+
+    stages = []
+
+    def measure(stage, func):
+        calls_before = Counter(workspace.calls)
+        throttled_before = workspace.throttled
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        calls = workspace.calls - calls_before
+        stages.append({
+            "stage": stage,
+            "wall_time_s": round(elapsed, 4),
+            "api_calls": dict(sorted(calls.items())),
+            "api_calls_total": sum(calls.values()),
+            "writes": sum(calls[endpoint] for endpoint in WRITE_ENDPOINTS),
+            "throttled": workspace.throttled - throttled_before,
+            "peak_rss_mb": peak_rss_mb(),
+            "pages_per_s": round(total_pages / elapsed, 1) if elapsed else None,
+        })
+
+    measure("ensure_standard_fields",
+            lambda: ensure_standard_fields(combination_database_id, target_ids, no_progress))
+    measure("sync_initial",
+            lambda: sync_relation_field_names(combination_database_id, target_ids, no_progress, use_async=use_async,
+                                              fused=fused))
+    measure("sync_unchanged",
+            lambda: sync_relation_field_names(combination_database_id, target_ids, no_progress, use_async=use_async,
+                                              fused=fused))
+
+    return {
+        "scenario": name,
+        "targets": target_count,
+        "pages": total_pages,
+        "pages_per_target": pages,
+        "latency_s": latency,
+        "rate": rate,
+        "engine": "fused" if fused else "async" if use_async else "threads",
+        "stages": stages,
+        "api_stats": recorder.snapshot(),
+    }
+
+
+def stage_budgets(result):
+    """
+    The budgets of every stage of a scenario. Call budgets scale with the number of 100-page query batches:
+    each engine scans every source database at most twice and the combination database at most four times.
+
+    Args:
+        result (dict): The scenario's measurements (from `run_scenario()`).
+
+    Returns:
+        dict: Per stage, `api_calls` (endpoint -> most calls allowed; other endpoints must not be called),
+            `wall_time_s` (seconds, or None when not budgeted) and `writes` (most writes allowed, or None).
+    """
+    targets = result["targets"]
+    pages = result["pages_per_target"]
+    source_batches = sum(math.ceil(count / 100) for count in pages)
+    combination_batches = math.ceil(sum(pages) / 100)
+    queries = 2 * source_batches + 4 * combination_batches + 2 * targets + 4
+    wall_times = WALL_TIME_BUDGETS.get(result["scenario"], {}) \
+        if result["latency_s"] == 0 and result["rate"] == DEFAULT_RATE else {}
+    api_calls = {
+        "ensure_standard_fields": {"databases.retrieve": targets + 1, "databases.update": 1},
+        "sync_initial": {"databases.query": queries, "databases.retrieve": targets + 2,
+                         "pages.create": sum(pages), "pages.update": sum(pages)},
+        "sync_unchanged": {"databases.query": queries, "databases.retrieve": targets + 2},
+    }
+    return {stage: {"api_calls": calls, "wall_time_s": wall_times.get(stage),
+                    "writes": 0 if stage == "sync_unchanged" else None}
+            for stage, calls in api_calls.items()}
+
+
+def check_budgets(result):
+    """
+    Compare a scenario's measurements with its budgets.
+
+    Args:
+        result (dict): The scenario's measurements (from `run_scenario()`).
+
+    Returns:
+        List[str]: One message per exceeded budget (empty if every stage is within budget).
+    """
+    budgets = stage_budgets(result)
+    exceeded = []
+    for stage in result["stages"]:
+        budget = budgets.get(stage["stage"])
+        if budget is None:
+            continue
+        for endpoint, calls in stage["api_calls"].items():
+            allowed = budget["api_calls"].get(endpoint, 0)
+            if calls > allowed:
+                exceeded.append(f"{stage['stage']}: {calls} {endpoint} call(s), budget {allowed}")
+        if budget["wall_time_s"] is not None and stage["wall_time_s"] > budget["wall_time_s"]:
+            exceeded.append(f"{stage['stage']}: {stage['wall_time_s']}s wall time, budget {budget['wall_time_s']}s")
+        if budget["writes"] is not None and stage["writes"] > budget["writes"]:
+            exceeded.append(f"{stage['stage']}: {stage['writes']} no-op write(s), budget {budget['writes']}")
+    return exceeded
+
+
+def _print_report(result):
+    print(f"\n{result['scenario']}: {result['targets']} targets, {result['pages']} pages, "
+          f"{result['engine']} engine, latency {result['latency_s']}s")
+    print(f"  {'stage':<24}{'wall s':>10}{'calls':>10}{'429s':>8}{'pages/s':>12}{'peak MB':>10}")
+    for stage in result["stages"]:
+        print(f"  {stage['stage']:<24}{stage['wall_time_s']:>10}{stage['api_calls_total']:>10}"
+              f"{stage['throttled']:>8}{stage['pages_per_s'] or '-':>12}{stage['peak_rss_mb'] or '-':>10}")
+    budgets = stage_budgets(result)
+    print(f"\n  {'stage':<24}{'budget':<20}{'used':>10}{'allowed':>10}")
+    for stage in result["stages"]:
+        budget = budgets[stage["stage"]]
+        rows = [(endpoint, stage["api_calls"].get(endpoint, 0), allowed)
+                for endpoint, allowed in budget["api_calls"].items()]
+        rows += [(endpoint, calls, 0) for endpoint, calls in stage["api_calls"].items()
+                 if endpoint not in budget["api_calls"]]
+        if budget["wall_time_s"] is not None:
+            rows.append(("wall s", stage["wall_time_s"], budget["wall_time_s"]))
+        if budget["writes"] is not None:
+            rows.append(("no-op writes", stage["writes"], budget["writes"]))
+        for label, used, allowed in rows:
+            flag = "  OVER" if used > allowed else ""
+            print(f"  {stage['stage']:<24}{label:<20}{used:>10}{allowed:>10}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Notion sync pipeline on synthetic workspaces.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Preset scenario to run (repeatable; default: small and medium).")
+    parser.add_argument("--targets", type=int, help="Custom scenario: number of target databases.")
+    parser.add_argument("--pages", default="100",
+                        help="Custom scenario: pages per target, either N or MIN:MAX (geometric spread).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency per API call in seconds.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Client-side rate limit in requests/second.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio engine.")
+    parser.add_argument("--fused", action="store_true", help="Use the fused single-scan reconcile.")
+    parser.add_argument("--output", help="JSON output path (default: logs/benchmarks/bench_<timestamp>.json).")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own console output.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Child process: run one scenario and write its result to the given file
+        spec = json.loads(args.child)
+        result_path = spec.pop("result_path")
+        result = run_scenario(**spec)
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.targets:
+        min_pages, _, max_pages = args.pages.partition(":")
+        runs = [("custom", args.targets, page_counts(args.targets, int(min_pages), int(max_pages or min_pages)))]
+    else:
+        runs = [(name, SCENARIOS[name][0], page_counts(SCENARIOS[name][0], *SCENARIOS[name][1]))
+                for name in args.scenario or ["small", "medium"]]
+
+    results = []
+    for name, target_count, pages in runs:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            spec = {"name": name, "target_count": target_count, "pages": pages, "latency": args.latency,
+                    "use_async": args.use_async, "rate": args.rate, "fused": args.fused,
+                    "result_path": os.path.join(temp_dir, "result.json")}
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)], check=True,
+                           cwd=ROOT_DIR, stdout=None if args.verbose else subprocess.DEVNULL)
+            with open(spec["result_path"], encoding="utf-8") as f:
+                result = json.load(f)
+        result["budget_exceeded"] = check_budgets(result)
+        _print_report(result)
+        results.append(result)
+
+    output = args.output or os.path.join(ROOT_DIR, "logs", "benchmarks",
+                                         f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created": datetime.now().isoformat(timespec="seconds"), "results": results}, f, indent=4)
+    print(f"\nResults saved to {output}")
+
+    exceeded = [f"{result['scenario']} / {message}" for result in results for message in result["budget_exceeded"]]
+    for message in exceeded:
+        print(f"Over budget: {message}")
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
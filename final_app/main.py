@@ -1,112 +1,41 @@
-import os
-import sys
-import time
-
-from dotenv import load_dotenv
+"""
+final_app/main.py
 
-load_dotenv()  # Load environment variables from .env file
-from notion_utils.relate_databases_to_one.relate_databases_add_new_target_database import *
-from notion_utils.relate_databases_to_one.relate_databases_format import *
-from notion_utils.relate_databases_to_one.relate_databases_to_one_update import *
-from notion_utils.log import log_error, log_error_with_traceback, write_log_header
-from notion_utils.internet_check import check_internet_connection
+Purpose:
+    Command-line launcher kept next to the GUI. It takes the same arguments as `python -m notion_utils sync`
+    (see `notion_utils/cli.py`), e.g.:
 
+        python main.py jobs.yaml
+        python main.py --combination <ID> --target <ID> --target <ID> --dry-run
 
-def ensure_standard_fields(combination_database_id, target_database_list, update_callback):
-    try:
-        start1 = time.time()
-        total_callback_first_half = len(target_database_list) + 1
-        count = 0
-        # Update any mismatched relation field names in combination database
-        print("Starting relation sync process...")
-        sync_relation_names_with_database_titles(combination_database_id)
-        update_callback(1 / total_callback_first_half / 2)
-        print("Adding relation fields...(Make sure all target database titles are unique!)")
+    The sync steps themselves live in `notion_utils/sync_pipeline.py`; they are re-exported here for scripts
+    that import them from `final_app.main`.
+"""
 
-        for target_database in target_database_list:
-            # Add relation fields if they do not already exist
-            count += 1
-            add_new_relate_database_property(target_database, combination_database_id)
-            update_callback((1 + count) / total_callback_first_half / 2)
-        log_print_green(f"All relation fields successfully added to database {combination_database_id}")
-        end1 = time.time()
-        log_print_green(f"Setting runtime：{end1 - start1:.4f} seconds.")
-        update_callback(50)
-    except Exception as re:
-        log_error("Part 1: Ensure standard fields failed.")
-        log_error_with_traceback(re)
-        raise Exception("Ensure standard fields failed.")
+import sys
 
+from dotenv import load_dotenv
 
-def sync_relation_field_names(combination_database_id, target_database_list, update_callback):
-    try:
-        start2 = time.time()
-        # Make sure relation field names match the corresponding database titles
-        print("Re-syncing relation names to ensure accuracy...")
-        sync_relation_names_with_database_titles(combination_database_id)
-        update_callback(50 + 12.5)
+load_dotenv()  # Load environment variables from .env file
+from notion_utils.cli import main as cli_main
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names, plan_sync, \
+    apply_sync_plan
 
-        # Validate that each page has at most one valid relation and no duplicate names
-        print("Validating combination database structure...")
-        check_combination_database_pages_format(combination_database_id)
-        update_callback(75)
-        # Ensure required fields like Name, Database Address, Created/Edited Time exist
-        print("Ensuring required dynamic fields exist...")
-        update_standard_database_property(combination_database_id)
-        log_print_green("Field check complete. Renamed fields will be preserved and new ones created if needed.")
-        update_callback(75 + 12.5)
-        # Merge all pages from target databases into the combination database
-        print("Updating combination database with all target data...")
-        update_all_target_database_to_combi(target_database_list, combination_database_id)
-        log_print_green("✅ Merge process complete.")
-        end2 = time.time()
-        log_print_green(f"Sync runtime：{end2 - start2:.4f} seconds.")
-        update_callback(100)
-    except Exception as ve:
-        log_error("Part 2: Sync relation field names failed.")
-        log_error_with_traceback(ve)
-        raise RuntimeError(f"Sync relation field names failed.") from ve
+__all__ = ["ensure_standard_fields", "sync_relation_field_names", "plan_sync", "apply_sync_plan", "main"]
 
 
-def main():
-    """
-    Main execution flow:
-    - Link all target databases to the combination database
-    - Validate schema consistency
-    - Normalize format
-    - Perform page synchronization
+def main(argv=None):
     """
+    Run the sync jobs given on the command line or in a config file.
 
-    # Retrieve combination database ID and target database IDs
-    combination_database_C_id = os.getenv("PHASE_5_COMBINATION_DATABASE_C_ID")
-
-    # Retrieve target database IDs
-    target_databases_A_id = os.getenv("PHASE_4_TARGET_DATABASE_A_ID")
-    target_databases_B_id = os.getenv("PHASE_4_TARGET_DATABASE_B_ID")
-    target_database_list = []
-    target_database_list.append(target_databases_A_id)
-    target_database_list.append(target_databases_B_id)
-    target_database_list.append("205b82c9b09480a79deaec0b8c3a6369")
+    Args:
+        argv (List[str], optional): Arguments of `python -m notion_utils sync` (default: `sys.argv[1:]`).
 
-    # === Part 1: Ensure standard fields ===
-    ensure_standard_fields(combination_database_C_id, target_database_list)
-
-    # === Part 2: Sync relation field names ===
-    sync_relation_field_names(combination_database_C_id, target_database_list)
+    Returns:
+        int: Exit code (see `notion_utils.cli.main()`).
+    """
+    return cli_main(["sync", *(sys.argv[1:] if argv is None else argv)])
 
 
 if __name__ == "__main__":
-    try:
-        if not check_internet_connection():
-            print("No Internet connection.")
-            sys.exit(1)
-        write_log_header()
-        start = time.time()
-        main()
-        end = time.time()
-        log_print_green(f"Total runtime：{end - start:.4f} seconds.")
-    except KeyboardInterrupt:
-        log_error("Program terminated by user (KeyboardInterrupt).")
-    except Exception as e:
-        log_error("Program terminated by pc.")
-        log_error_with_traceback(e)
+    sys.exit(main())
@@ -10,17 +10,19 @@ import threading
 from customtkinter import *
 from dotenv import load_dotenv
 
-from final_app.main import ensure_standard_fields, sync_relation_field_names
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
 
 load_dotenv()
 from notion_utils.search_database import is_valid_database
 from notion_utils.internet_check import check_internet_connection
+from notion_utils.concurrency import concurrency_controller, configure_concurrency
+from notion_utils.instrumentation import report_api_stats
 from notion_utils.log import write_log_header
 
 app = CTk()
 app.title("Notion Auto Merge Tool")
 app.resizable(False, False)
-app.geometry("720x445")
+app.geometry("720x485")
 
 main_frame = CTkFrame(app)
 main_frame.pack(fill="both", expand=True, padx=20, pady=(10, 0))
@@ -100,7 +102,11 @@ def on_click_sync():
         # Second, use API to check is the database id valid or not (more time)
         if re.fullmatch(r'[a-z0-9]+', combination_database_id):
             if is_valid_database(combination_database_id):
-                if len(target_database_list) > 0:
+                if not apply_worker_bounds():
+                    flash_progressbar_color(progress, color="red")
+                    error_label.configure(text="[!] Workers must be whole numbers with 1 ≤ min ≤ max",
+                                          text_color="red")
+                elif len(target_database_list) > 0:
                     combination_entry.configure(state="disabled")
                     target_ID_list_combobox.configure(state="disabled", text_color="white")
                     merge_button.configure(state="disabled")
@@ -111,7 +117,7 @@ def on_click_sync():
                         progress.configure(progress_color="#1f6aa5")
                         progress.set(0.0)
                         error_label.configure(
-                            text="SYNC Started... Please do not close the program, or the database may be corrupted.",
+                            text="SYNC Started... If it gets interrupted, sync again: completed work is skipped.",
                             text_color="gray")
                         write_log_header()
                         # progress.start()
@@ -138,6 +144,8 @@ def on_click_sync():
                         merge_button.configure(state="normal")
                         target_add_button.configure(state="normal")
                         status_check_button.configure(state="normal")
+                    finally:
+                        report_api_stats()
                 else:
                     print("[!] At least one target database id is required")
                     flash_progressbar_color(progress, color="red")
@@ -157,6 +165,15 @@ def on_click_sync():
         error_label.configure(text="[!] Not Allowed Empty Combination Database ID", text_color="red")
 
 
+def apply_worker_bounds():
+    # Pass the min/max worker fields to the shared concurrency controller
+    try:
+        configure_concurrency(int(min_workers_var.get()), int(max_workers_var.get()))
+        return True
+    except ValueError:
+        return False
+
+
 def is_valid_combination_database():
     id = combination_entry.get().strip().lower()
     if id and is_valid_database(id):
@@ -226,14 +243,24 @@ target_delete_button = CTkButton(master=button_group_frame, text="Delete", width
                                  state="disabled")
 target_delete_button.pack(side="left")
 
-error_label.grid(row=2, column=0, columnspan=4, padx=10, pady=10, sticky="ew")
+# Bounds of the adaptive concurrency controller (it tunes the worker count between them during a sync)
+workers_label = CTkLabel(master=form_frame, text="Workers (min / max):")
+workers_label.grid(row=2, column=0, padx=10, pady=5, sticky="e")
+workers_frame = CTkFrame(form_frame, fg_color="transparent")
+workers_frame.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+min_workers_var = StringVar(value=str(concurrency_controller.min_limit))
+max_workers_var = StringVar(value=str(concurrency_controller.max_limit))
+CTkEntry(master=workers_frame, width=60, textvariable=min_workers_var).pack(side="left", padx=(0, 5))
+CTkEntry(master=workers_frame, width=60, textvariable=max_workers_var).pack(side="left")
+
+error_label.grid(row=3, column=0, columnspan=4, padx=10, pady=10, sticky="ew")
 error_label.configure(anchor="center", justify="center")
 
 progress = CTkProgressBar(master=form_frame, width=450, height=13, progress_color="#1f6aa5")
-progress.grid(row=3, column=0, columnspan=4, pady=10)
+progress.grid(row=4, column=0, columnspan=4, pady=10)
 progress.set(100)
 
-merge_button.grid(row=4, column=0, columnspan=4, pady=10)
+merge_button.grid(row=5, column=0, columnspan=4, pady=10)
 
 combo_var.trace_add("write", lambda *args: on_select_to_valid())
 
@@ -250,7 +277,7 @@ instruction_text = CTkLabel(
         "4. Add at least one valid Target Database ID to the list using the 'Add' button.\n"
         "5. Click 'Sync & Merge Databases' to begin merging pages from the target databases into the combination database.\n"
         "6. ⚠️ If any target database is not properly linked, its pages will be skipped.\n"
-        "7. ⚠️ Warning: Do NOT close the program while syncing, or database corruption may occur.\n"
+        "7. ⚠️ If a sync is interrupted (closed program, network drop), simply sync again: completed work is skipped and every write is journaled under logs/journal/.\n"
         "8. ⚠️ Please **do not manually edit** the combination or target databases in Notion during the sync process to prevent inconsistencies or potential data loss.\n\n"
         "© 2025/6/26  |  All rights reserved by 2ha"
     ),
@@ -0,0 +1,13 @@
+"""
+notion_utils/__main__.py
+
+Purpose:
+    `python -m notion_utils sync ...` runs the headless command line (see `notion_utils/cli.py`).
+"""
+
+import sys
+
+from notion_utils.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,70 +9,374 @@ Purpose:
     - Metadata extraction for syncing
 
 Features:
+    - Bounded, thread-safe LRU caches with an entry limit, an approximate byte budget (measured as JSON size),
+      an optional TTL and hit/miss/eviction counters
+      (`NOTION_PAGE_CACHE_MAX_ENTRIES`, `NOTION_PAGE_CACHE_MAX_BYTES`, `NOTION_CACHE_TTL`)
+    - Single-flight fetching: concurrent misses for the same page or database wait for one in-flight
+      request instead of each sending their own (the number of coalesced calls is counted)
     - Optional cache toggle (`use_cache=True`) for each call
+    - Optional persistent SQLite backend (`persistent=True`, or `NOTION_PERSISTENT_CACHE=<path>`)
+      so warm starts skip most `pages.retrieve` calls
+    - Seeding from query results: pages read through `databases.query` are stored as if retrieved, replacing
+      stored copies whose `last_edited_time` differs
     - Individual release functions for fine-grained control
     - Global cache clearing for reset scenarios (e.g., full sync)
 
+Freshness of the persistent backend:
+    `get_page()` serves SQLite hits without asking Notion (that is the point of the store), so a hit is only
+    as fresh as the last time the page was seeded. This is safe while the page is also returned by a query of
+    the current run, which seeds it before it is looked up (the sync stages work that way). Pages that are only
+    looked up by ID may be served from an earlier run; use `use_cache=False` (or `release_page()`) when a
+    fresh copy matters.
+
 Used in:
     - Phase 4–5: During batch processing and metadata updates
     - All modules that repeatedly access the same pages/databases
 
+Classes:
+    - LRUCache: Lock-protected LRU cache with size, byte and TTL bounds
+    - SingleFlight: Deduplicates concurrent fetches of the same key
+
 Functions:
     - get_page(): Fetch a page, with optional caching
     - get_database(): Fetch a database, with optional caching
+    - enable_persistent_cache(): Turn on the SQLite backend
+    - disable_persistent_cache(): Turn off the SQLite backend
+    - seed_page(): Store a page from a query result, so later lookups skip `pages.retrieve`
     - release_page(): Remove one page from cache
     - release_database(): Remove one database from cache
     - clear_all_cache(): Clear everything from memory
+    - cache_stats(): Hit, miss, eviction and coalescing counters of the in-memory caches
 """
 
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from notion_utils.client import get_notion_client
+from notion_utils.persistent_cache import SQLiteObjectStore
 
 # Get the Notion client instance
 notion = get_notion_client()
 
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and approximate size.
+    """
+
+    def __init__(self, max_entries, max_bytes=None, ttl=None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries.
+            max_bytes (int, optional): Approximate budget for all values, measured as their JSON size.
+            ttl (float, optional): Seconds after which an entry expires (None = never).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evicted_entries": 0, "evicted_bytes": 0, "expired": 0}
+
+    def get(self, key):
+        """
+        Return a cached value and mark it as recently used, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def peek(self, key):
+        """
+        Return a cached value without touching recency or counters, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries until the bounds hold again.
+        Values larger than the whole byte budget are not cached.
+        """
+        size = _approximate_size(value) if self.max_bytes else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                self._evict("evicted_entries")
+            while self.max_bytes and self._bytes > self.max_bytes:
+                self._evict("evicted_bytes")
+
+    def pop(self, key):
+        """
+        Remove an entry if present.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """
+        Remove all entries (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Current `entries` and `bytes`, plus hit, miss, eviction and expiry counters.
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, **self._stats}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self, reason):
+        _, (_, size, _) = self._entries.popitem(last=False)
+        self._bytes -= size
+        self._stats[reason] += 1
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one fetch per key at a time; concurrent callers for the same key share its outcome.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fetch):
+        """
+        Run `fetch()` unless a fetch for the same key is already in flight, in which case wait for it.
+
+        Args:
+            key (Hashable): Identity of the fetched object.
+            fetch (Callable): Function producing the value.
+
+        Returns:
+            Any: The fetched value (the in-flight call's exception is raised to every waiter).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # `forget()` may already have replaced this flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def forget(self, key):
+        """
+        Detach the in-flight fetch of a key, so later callers start a fresh one
+        (used when the object changed while it was being fetched).
+        """
+        with self._lock:
+            self._flights.pop(key, None)
+
+
+def _approximate_size(value):
+    # JSON size is a stable, cheap proxy for the memory held by a page or database object
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str))
+
+
+def _key(object_id):
+    # Notion accepts IDs with or without hyphens; normalize so both share one entry
+    return object_id.replace("-", "")
+
+
+def _optional_float(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
 # Internal caches for pages and databases
-_page_cache = {}
-_database_cache = {}
+_page_cache = LRUCache(
+    max_entries=int(os.getenv("NOTION_PAGE_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("NOTION_PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=_optional_float("NOTION_CACHE_TTL")
+)
+_database_cache = LRUCache(max_entries=256, ttl=_optional_float("NOTION_CACHE_TTL"))
+
+# In-flight fetches, shared by all threads
+_page_flights = SingleFlight()
+_database_flights = SingleFlight()
+
+# Optional persistent backend (None when disabled)
+_persistent_store = None
+
+
+def enable_persistent_cache(path=None):
+    """
+    Enable the persistent SQLite cache backend.
+
+    Args:
+        path (str, optional): Path of the SQLite file. Defaults to `logs/notion_cache.sqlite3`.
+    """
+    global _persistent_store
+    disable_persistent_cache()
+    _persistent_store = SQLiteObjectStore(path) if path else SQLiteObjectStore()
+
+
+def disable_persistent_cache():
+    """
+    Disable the persistent SQLite cache backend (stored entries are kept on disk).
+    """
+    global _persistent_store
+    if _persistent_store is not None:
+        _persistent_store.close()
+        _persistent_store = None
+
 
+def _resolve_store(persistent):
+    # None follows the global setting; True requires the backend, enabling it with defaults if needed
+    if persistent is None:
+        return _persistent_store
+    if persistent and _persistent_store is None:
+        enable_persistent_cache()
+    return _persistent_store if persistent else None
 
-def get_page(page_id, use_cache=True):
+
+def get_page(page_id, use_cache=True, persistent=None):
     """
     Retrieve a Notion page, optionally using a cache to avoid redundant API calls.
 
     Args:
         page_id (str): The ID of the page to retrieve.
         use_cache (bool): If True, use the cache if available.
+        persistent (bool, optional): Use the SQLite backend. None follows `enable_persistent_cache()`.
 
     Returns:
-        dict: The page data.
+        dict: The page data. Persistent hits are not revalidated (see "Freshness" in the module docstring).
     """
-    if use_cache and page_id in _page_cache:
-        # Return from cache if available
-        return _page_cache[page_id]
-    # Retrieve page from Notion API
-    page = notion.pages.retrieve(page_id=page_id)
-    if use_cache:
-        _page_cache[page_id] = page
-    return page
+    if not use_cache:
+        return notion.pages.retrieve(page_id=page_id)
+
+    # Return from cache if available
+    page = _page_cache.get(_key(page_id))
+    if page is not None:
+        return page
+
+    def fetch():
+        store = _resolve_store(persistent)
+        fetched = store.get("page", page_id) if store else None
+        if fetched is None:
+            # Retrieve page from Notion API
+            fetched = notion.pages.retrieve(page_id=page_id)
+            if store:
+                store.put("page", page_id, fetched)
+        _page_cache.put(_key(page_id), fetched)
+        return fetched
 
+    # Concurrent misses for the same page share one request
+    return _page_flights.do(_key(page_id), fetch)
 
-def get_database(database_id, use_cache=True):
+
+def get_database(database_id, use_cache=True, persistent=False):
     """
         Retrieve a Notion database, optionally using a cache to avoid redundant API calls.
 
         Args:
             database_id (str): The ID of the database to retrieve.
             use_cache (bool): If True, use the cache if available.
+            persistent (bool): Also use the SQLite backend. Off by default: unlike pages, databases cannot be
+                revalidated against query results, so a renamed database would stay stale across runs.
 
         Returns:
             dict: The database data.
         """
-    if use_cache and database_id in _database_cache:
-        return _database_cache[database_id]
-    db = notion.databases.retrieve(database_id=database_id)
-    if use_cache:
-        _database_cache[database_id] = db
-    return db
+    if not use_cache:
+        return notion.databases.retrieve(database_id=database_id)
+
+    db = _database_cache.get(_key(database_id))
+    if db is not None:
+        return db
+
+    def fetch():
+        store = _resolve_store(persistent) if persistent else None
+        fetched = store.get("database", database_id) if store else None
+        if fetched is None:
+            fetched = notion.databases.retrieve(database_id=database_id)
+            if store:
+                store.put("database", database_id, fetched)
+        _database_cache.put(_key(database_id), fetched)
+        return fetched
+
+    # Concurrent misses for the same database share one request
+    return _database_flights.do(_key(database_id), fetch)
+
+
+def seed_page(page):
+    """
+    Store a page object from a `databases.query` result in the cache.
+
+    Query results carry the same full page object as `pages.retrieve`, so pages that were already read
+    through a query never need to be retrieved again by later stages. A persistent copy is rewritten only if
+    its `last_edited_time` differs, which is how stored pages are revalidated.
+
+    Args:
+        page (dict): Page object from a query result.
+    """
+    _page_cache.put(_key(page["id"]), page)
+    if _persistent_store is not None:
+        if _persistent_store.get_last_edited_time("page", page["id"]) != page.get("last_edited_time"):
+            _persistent_store.put("page", page["id"], page)
 
 
 def release_database(database_id):
@@ -82,7 +386,10 @@ def release_database(database_id):
     Args:
         database_id (str): The ID of the database to remove.
     """
-    _database_cache.pop(database_id, None)
+    _database_cache.pop(_key(database_id))
+    _database_flights.forget(_key(database_id))
+    if _persistent_store is not None:
+        _persistent_store.delete("database", database_id)
 
 
 def release_page(page_id):
@@ -92,12 +399,39 @@ def release_page(page_id):
     Args:
         page_id (str): The ID of the page to remove.
     """
-    _page_cache.pop(page_id, None)
+    _page_cache.pop(_key(page_id))
+    _page_flights.forget(_key(page_id))
+    if _persistent_store is not None:
+        _persistent_store.delete("page", page_id)
 
 
-def clear_all_cache():
+def clear_all_cache(persistent=False):
     """
     Clear all cached pages and databases.
+
+    Args:
+        persistent (bool): If True, also wipe the persistent SQLite backend.
     """
     _page_cache.clear()
     _database_cache.clear()
+    if persistent and _persistent_store is not None:
+        _persistent_store.clear()
+
+
+def cache_stats():
+    """
+    Return the counters of the in-memory page and database caches.
+
+    Returns:
+        dict: `pages` and `databases` statistics (see `LRUCache.stats()`), each with a `coalesced` count
+            of requests saved by single-flight fetching.
+    """
+    return {
+        "pages": {**_page_cache.stats(), "coalesced": _page_flights.coalesced},
+        "databases": {**_database_cache.stats(), "coalesced": _database_flights.coalesced},
+    }
+
+
+# Allow enabling the persistent backend from the environment (e.g. in `.env`)
+if os.getenv("NOTION_PERSISTENT_CACHE"):
+    enable_persistent_cache(os.getenv("NOTION_PERSISTENT_CACHE"))
@@ -0,0 +1,495 @@
+"""
+notion_utils/cli.py
+
+Purpose:
+    Headless command-line entry point for running syncs on a server (e.g. from cron) without the Tk GUI:
+
+        python -m notion_utils sync jobs.yaml
+        python -m notion_utils sync --combination <ID> --target <ID> --target <ID> --mode fused
+        python -m notion_utils sync --apply-plan logs/plans/plan.json --resume
+        python -m notion_utils watch jobs.yaml --interval 30
+
+    A config file lists any number of combination jobs. Jobs run concurrently in one process, so they share
+    one API budget: the gateway's rate limit and the adaptive concurrency controller are process-wide.
+
+    `watch` runs as a daemon: it syncs every job incrementally once, then polls the target databases and applies
+    only their changes until stopped (Ctrl+C / SIGTERM end it after the current cycle; during the initial sync
+    Ctrl+C interrupts it, and `--resume` continues it).
+
+Config file (JSON, or YAML when PyYAML is installed); `${VAR}` references are expanded from the environment
+(and `.env`):
+
+    rate_limit: 3             # requests/second shared by all jobs (default: NOTION_RATE_LIMIT)
+    max_parallel_jobs: 2      # jobs running at once (default 2)
+    min_workers: 2            # bounds of the shared concurrency controller (optional)
+    max_workers: 32
+    interval: 60              # watch: seconds between polls
+    sweep_every: 60           # watch: remove orphaned pages every this many polls (0 never)
+    jobs:
+      - name: projects
+        combination: ${PROJECTS_COMBINATION_ID}
+        targets: [<target database ID>, <target database ID>]
+        mode: staged          # staged (default), async, incremental or fused
+        dry_run: false        # only plan and save the plan
+        resume: false         # skip operations an interrupted run already applied
+
+Output:
+    Logs go to the console and `logs/` as usual. When all jobs are done, one line of JSON stats is printed
+    last on stdout (and written to `--output` if given): per job its status, error, runtime, API calls and
+    API errors, plus totals. Exit code 0 when every job succeeded, 1 when a job failed, 2 on invalid usage.
+
+Functions:
+    - load_config(): Read, expand and validate a config file
+    - validate_jobs(): Normalize and check job definitions
+    - run_job(): Run one job and return its stats
+    - run_jobs(): Run jobs concurrently under the shared API budget
+    - watch_jobs(): Initial sync, then poll and apply changes until stopped
+    - main(): Command-line entrypoint
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import yaml
+except ImportError:  # YAML configs are optional; JSON always works
+    yaml = None
+
+from notion_utils.client import configure_rate_limit, get_notion_client
+from notion_utils.concurrency import configure_concurrency
+from notion_utils.instrumentation import stage, recorder, report_api_stats
+from notion_utils.internet_check import check_internet_connection
+from notion_utils.log import log_print_green, log_error, write_log_header, flush_logs
+from notion_utils.relate_databases_to_one.relate_databases_watch import SWEEP_EVERY, SyncWatcher, watch
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names, plan_sync, \
+    apply_sync_plan
+
+MODES = ("staged", "async", "incremental", "fused")
+
+# Default number of jobs running at once
+MAX_PARALLEL_JOBS = 2
+
+# Default seconds between two polls in watch mode
+WATCH_INTERVAL = 60
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_USAGE = 2
+
+_DATABASE_ID = re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+
+
+def load_config(path):
+    """
+    Read a JSON or YAML config file, expand `${VAR}` references and validate its jobs.
+
+    Args:
+        path (str): Config file path (`.yaml` / `.yml` for YAML, anything else is read as JSON).
+
+    Returns:
+        dict: The config with validated `jobs` (see `validate_jobs()`).
+
+    Raises:
+        ValueError: If the file is malformed or a job is invalid.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise ValueError("YAML configs need PyYAML (pip install pyyaml); use a JSON config instead.")
+        try:
+            config = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}") from e
+    else:
+        try:
+            config = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must contain a mapping with a 'jobs' list.")
+    config = _expand_env(config)
+    config["jobs"] = validate_jobs(config.get("jobs"))
+    return config
+
+
+def _expand_env(value):
+    # Expand ${VAR} / $VAR in every string of the config
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, list):
+        return [_expand_env(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _expand_env(item) for key, item in value.items()}
+    return value
+
+
+def validate_jobs(jobs):
+    """
+    Normalize job definitions and check them.
+
+    Args:
+        jobs (List[dict]): Raw jobs with `name`, `combination`, `targets` and optional `mode`, `dry_run`,
+            `resume`, `plan_output`.
+
+    Returns:
+        List[dict]: Jobs with every key filled in.
+
+    Raises:
+        ValueError: On missing or malformed fields, unknown modes, duplicate names, or two jobs writing
+            to the same combination database (they would race on its pages and journal).
+    """
+    if not jobs or not isinstance(jobs, list):
+        raise ValueError("The config needs a non-empty 'jobs' list.")
+    normalized = []
+    names = set()
+    combinations = set()
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            raise ValueError(f"Job #{index + 1} must be a mapping.")
+        name = str(job.get("name") or f"job{index + 1}")
+        if "/" in name or name in names:
+            raise ValueError(f"Job name '{name}' is duplicated or contains '/'.")
+        names.add(name)
+
+        combination = _database_id(job.get("combination"), f"Job '{name}': combination")
+        targets = job.get("targets")
+        if not targets or not isinstance(targets, list):
+            raise ValueError(f"Job '{name}' needs a non-empty 'targets' list.")
+        targets = [_database_id(target, f"Job '{name}': target") for target in targets]
+
+        mode = job.get("mode", "staged")
+        if mode not in MODES:
+            raise ValueError(f"Job '{name}': unknown mode '{mode}' (expected one of {', '.join(MODES)}).")
+        key = combination.replace("-", "").lower()
+        if key in combinations:
+            raise ValueError(f"Job '{name}': another job already syncs combination database {combination}.")
+        combinations.add(key)
+
+        normalized.append({
+            "name": name,
+            "combination": combination,
+            "targets": targets,
+            "mode": mode,
+            "dry_run": bool(job.get("dry_run", False)),
+            "resume": bool(job.get("resume", False)),
+            "plan_output": job.get("plan_output"),
+        })
+    return normalized
+
+
+def _database_id(value, label):
+    # Database IDs are 32 hex digits, with or without hyphens; unexpanded ${VAR}s end up here too
+    if not isinstance(value, str) or not _DATABASE_ID.match(value.strip()):
+        raise ValueError(f"{label} '{value}' is not a Notion database ID (is its environment variable set?).")
+    return value.strip()
+
+
+def _no_progress(_):
+    pass
+
+
+def _root_error(exception):
+    # The sync wraps errors in RuntimeErrors at every level; the innermost one says what went wrong
+    while exception.__cause__ is not None:
+        exception = exception.__cause__
+    return f"{type(exception).__name__}: {exception}"
+
+
+def run_job(job):
+    """
+    Run one job (dry run or sync) and return its stats. Errors are logged and reported, not raised.
+
+    Args:
+        job (dict): A validated job.
+
+    Returns:
+        dict: `name`, `combination`, `mode`, `dry_run`, `status` ('ok' or 'failed'), `error` and `seconds`,
+            plus `plan` (summary and estimated cost) for dry runs and `operations` for fused runs.
+    """
+    start = time.time()
+    result = {"name": job["name"], "combination": job["combination"], "mode": job["mode"],
+              "dry_run": job["dry_run"], "status": "ok", "error": None}
+    print(f"Job '{job['name']}' started.")
+    try:
+        # API calls of the job are recorded under its own stage prefix
+        with stage(f"job:{job['name']}"):
+            if job["dry_run"]:
+                plan = plan_sync(job["combination"], job["targets"], job["plan_output"])
+                result["plan"] = {"summary": plan.summary(), "estimated_cost": plan.estimated_cost(),
+                                  "schema_changes": len(plan.schema_changes), "creates": plan.count("create"),
+                                  "updates": plan.count("update"), "archives": plan.count("archive"),
+                                  "unchanged": plan.unchanged}
+            else:
+                ensure_standard_fields(job["combination"], job["targets"], _no_progress)
+                operations = sync_relation_field_names(job["combination"], job["targets"], _no_progress,
+                                                       use_async=job["mode"] == "async",
+                                                       incremental=job["mode"] == "incremental",
+                                                       fused=job["mode"] == "fused", resume=job["resume"])
+                if operations is not None:
+                    result["operations"] = operations
+        log_print_green(f"Job '{job['name']}' finished.")
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = _root_error(e)
+        log_error(f"Job '{job['name']}' failed.", e)
+    result["seconds"] = round(time.time() - start, 3)
+    return result
+
+
+def run_jobs(jobs, max_parallel_jobs=MAX_PARALLEL_JOBS):
+    """
+    Run jobs concurrently. All jobs share the process-wide rate limit and concurrency controller.
+
+    Args:
+        jobs (List[dict]): Validated jobs.
+        max_parallel_jobs (int): Number of jobs running at once.
+
+    Returns:
+        List[dict]: Stats of each job (in the order of `jobs`), including its API calls.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel_jobs, len(jobs))))
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, run_job, job) for job in jobs]
+        results = [future.result() for future in futures]
+    except BaseException:
+        # Ctrl+C: don't start the queued jobs (running ones finish their current work; the journal keeps it)
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    # Attribute the recorded API calls to the jobs through their stage prefix
+    rows = [row for row in recorder.snapshot() if row["stage"] != "TOTAL"]
+    for result in results:
+        prefix = f"job:{result['name']}"
+        job_rows = [row for row in rows if row["stage"] == prefix or row["stage"].startswith(prefix + "/")]
+        calls = {}
+        for row in job_rows:
+            calls[row["endpoint"]] = calls.get(row["endpoint"], 0) + row["calls"]
+        result["api_calls"] = dict(sorted(calls.items()))
+        result["api_calls_total"] = sum(calls.values())
+        result["api_errors"] = sum(sum(row["errors"].values()) for row in job_rows)
+        result["api_retries"] = sum(row["retries"] for row in job_rows)
+    return results
+
+
+def watch_jobs(jobs, interval=WATCH_INTERVAL, cycles=None, sweep_every=SWEEP_EVERY, stop_event=None,
+               max_parallel_jobs=MAX_PARALLEL_JOBS, on_started=None):
+    """
+    Watch mode: bring every job up to date with an incremental sync, then poll the target databases every
+    `interval` seconds and apply only their changes (see `relate_databases_watch.py`).
+
+    Args:
+        jobs (List[dict]): Validated jobs (their mode is ignored; watching is always incremental).
+        interval (float): Seconds between polls.
+        cycles (int, optional): Stop after this many polls (default: run until `stop_event` is set).
+        sweep_every (int): Remove orphaned combination pages every this many cycles (0 never).
+        stop_event (threading.Event, optional): Set it to stop after the current cycle.
+        max_parallel_jobs (int): Jobs running their initial sync at once.
+        on_started (Callable, optional): Called once the initial sync is done, right before polling starts.
+
+    Returns:
+        List[dict]: Stats of each job: its initial sync (see `run_jobs()`) plus `watch` with the number of
+            `cycles`, `polls`, `changed` and `failed` pages, and orphan `sweeps`.
+    """
+    results = run_jobs([dict(job, mode="incremental", dry_run=False) for job in jobs], max_parallel_jobs)
+    watchers = []
+    for job, result in zip(jobs, results):
+        if result["status"] != "ok":
+            continue
+        watcher = SyncWatcher(job["combination"], job["targets"], sweep_every)
+        try:
+            with stage(f"job:{job['name']}"):
+                watcher.start()
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = _root_error(e)
+            log_error(f"Job '{job['name']}' could not start watching.", e)
+            continue
+        watchers.append((result, watcher))
+
+    if on_started is not None:
+        on_started()
+    if watchers:
+        log_print_green(f"Watching {len(watchers)} combination database(s) every {interval:g}s.")
+        watch([watcher for _, watcher in watchers], interval, cycles, stop_event)
+    for result, watcher in watchers:
+        result["watch"] = {"cycles": watcher.cycles, **watcher.stats}
+    return results
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="python -m notion_utils",
+                                     description="Headless Notion database merge tool.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="Run sync jobs from a config file or the command line.")
+    watch_parser = commands.add_parser("watch", help="Keep combination databases in sync by polling for changes.")
+    for command in (sync, watch_parser):
+        command.add_argument("config", nargs="?", help="JSON or YAML file listing the jobs.")
+        command.add_argument("--combination", help="Single job: combination database ID.")
+        command.add_argument("--target", action="append", help="Single job: target database ID (repeatable).")
+        command.add_argument("--job", action="append", help="Only run the named job(s) from the config.")
+        command.add_argument("--resume", action="store_true",
+                             help="Skip the operations interrupted runs already applied (see logs/journal/).")
+        command.add_argument("--rate", type=float, help="Requests/second shared by all jobs.")
+        command.add_argument("--max-parallel-jobs", type=int, help="Jobs running at once (default 2).")
+        command.add_argument("--min-workers", type=int, help="Lowest number of concurrent page operations.")
+        command.add_argument("--max-workers", type=int, help="Highest number of concurrent page operations.")
+        command.add_argument("--output", help="Also write the JSON stats to this file.")
+    sync.add_argument("--mode", choices=MODES, help="Sync engine (default: staged).")
+    sync.add_argument("--apply-plan", help="Apply a plan saved by a dry run.")
+    sync.add_argument("--dry-run", action="store_true", help="Plan every job and save the plans; write nothing.")
+    sync.add_argument("--plan-output", help="Single job: dry-run plan path (default: logs/plans/).")
+    sync.add_argument("--fused", action="store_true", help="Shortcut for --mode fused.")
+    watch_parser.add_argument("--interval", type=float, help=f"Seconds between polls (default {WATCH_INTERVAL}).")
+    watch_parser.add_argument("--cycles", type=int, help="Stop after this many polls (default: until stopped).")
+    watch_parser.add_argument("--sweep-every", type=int,
+                              help=f"Remove orphaned pages every this many polls (default {SWEEP_EVERY}, 0 never).")
+    return parser
+
+
+def _jobs_from_args(args):
+    # A config file, or a single job described on the command line
+    config = {}
+    mode = getattr(args, "mode", None)
+    if args.config:
+        config = load_config(args.config)
+        jobs = config["jobs"]
+        if args.job:
+            unknown = set(args.job) - {job["name"] for job in jobs}
+            if unknown:
+                raise ValueError(f"Unknown job(s): {', '.join(sorted(unknown))}")
+            jobs = [job for job in jobs if job["name"] in args.job]
+    elif args.combination:
+        jobs = validate_jobs([{"name": "default", "combination": args.combination, "targets": args.target,
+                               "mode": mode or "staged", "plan_output": getattr(args, "plan_output", None)}])
+    else:
+        raise ValueError("Give a config file, --combination with --target, or --apply-plan.")
+    for job in jobs:
+        if mode:
+            job["mode"] = mode
+        if getattr(args, "fused", False):
+            job["mode"] = "fused"
+        job["dry_run"] = job["dry_run"] or getattr(args, "dry_run", False)
+        job["resume"] = job["resume"] or args.resume
+    return config, jobs
+
+
+def main(argv=None):
+    """
+    Command-line entrypoint.
+
+    Args:
+        argv (List[str], optional): Arguments (default: `sys.argv[1:]`).
+
+    Returns:
+        int: Exit code (0 success, 1 a job failed, 2 invalid usage or config).
+    """
+    args = _build_parser().parse_args(argv)
+    started = datetime.now()
+    watching = args.command == "watch"
+    try:
+        if not watching and args.apply_plan:
+            config = {}
+            jobs = [{"name": "apply_plan", "plan": args.apply_plan, "resume": args.resume}]
+        else:
+            config, jobs = _jobs_from_args(args)
+        rate = args.rate or config.get("rate_limit")
+        if rate:
+            configure_rate_limit(float(rate))
+        configure_concurrency(args.min_workers or config.get("min_workers"),
+                              args.max_workers or config.get("max_workers"))
+        max_parallel_jobs = int(args.max_parallel_jobs or config.get("max_parallel_jobs") or MAX_PARALLEL_JOBS)
+        if max_parallel_jobs < 1:
+            raise ValueError(f"Invalid max_parallel_jobs: {max_parallel_jobs}")
+        if watching:
+            interval = float(args.interval if args.interval is not None else config.get("interval", WATCH_INTERVAL))
+            sweep_every = args.sweep_every if args.sweep_every is not None \
+                else int(config.get("sweep_every", SWEEP_EVERY))
+            if interval <= 0 or sweep_every < 0 or (args.cycles is not None and args.cycles < 1):
+                raise ValueError("interval and cycles must be positive and sweep_every not negative.")
+    except (OSError, ValueError) as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    # The offline fake backend needs no network
+    if os.getenv("NOTION_BACKEND", "notion") != "fake" and not check_internet_connection():
+        print("[!] No Internet connection.", file=sys.stderr)
+        return EXIT_JOB_FAILED
+
+    write_log_header()
+    interrupted = False
+    try:
+        if watching:
+            stop_event = threading.Event()
+            previous_handlers = {}
+
+            def stop_on_signals():
+                # Only once polling starts: Ctrl+C / SIGTERM then finish the current cycle and print the stats.
+                # During the initial sync Ctrl+C interrupts as usual
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    previous_handlers[signum] = signal.signal(signum, lambda *_: stop_event.set())
+
+            try:
+                results = watch_jobs(jobs, interval, args.cycles, sweep_every, stop_event, max_parallel_jobs,
+                                     on_started=stop_on_signals)
+            finally:
+                for signum, handler in previous_handlers.items():
+                    signal.signal(signum, handler)
+        elif args.apply_plan:
+            results = [_run_plan_job(jobs[0])]
+        else:
+            results = run_jobs(jobs, max_parallel_jobs)
+    except KeyboardInterrupt:
+        interrupted = True
+        results = []
+        log_error("Interrupted by user (KeyboardInterrupt); rerun with --resume to continue.")
+    finally:
+        # Show which stages and endpoints used the request budget
+        stats_rows = recorder.snapshot()
+        report_api_stats()
+
+    totals = [row for row in stats_rows if row["stage"] == "TOTAL"]
+    summary = {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round((datetime.now() - started).total_seconds(), 3),
+        "rate_limit": get_notion_client().bucket.rate,
+        "jobs": results,
+        "ok": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "interrupted": interrupted,
+        "api_calls": {row["endpoint"]: row["calls"] for row in totals},
+        "api_calls_total": sum(row["calls"] for row in totals),
+    }
+    flush_logs()
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+    # Last line of stdout: machine-readable stats
+    print(json.dumps(summary, ensure_ascii=False))
+    return EXIT_JOB_FAILED if summary["failed"] or interrupted else EXIT_OK
+
+
+def _run_plan_job(job):
+    # Apply a saved plan; reported like a job
+    start = time.time()
+    result = {"name": job["name"], "plan": job["plan"], "status": "ok", "error": None}
+    try:
+        with stage(f"job:{job['name']}"):
+            result["operations"] = apply_sync_plan(job["plan"], job["resume"])
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = _root_error(e)
+    result["seconds"] = round(time.time() - start, 3)
+    return result
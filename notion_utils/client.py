@@ -9,19 +9,34 @@ Features:
     - Loads environment variables via `dotenv`
     - Validates presence of `NOTION_TOKEN`
     - Exposes a `get_notion_client()` function to return a shared Notion Client
+    - Wraps the client in a rate-limited `NotionGateway` so all modules share one request budget
+      (`NOTION_RATE_LIMIT` requests/second, default 3; `NOTION_MAX_RETRIES` retries, default 5)
+    - Every call is recorded by the process-wide `instrumentation.recorder` and feeds the shared
+      adaptive concurrency controller (`concurrency.concurrency_controller`)
+    - Offline mode: `NOTION_BACKEND=fake` (or `use_fake_backend()`) serves every call from an in-memory
+      `FakeWorkspace` instead of api.notion.com; no token is needed
 
 Used in:
     - All modules that require Notion API access (read/write)
     - Phase 1–5, caching, syncing, metadata operations
 
-Function:
-    - get_notion_client(): Returns an authenticated Notion Client object using the token from `.env`
+Functions:
+    - get_notion_client(): Returns the shared, rate-limited Notion client using the token from `.env`
+    - get_async_notion_client(): Returns a new rate-limited `AsyncClient` sharing the same request budget
+    - use_fake_backend(): Switches the shared client to the in-memory fake Notion backend
+    - configure_rate_limit(): Changes the shared request budget at runtime
 """
 
 import os
+import threading
 
 from dotenv import load_dotenv
-from notion_client import Client
+from notion_client import AsyncClient, Client
+
+from notion_utils.concurrency import concurrency_controller
+from notion_utils.fake_notion import FakeAsyncNotionClient, FakeNotionClient, FakeWorkspace
+from notion_utils.gateway import AsyncNotionGateway, NotionGateway
+from notion_utils.instrumentation import recorder
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,20 +46,101 @@ if os.getenv("DEBUG") == "true":
     print("DEBUG NOTION_TOKEN =", os.getenv("NOTION_TOKEN"))
 
 
-def get_notion_client() -> Client:
+# Shared gateway instance (one token bucket for the whole process)
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_notion_client(backend=None) -> NotionGateway:
+    """
+    Returns the shared Notion client using the NOTION_TOKEN from environment variables.
+    The client is wrapped in a `NotionGateway`, so every caller shares one rate limit and retry policy.
+
+    Args:
+        backend (str, optional): 'notion' or 'fake'; only used when the shared client is first created.
+            Defaults to the `NOTION_BACKEND` environment variable, then 'notion'.
+
+    Raises:
+        ValueError: If NOTION_TOKEN is not set in the environment (real backend only).
+
+    Returns:
+        NotionGateway: An authenticated, rate-limited proxy of the Notion API client.
     """
-    Returns a configured Notion client using the NOTION_TOKEN from environment variables.
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            # Wrap the configured Notion client in the shared gateway
+            backend = backend or os.getenv("NOTION_BACKEND", "notion")
+            _gateway = NotionGateway(
+                FakeNotionClient() if backend == "fake" else Client(auth=_get_token()),
+                rate=float(os.getenv("NOTION_RATE_LIMIT", "3")),
+                max_retries=int(os.getenv("NOTION_MAX_RETRIES", "5")),
+                recorder=recorder,
+                concurrency=concurrency_controller
+            )
+        return _gateway
+
+
+def get_async_notion_client() -> AsyncNotionGateway:
+    """
+    Returns a new async Notion client for one event loop run.
+    It shares the token bucket and the concurrency controller of `get_notion_client()`, so threaded and async
+    code stay under one rate limit and adapt to the same congestion signal.
+    Close it with `await client.aclose()` when the run is finished.
 
     Raises:
         ValueError: If NOTION_TOKEN is not set in the environment.
 
     Returns:
-        Client: An authenticated instance of the Notion API client.
+        AsyncNotionGateway: An authenticated, rate-limited proxy of the Notion async client.
+    """
+    shared = get_notion_client()
+    if isinstance(shared.client, FakeNotionClient):
+        client = FakeAsyncNotionClient(shared.client.workspace)
+    else:
+        client = AsyncClient(auth=_get_token())
+    return AsyncNotionGateway(
+        client,
+        max_retries=shared.max_retries,
+        bucket=shared.bucket,
+        recorder=shared.recorder,
+        concurrency=shared.concurrency
+    )
+
+
+def use_fake_backend(workspace=None) -> FakeWorkspace:
+    """
+    Switch the shared client to the in-memory fake Notion backend.
+    Modules keep their `notion = get_notion_client()` reference, so this works after they are imported.
+
+    Args:
+        workspace (FakeWorkspace, optional): The workspace to serve; a new empty one is created if omitted.
+
+    Returns:
+        FakeWorkspace: The workspace now behind the shared client.
+    """
+    gateway = get_notion_client(backend="fake")
+    gateway.client = FakeNotionClient(workspace)
+    return gateway.client.workspace
+
+
+def configure_rate_limit(rate):
     """
+    Change the request rate shared by every client of the process (threaded and async).
+
+    Args:
+        rate (float): Allowed requests per second.
+
+    Raises:
+        ValueError: If the rate is not positive.
+    """
+    get_notion_client().bucket.set_rate(rate)
+
+
+def _get_token():
     # Read the API token from the environment
     token = os.getenv("NOTION_TOKEN")
     # Raise an error if the token is missing
     if not token:
         raise ValueError("NOTION_TOKEN is not set. Please check your .env file.")
-    # Return the configured Notion client
-    return Client(auth=token)
+    return token
@@ -0,0 +1,173 @@
+"""
+notion_utils/concurrency.py
+
+Purpose:
+    Adapts the number of concurrent page operations to what Notion currently tolerates, instead of a
+    hard-coded thread count. The controller follows AIMD (additive increase, multiplicative decrease),
+    the scheme TCP uses for congestion control:
+    - While calls succeed and latency stays near its best observed level, the limit grows by about one
+      slot per window of completed calls
+    - On a 429, a 5xx or a timeout, the limit is cut in half (at most once per cooldown period, so one
+      burst of 429s counts as one congestion event)
+
+Features:
+    - One controller shared by every worker pool and stage, so what one stage learns carries over
+    - Fed by the gateway, which reports every attempt's latency and whether it hit congestion
+    - Min/max bounds from `NOTION_MIN_CONCURRENCY` / `NOTION_MAX_CONCURRENCY`, `configure_concurrency()`,
+      the CLI (`--min-workers` / `--max-workers`) or the GUI
+
+Used in:
+    - `gateway.NotionGateway`: Reports call outcomes via `observe()`
+    - `relate_databases_to_one_update.run_in_pool()`: Gates task submission via `acquire()` / `release()`
+    - `relate_databases_to_one_async.AdaptiveSemaphore`: Reads `limit` to bound the async engine
+
+Class:
+    - AdaptiveConcurrency: Thread-safe AIMD concurrency limit
+
+Module instance:
+    - concurrency_controller: The controller shared by the whole package
+
+Functions:
+    - configure_concurrency(): Change the bounds of the shared controller
+"""
+
+import os
+import threading
+import time
+
+
+class AdaptiveConcurrency:
+    """
+    Thread-safe concurrency limit that grows while the API is healthy and halves under congestion.
+    """
+
+    def __init__(self, min_limit=2, max_limit=32, initial=10, backoff=0.5, latency_tolerance=2.0, cooldown=1.0):
+        """
+        Args:
+            min_limit (int): Lowest allowed number of concurrent operations.
+            max_limit (int): Highest allowed number of concurrent operations.
+            initial (int): Starting limit (clamped to the bounds).
+            backoff (float): Factor applied to the limit on congestion.
+            latency_tolerance (float): Growth stops while the smoothed latency exceeds this multiple
+                of the best smoothed latency seen.
+            cooldown (float): Minimum seconds between two decreases.
+        """
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(f"Invalid concurrency bounds: min={min_limit}, max={max_limit}")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self._limit = float(min(max_limit, max(min_limit, initial)))
+        self._in_flight = 0
+        self._latency = None
+        self._best_latency = None
+        self._last_decrease = 0.0
+        self._stats = {"increases": 0, "decreases": 0, "peak_limit": int(self._limit)}
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        Returns:
+            int: The current number of operations allowed to run at once.
+        """
+        with self._condition:
+            return int(self._limit)
+
+    def acquire(self):
+        """
+        Block until fewer operations than the current limit are running, then take a slot.
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        """
+        Give back a slot taken with `acquire()`.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def observe(self, latency, congested=False):
+        """
+        Feed the outcome of one API call into the controller.
+
+        Args:
+            latency (float): Duration of the call in seconds.
+            congested (bool): True if the call hit a 429, a 5xx or a timeout.
+        """
+        with self._condition:
+            if congested:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._stats["decreases"] += 1
+                return
+
+            # Exponentially weighted latency; its best value approximates the uncongested latency
+            self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            if self._best_latency is None or self._latency < self._best_latency:
+                self._best_latency = self._latency
+            if self._latency > self._best_latency * self.latency_tolerance or self._limit >= self.max_limit:
+                return
+
+            previous = int(self._limit)
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            if int(self._limit) > previous:
+                self._stats["increases"] += 1
+                self._stats["peak_limit"] = max(self._stats["peak_limit"], int(self._limit))
+                self._condition.notify_all()
+
+    def configure(self, min_limit=None, max_limit=None):
+        """
+        Change the bounds; the current limit is clamped into them.
+
+        Args:
+            min_limit (int, optional): New lower bound.
+            max_limit (int, optional): New upper bound.
+        """
+        min_limit = self.min_limit if min_limit is None else min_limit
+        max_limit = self.max_limit if max_limit is None else max_limit
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(f"Invalid concurrency bounds: min={min_limit}, max={max_limit}")
+        with self._condition:
+            self.min_limit = min_limit
+            self.max_limit = max_limit
+            self._limit = float(min(max_limit, max(min_limit, self._limit)))
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Current `limit`, `in_flight`, bounds, and counts of increases and decreases.
+        """
+        with self._condition:
+            return {"limit": int(self._limit), "in_flight": self._in_flight, "min_limit": self.min_limit,
+                    "max_limit": self.max_limit, **self._stats}
+
+
+# Controller shared by every worker pool in the process
+concurrency_controller = AdaptiveConcurrency(
+    min_limit=int(os.getenv("NOTION_MIN_CONCURRENCY", "2")),
+    max_limit=int(os.getenv("NOTION_MAX_CONCURRENCY", "32"))
+)
+
+
+def configure_concurrency(min_limit=None, max_limit=None):
+    """
+    Change the bounds of the shared concurrency controller.
+
+    Args:
+        min_limit (int, optional): Lowest number of concurrent page operations.
+        max_limit (int, optional): Highest number of concurrent page operations.
+
+    Raises:
+        ValueError: If the bounds are invalid.
+    """
+    concurrency_controller.configure(min_limit, max_limit)
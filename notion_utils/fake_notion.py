@@ -0,0 +1,600 @@
+"""
+notion_utils/fake_notion.py
+
+Purpose:
+    Provides an in-process fake of the Notion API for tests, benchmarks and load tests, so the sync engine
+    can run against synthetic workspaces without a live token or network access.
+
+    It implements the subset of the `notion_client.Client` surface used by this project:
+    - databases.query / retrieve / update / create
+    - pages.retrieve / create / update
+
+Features:
+    - Real cursor pagination (`has_more` / `next_cursor`, `page_size` capped at 100)
+    - Filters: property filters (relation, title, rich_text, date, checkbox, number), timestamp filters,
+      and nested `and` / `or` compounds; sorts on properties and timestamps
+    - Relation semantics: relations pointing at archived pages disappear from reads, archived pages
+      disappear from queries and reject property updates until they are restored
+    - Schema semantics of `databases.update`: add, rename, retype and delete properties by name or ID,
+      rejecting a rename and a retype of the same property in one request and duplicate names
+    - Configurable latency, a server-side rate limit and random 429 injection (with `Retry-After`)
+    - Per-endpoint call counters
+    - Errors are raised as `notion_client.APIResponseError`, exactly like the real client
+
+Selection:
+    - Set `NOTION_BACKEND=fake` before the package is imported, or
+    - call `client.use_fake_backend(workspace)` to switch the shared client at runtime
+
+Used in:
+    - Benchmarks and local pipeline runs (`ensure_standard_fields()` + `sync_relation_field_names()`)
+
+Classes:
+    - FakeWorkspace: The in-memory state, configuration and counters
+    - FakeNotionClient: Synchronous client facade
+    - FakeAsyncNotionClient: Asynchronous client facade over the same workspace
+
+Functions:
+    - build_synthetic_workspace(): Create target databases full of pages plus an empty combination database
+"""
+
+import asyncio
+import copy
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+from notion_client import APIErrorCode, APIResponseError
+
+# Notion returns at most 100 results per query
+MAX_PAGE_SIZE = 100
+
+
+def _now():
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def _key(object_id):
+    # Notion accepts IDs with or without hyphens
+    return str(object_id).replace("-", "")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _rich_text(content):
+    return [{
+        "type": "text",
+        "text": {"content": content, "link": None},
+        "plain_text": content,
+        "href": None
+    }]
+
+
+def _plain_text(rich_text):
+    return "".join(part.get("plain_text", part.get("text", {}).get("content", "")) for part in rich_text or [])
+
+
+def _api_error(status, code, message, headers=None):
+    response = httpx.Response(status, headers=headers or {}, text=message,
+                              request=httpx.Request("POST", "https://fake.notion.local/v1"))
+    return APIResponseError(response, message, code)
+
+
+def _validation_error(message):
+    return _api_error(400, APIErrorCode.ValidationError, message)
+
+
+class FakeWorkspace:
+    """
+    In-memory Notion workspace shared by the fake sync and async clients.
+    """
+
+    def __init__(self, latency=0.0, rate_limit=None, throttle_rate=0.0, retry_after=1.0, seed=None):
+        """
+        Args:
+            latency (float or tuple): Seconds added to every call, or a (min, max) range.
+            rate_limit (float, optional): Requests per second before 429s are returned (None = unlimited).
+            throttle_rate (float): Probability of injecting a 429 into any call.
+            retry_after (float): `Retry-After` seconds sent with injected 429s.
+            seed (int, optional): Random seed for reproducible latency and injection.
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._databases = {}
+        self._pages = {}
+        self._sequence = 0
+        self._lock = threading.RLock()
+        self._allowance = float(rate_limit or 0)
+        self._allowance_updated = time.monotonic()
+
+    # --- Request admission -------------------------------------------------------------------------------------
+
+    def admit(self, endpoint):
+        """
+        Count a call and decide whether it is throttled.
+
+        Returns:
+            float: Latency to simulate for this call.
+
+        Raises:
+            APIResponseError: A 429 response (rate limit exceeded or injected).
+        """
+        with self._lock:
+            self.calls[endpoint] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._allowance = min(self.rate_limit,
+                                      self._allowance + (now - self._allowance_updated) * self.rate_limit)
+                self._allowance_updated = now
+                if self._allowance < 1:
+                    self.throttled += 1
+                    wait = (1 - self._allowance) / self.rate_limit
+                    raise _api_error(429, APIErrorCode.RateLimited, "Rate limited",
+                                     {"Retry-After": f"{wait:.3f}"})
+                self._allowance -= 1
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise _api_error(429, APIErrorCode.RateLimited, "Rate limited (injected)",
+                                 {"Retry-After": str(self.retry_after)})
+            if isinstance(self.latency, tuple):
+                return self._random.uniform(*self.latency)
+            return self.latency
+
+    def reset_counters(self):
+        """
+        Reset the per-endpoint call counters and the throttle counter.
+        """
+        with self._lock:
+            self.calls.clear()
+            self.throttled = 0
+
+    # --- Databases ---------------------------------------------------------------------------------------------
+
+    def create_database(self, parent=None, title=None, properties=None, **kwargs):
+        with self._lock:
+            database_id = str(uuid.uuid4())
+            now = _now()
+            schema = {}
+            for name, config in (properties or {}).items():
+                schema[name] = self._build_property(name, config, "title" if "title" in config else None)
+            if sum(1 for prop in schema.values() if prop["type"] == "title") != 1:
+                raise _validation_error("A database needs exactly one title property.")
+            database = {
+                "object": "database",
+                "id": database_id,
+                "created_time": now,
+                "last_edited_time": now,
+                "title": copy.deepcopy(title) if title else _rich_text(""),
+                "parent": parent or {"type": "workspace", "workspace": True},
+                "properties": schema,
+                "archived": False
+            }
+            for part in database["title"]:
+                part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+            self._databases[_key(database_id)] = database
+            return copy.deepcopy(database)
+
+    def retrieve_database(self, database_id, **kwargs):
+        with self._lock:
+            return copy.deepcopy(self._get_database(database_id))
+
+    def update_database(self, database_id, properties=None, title=None, **kwargs):
+        with self._lock:
+            database = self._get_database(database_id)
+            schema = copy.deepcopy(database["properties"])
+            renames = {}
+            for key, change in (properties or {}).items():
+                name = self._resolve_property_name(schema, key)
+                if change is None:
+                    if name is None:
+                        raise _validation_error(f"Property '{key}' does not exist.")
+                    if schema[name]["type"] == "title":
+                        raise _validation_error("The title property cannot be deleted.")
+                    del schema[name]
+                    continue
+                type_keys = [k for k in change if k != "name"]
+                if name is None:
+                    if not type_keys:
+                        raise _validation_error(f"Property '{key}' does not exist.")
+                    new_name = change.get("name", key)
+                    schema[new_name] = self._build_property(new_name, change)
+                    continue
+                if "name" in change and type_keys:
+                    raise _validation_error("A property's name and type cannot be updated at the same time.")
+                if type_keys:
+                    if schema[name]["type"] == "title" and type_keys[0] != "title":
+                        raise _validation_error("The title property cannot change type.")
+                    schema[name] = self._build_property(name, change, schema[name]["id"])
+                if "name" in change and change["name"] != name:
+                    renames[name] = change["name"]
+
+            # Apply renames together, then reject duplicate names
+            renamed = {}
+            for name, prop in schema.items():
+                new_name = renames.get(name, name)
+                if new_name in renamed:
+                    raise _validation_error(f"Property name '{new_name}' is already in use.")
+                prop["name"] = new_name
+                renamed[new_name] = prop
+            if title is not None:
+                database["title"] = copy.deepcopy(title)
+                for part in database["title"]:
+                    part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+
+            # Carry page values over to the new names; retyped properties start empty
+            old_schema = database["properties"]
+            for page in self._pages.values():
+                if _key(page["parent"].get("database_id", "")) != _key(database["id"]):
+                    continue
+                values = {}
+                for name, prop in renamed.items():
+                    old = next((old_name for old_name, old_prop in old_schema.items()
+                                if old_prop["id"] == prop["id"]), None)
+                    if old is not None and old_schema[old]["type"] == prop["type"]:
+                        values[name] = page["properties"][old]
+                    else:
+                        values[name] = self._empty_value(prop)
+                page["properties"] = values
+
+            database["properties"] = renamed
+            database["last_edited_time"] = _now()
+            return copy.deepcopy(database)
+
+    def query_database(self, database_id, filter=None, sorts=None, start_cursor=None, page_size=MAX_PAGE_SIZE,
+                       **kwargs):
+        with self._lock:
+            database = self._get_database(database_id)
+            if page_size > MAX_PAGE_SIZE:
+                raise _validation_error(f"page_size should be ≤ {MAX_PAGE_SIZE}.")
+            pages = [page for page in self._pages.values()
+                     if _key(page["parent"].get("database_id", "")) == _key(database["id"]) and not page["archived"]]
+            if filter:
+                pages = [page for page in pages if self._matches(database, page, filter)]
+
+            if sorts:
+                for sort in reversed(sorts):
+                    pages.sort(key=lambda page: self._sort_key(database, page, sort),
+                               reverse=sort.get("direction") == "descending")
+                offset = int(start_cursor) if start_cursor else 0
+                batch = pages[offset:offset + page_size]
+                next_cursor = str(offset + page_size) if offset + page_size < len(pages) else None
+            else:
+                # Default order is creation order; the cursor is the sequence number of the next page,
+                # so pages archived while a caller paginates do not shift the remaining results
+                pages.sort(key=lambda page: page["_sequence"])
+                first = int(start_cursor) if start_cursor else 0
+                pages = [page for page in pages if page["_sequence"] >= first]
+                batch = pages[:page_size]
+                next_cursor = str(pages[page_size]["_sequence"]) if len(pages) > page_size else None
+
+            return {
+                "object": "list",
+                "results": [self._render_page(page) for page in batch],
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+                "type": "page_or_database"
+            }
+
+    # --- Pages -------------------------------------------------------------------------------------------------
+
+    def create_page(self, parent=None, properties=None, **kwargs):
+        with self._lock:
+            if not parent or "database_id" not in parent:
+                raise _validation_error("The fake backend only supports pages inside databases.")
+            database = self._get_database(parent["database_id"])
+            page_id = str(uuid.uuid4())
+            now = _now()
+            self._sequence += 1
+            page = {
+                "object": "page",
+                "id": page_id,
+                "created_time": now,
+                "last_edited_time": now,
+                "archived": False,
+                "parent": {"type": "database_id", "database_id": database["id"]},
+                "properties": {name: self._empty_value(prop) for name, prop in database["properties"].items()},
+                "_sequence": self._sequence
+            }
+            self._apply_values(database, page, properties or {})
+            self._pages[_key(page_id)] = page
+            return self._render_page(page)
+
+    def retrieve_page(self, page_id, **kwargs):
+        with self._lock:
+            return self._render_page(self._get_page(page_id))
+
+    def update_page(self, page_id, properties=None, archived=None, **kwargs):
+        with self._lock:
+            page = self._get_page(page_id)
+            if properties and page["archived"] and archived is not False:
+                raise _validation_error("Can't edit block that is archived. "
+                                        "You must unarchive the block before editing.")
+            if properties:
+                database = self._get_database(page["parent"]["database_id"])
+                self._apply_values(database, page, properties)
+            if archived is not None:
+                page["archived"] = bool(archived)
+            page["last_edited_time"] = _now()
+            return self._render_page(page)
+
+    # --- Internals ---------------------------------------------------------------------------------------------
+
+    def _get_database(self, database_id):
+        database = self._databases.get(_key(database_id))
+        if database is None:
+            raise _api_error(404, APIErrorCode.ObjectNotFound, f"Could not find database with ID: {database_id}.")
+        return database
+
+    def _get_page(self, page_id):
+        page = self._pages.get(_key(page_id))
+        if page is None:
+            raise _api_error(404, APIErrorCode.ObjectNotFound, f"Could not find page with ID: {page_id}.")
+        return page
+
+    @staticmethod
+    def _resolve_property_name(schema, key):
+        if key in schema:
+            return key
+        return next((name for name, prop in schema.items() if prop["id"] == key), None)
+
+    def _build_property(self, name, config, property_id=None):
+        property_type = next((k for k in config if k != "name"), None)
+        if property_type is None:
+            raise _validation_error(f"Property '{name}' needs a type.")
+        settings = copy.deepcopy(config[property_type]) or {}
+        if property_type == "relation":
+            if "database_id" not in settings:
+                raise _validation_error("A relation property needs a database_id.")
+            target = self._get_database(settings["database_id"])
+            settings = {
+                "database_id": target["id"],
+                "type": settings.get("type", "single_property"),
+                "single_property": {}
+            }
+        return {
+            "id": property_id or ("title" if property_type == "title" else uuid.uuid4().hex[:4]),
+            "name": name,
+            "type": property_type,
+            property_type: settings
+        }
+
+    @staticmethod
+    def _empty_value(prop):
+        property_type = prop["type"]
+        if property_type in ("title", "rich_text", "multi_select", "people", "files"):
+            value = []
+        elif property_type == "relation":
+            value = []
+        elif property_type == "checkbox":
+            value = False
+        else:
+            value = None
+        rendered = {"id": prop["id"], "type": property_type, property_type: value}
+        if property_type == "relation":
+            rendered["has_more"] = False
+        return rendered
+
+    def _apply_values(self, database, page, properties):
+        for key, value in properties.items():
+            name = self._resolve_property_name(database["properties"], key)
+            if name is None:
+                raise _validation_error(f"{key} is not a property that exists.")
+            prop = database["properties"][name]
+            property_type = prop["type"]
+            if property_type not in value:
+                raise _validation_error(f"{name} is expected to be {property_type}.")
+            raw = value[property_type]
+            if property_type in ("title", "rich_text"):
+                stored = [_rich_text(part.get("text", {}).get("content", ""))[0] for part in raw or []]
+            elif property_type == "relation":
+                for item in raw or []:
+                    related = self._get_page(item["id"])
+                    if _key(related["parent"].get("database_id", "")) != _key(prop["relation"]["database_id"]):
+                        raise _validation_error(f"Page {item['id']} is not in the related database.")
+                stored = [{"id": self._get_page(item["id"])["id"]} for item in raw or []]
+            elif property_type == "date":
+                # Notion echoes UTC datetimes back with an explicit offset
+                stored = None if raw is None else {
+                    "start": raw["start"].replace("Z", "+00:00") if raw.get("start") else None,
+                    "end": raw.get("end"),
+                    "time_zone": raw.get("time_zone")
+                }
+            else:
+                stored = copy.deepcopy(raw)
+            page["properties"][name] = {"id": prop["id"], "type": property_type, property_type: stored}
+            if property_type == "relation":
+                page["properties"][name]["has_more"] = False
+
+    def _visible_relation(self, value):
+        # Relations to archived pages are not returned by Notion
+        return [item for item in value
+                if _key(item["id"]) in self._pages and not self._pages[_key(item["id"])]["archived"]]
+
+    def _render_page(self, page):
+        rendered = copy.deepcopy({key: value for key, value in page.items() if not key.startswith("_")})
+        for prop in rendered["properties"].values():
+            if prop["type"] == "relation":
+                prop["relation"] = self._visible_relation(prop["relation"])
+        return rendered
+
+    def _property_value(self, database, page, name):
+        if name not in database["properties"]:
+            raise _validation_error(f"Could not find property with name or id: {name}")
+        prop = page["properties"][name]
+        if prop["type"] == "relation":
+            return self._visible_relation(prop["relation"])
+        return prop[prop["type"]]
+
+    def _matches(self, database, page, condition):
+        if "and" in condition:
+            return all(self._matches(database, page, sub) for sub in condition["and"])
+        if "or" in condition:
+            return any(self._matches(database, page, sub) for sub in condition["or"])
+        if "timestamp" in condition:
+            timestamp = condition["timestamp"]
+            return self._compare_date(_parse_time(page[timestamp]), condition[timestamp])
+        name = condition.get("property")
+        value = self._property_value(database, page, name)
+        kind, operation = next((k, v) for k, v in condition.items() if k != "property")
+        if kind == "relation":
+            ids = {_key(item["id"]) for item in value}
+            if "contains" in operation:
+                return _key(operation["contains"]) in ids
+            if "does_not_contain" in operation:
+                return _key(operation["does_not_contain"]) not in ids
+            if "is_empty" in operation:
+                return not ids
+            if "is_not_empty" in operation:
+                return bool(ids)
+        elif kind in ("title", "rich_text"):
+            text = _plain_text(value)
+            if "equals" in operation:
+                return text == operation["equals"]
+            if "contains" in operation:
+                return operation["contains"] in text
+            if "is_empty" in operation:
+                return not text
+            if "is_not_empty" in operation:
+                return bool(text)
+        elif kind == "date":
+            if "is_empty" in operation:
+                return not value
+            if "is_not_empty" in operation:
+                return bool(value)
+            return bool(value) and self._compare_date(_parse_time(value["start"]), operation)
+        elif kind == "checkbox":
+            return bool(value) == operation["equals"]
+        elif kind == "number":
+            if "equals" in operation:
+                return value == operation["equals"]
+        raise _validation_error(f"Unsupported filter in fake backend: {condition}")
+
+    @staticmethod
+    def _compare_date(value, operation):
+        operator, bound = next(iter(operation.items()))
+        bound = _parse_time(bound)
+        return {
+            "equals": value == bound,
+            "before": value < bound,
+            "after": value > bound,
+            "on_or_before": value <= bound,
+            "on_or_after": value >= bound,
+        }[operator]
+
+    def _sort_key(self, database, page, sort):
+        if "timestamp" in sort:
+            return page[sort["timestamp"]]
+        value = self._property_value(database, page, sort["property"])
+        if isinstance(value, list):
+            return _plain_text(value) if value and "plain_text" in value[0] else str(len(value))
+        if isinstance(value, dict):
+            return value.get("start") or ""
+        return "" if value is None else str(value)
+
+
+class _FakeEndpoint:
+    """
+    Binds endpoint methods (e.g. `pages.retrieve`) to a workspace operation.
+    """
+
+    def __init__(self, client, name, operations):
+        self._client = client
+        self._name = name
+        self._operations = operations
+
+    def __getattr__(self, method):
+        if method not in self._operations:
+            raise AttributeError(f"Fake Notion backend does not implement {self._name}.{method}")
+        operation = self._operations[method]
+        return lambda **kwargs: self._client.dispatch(f"{self._name}.{method}", operation, kwargs)
+
+
+class FakeNotionClient:
+    """
+    Synchronous fake of `notion_client.Client` backed by a `FakeWorkspace`.
+    """
+
+    def __init__(self, workspace=None):
+        self.workspace = workspace or FakeWorkspace()
+        self.databases = _FakeEndpoint(self, "databases", {
+            "query": self.workspace.query_database,
+            "retrieve": self.workspace.retrieve_database,
+            "update": self.workspace.update_database,
+            "create": self.workspace.create_database,
+        })
+        self.pages = _FakeEndpoint(self, "pages", {
+            "retrieve": self.workspace.retrieve_page,
+            "create": self.workspace.create_page,
+            "update": self.workspace.update_page,
+        })
+
+    def dispatch(self, endpoint, operation, kwargs):
+        latency = self.workspace.admit(endpoint)
+        if latency:
+            time.sleep(latency)
+        return operation(**kwargs)
+
+
+class FakeAsyncNotionClient(FakeNotionClient):
+    """
+    Asynchronous fake of `notion_client.AsyncClient`; endpoint calls return awaitables.
+    """
+
+    def dispatch(self, endpoint, operation, kwargs):
+        async def call():
+            latency = self.workspace.admit(endpoint)
+            if latency:
+                await asyncio.sleep(latency)
+            return operation(**kwargs)
+
+        return call()
+
+    async def aclose(self):
+        return None
+
+
+def build_synthetic_workspace(workspace, target_count, pages_per_target, title_prefix="Source"):
+    """
+    Fill a fake workspace with target databases full of pages, plus one empty combination database.
+
+    Args:
+        workspace (FakeWorkspace): The workspace to fill.
+        target_count (int): Number of target databases.
+        pages_per_target (int or List[int]): Pages per target database (one value or one per target).
+        title_prefix (str): Prefix of the target database titles.
+
+    Returns:
+        tuple: (combination_database_id, list of target database IDs)
+    """
+    if isinstance(pages_per_target, int):
+        pages_per_target = [pages_per_target] * target_count
+
+    target_ids = []
+    for index, page_count in enumerate(pages_per_target):
+        database = workspace.create_database(
+            title=_rich_text(f"{title_prefix} {index + 1}"),
+            properties={"Title": {"title": {}}, "Notes": {"rich_text": {}}}
+        )
+        target_ids.append(database["id"].replace("-", ""))
+        for page_index in range(page_count):
+            workspace.create_page(
+                parent={"database_id": database["id"]},
+                properties={"Title": {"title": [{"text": {"content": f"Page {index + 1}-{page_index + 1}"}}]}}
+            )
+
+    combination = workspace.create_database(
+        title=_rich_text("Combination"),
+        properties={"Title": {"title": {}}}
+    )
+    return combination["id"].replace("-", ""), target_ids
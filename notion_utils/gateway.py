@@ -0,0 +1,329 @@
+"""
+notion_utils/gateway.py
+
+Purpose:
+    Wraps the Notion client in a rate-limit-aware gateway so every request in the process shares one
+    request budget. Notion allows roughly 3 requests per second per integration; without coordination,
+    worker pools burst past that limit and the resulting 429 responses turn into silently skipped pages.
+
+Features:
+    - Shared token bucket: all threads draw from the same budget (default 3 requests/second)
+    - Honors the `Retry-After` header on 429 responses and pauses the whole bucket meanwhile
+    - Retries with jittered exponential backoff on 429s, 5xx responses and timeouts
+      (server errors and timeouts are only retried for idempotent endpoints, never for `pages.create`)
+    - Counters for calls, throttled calls, retries and failures
+    - Optional per-endpoint recorder (see `instrumentation.py`) for latency, wait time, retries and errors
+    - Optional adaptive concurrency controller (see `concurrency.py`) fed with each attempt's latency
+      and whether it hit congestion (429, 5xx, timeout)
+    - Async variant for `AsyncClient` that can share the same token bucket as the threaded gateway
+
+Used in:
+    - `client.get_notion_client()`, which returns a shared gateway instead of a bare `Client`
+    - All modules that send requests to Notion
+
+Classes:
+    - TokenBucket: Thread-safe token bucket with a global pause
+    - NotionGateway: Client proxy that applies the bucket and retry policy to every endpoint call
+    - AsyncNotionGateway: Same policy for `AsyncClient`; endpoint calls return awaitables
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+from notion_client.errors import RequestTimeoutError
+
+# Status codes worth retrying (429 is always retried; the rest only for idempotent calls)
+RATE_LIMITED_STATUS = 429
+RETRYABLE_SERVER_STATUSES = {500, 502, 503, 504}
+
+# Calls that create data and must not be retried after an ambiguous failure
+NON_IDEMPOTENT_CALLS = {"pages.create", "databases.create"}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate of the whole process.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (int): Maximum number of tokens (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """
+        Consume a token if one is available.
+
+        Returns:
+            float: 0 if a token was consumed, otherwise the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until a token is available, then consume it.
+        """
+        while (wait := self.try_acquire()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Wait on the event loop until a token is available, then consume it.
+        """
+        while (wait := self.try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+    def set_rate(self, rate):
+        """
+        Change the number of tokens added per second.
+
+        Args:
+            rate (float): New rate (must be positive).
+        """
+        if rate <= 0:
+            raise ValueError(f"Invalid rate limit: {rate}")
+        with self._lock:
+            # Credit the tokens earned at the old rate before switching
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for the given number of seconds (e.g. after a `Retry-After`).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class _Endpoint:
+    """
+    Proxy for one client endpoint (e.g. `pages`) that routes method calls through the gateway.
+    """
+
+    def __init__(self, gateway, name, endpoint):
+        self._gateway = gateway
+        self._name = name
+        self._endpoint = endpoint
+
+    def __getattr__(self, method):
+        attribute = getattr(self._endpoint, method)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            return self._gateway.call(f"{self._name}.{method}", attribute, *args, **kwargs)
+
+        return call
+
+
+class NotionGateway:
+    """
+    Rate-limited, retrying proxy around a Notion `Client`.
+
+    Endpoints are accessed exactly like on the client (`gateway.pages.retrieve(page_id=...)`).
+    """
+
+    def __init__(self, client, rate=3.0, burst=3, max_retries=5, base_delay=0.5, max_delay=30.0, bucket=None,
+                 recorder=None, concurrency=None):
+        """
+        Args:
+            client (Client): The Notion client to wrap.
+            rate (float): Allowed requests per second.
+            burst (int): Maximum burst size of the token bucket.
+            max_retries (int): Retries per call before the error is raised.
+            base_delay (float): Initial backoff delay in seconds.
+            max_delay (float): Upper bound of a single backoff delay in seconds.
+            bucket (TokenBucket, optional): Existing bucket to share with another gateway.
+            recorder (CallRecorder, optional): Receives the latency, wait time and outcome of every attempt.
+            concurrency (AdaptiveConcurrency, optional): Receives the latency and congestion signal of every attempt.
+        """
+        self.client = client
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.recorder = recorder
+        self.concurrency = concurrency
+        self._stats = {"calls": 0, "throttled": 0, "retried": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return _Endpoint(self, name, getattr(self.client, name))
+
+    def call(self, endpoint, func, *args, **kwargs):
+        """
+        Send one API call under the shared rate limit, retrying transient failures.
+
+        Args:
+            endpoint (str): Endpoint name such as 'pages.retrieve' (used for the retry policy).
+            func (Callable): The underlying client method.
+
+        Returns:
+            Any: The API response.
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            self.bucket.acquire()
+            sent = time.perf_counter()
+            self._count("calls")
+            try:
+                result = func(*args, **kwargs)
+                self._record(endpoint, started, sent)
+                return result
+            except Exception as e:
+                self._record(endpoint, started, sent, e)
+                delay = self._retry_delay(endpoint, e, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+            attempt += 1
+            self._count("retried")
+            if self.recorder is not None:
+                self.recorder.record_retry(endpoint)
+            time.sleep(delay)
+
+    def stats(self):
+        """
+        Return a snapshot of the gateway counters.
+
+        Returns:
+            dict: Counts of `calls`, `throttled`, `retried` and `failed` requests.
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        """
+        Reset all gateway counters to zero.
+        """
+        with self._stats_lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _record(self, endpoint, started, sent, error=None):
+        # Report rate-limit wait and request latency of one attempt
+        latency = time.perf_counter() - sent
+        if self.recorder is not None:
+            self.recorder.record_wait(endpoint, sent - started)
+            self.recorder.record_call(endpoint, latency, error)
+        if self.concurrency is not None and (error is None or _is_congestion(error)):
+            self.concurrency.observe(latency, congested=error is not None)
+
+    def _backoff(self, attempt):
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _retry_delay(self, endpoint, error, attempt):
+        """
+        Decide whether a failed call is retried.
+
+        Returns:
+            float or None: Seconds to wait before retrying, or None if the error is final.
+        """
+        status = getattr(error, "status", None)
+        if status == RATE_LIMITED_STATUS:
+            self._count("throttled")
+            retry_after = _parse_retry_after(getattr(error, "headers", None))
+            delay = retry_after + random.uniform(0, self.base_delay) if retry_after is not None \
+                else self._backoff(attempt)
+            # Everyone shares the integration limit, so the whole bucket waits
+            self.bucket.pause(delay)
+            return delay
+        if endpoint in NON_IDEMPOTENT_CALLS:
+            return None
+        if status in RETRYABLE_SERVER_STATUSES or isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+            return self._backoff(attempt)
+        return None
+
+
+class AsyncNotionGateway(NotionGateway):
+    """
+    Rate-limited, retrying proxy around a Notion `AsyncClient`.
+
+    Endpoint calls return awaitables (`await gateway.pages.retrieve(page_id=...)`).
+    """
+
+    async def call(self, endpoint, func, *args, **kwargs):
+        """
+        Send one API call under the shared rate limit, retrying transient failures without blocking the loop.
+
+        Args:
+            endpoint (str): Endpoint name such as 'pages.retrieve' (used for the retry policy).
+            func (Callable): The underlying async client method.
+
+        Returns:
+            Any: The API response.
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            await self.bucket.acquire_async()
+            sent = time.perf_counter()
+            self._count("calls")
+            try:
+                result = await func(*args, **kwargs)
+                self._record(endpoint, started, sent)
+                return result
+            except Exception as e:
+                self._record(endpoint, started, sent, e)
+                delay = self._retry_delay(endpoint, e, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+            attempt += 1
+            self._count("retried")
+            if self.recorder is not None:
+                self.recorder.record_retry(endpoint)
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """
+        Close the underlying async HTTP client.
+        """
+        await self.client.aclose()
+
+
+def _is_congestion(error):
+    # Errors that mean "slow down" rather than "this request is wrong"
+    status = getattr(error, "status", None)
+    return status == RATE_LIMITED_STATUS or status in RETRYABLE_SERVER_STATUSES \
+        or isinstance(error, (RequestTimeoutError, httpx.TransportError))
+
+
+def _parse_retry_after(headers):
+    """
+    Read the `Retry-After` header (seconds) from a response, if present.
+    """
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
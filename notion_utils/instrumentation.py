@@ -0,0 +1,272 @@
+"""
+notion_utils/instrumentation.py
+
+Purpose:
+    Records every Notion API call made through the shared gateway: how many calls each endpoint receives,
+    in which pipeline stage, how long they take, and how many are retried or fail. At the end of a run the
+    numbers are printed as a table and appended to `logs/api_stats.log`, showing which step spends the
+    rate limit.
+
+Features:
+    - Counts per (stage, endpoint): calls, errors (by status / exception type), retries
+    - Latency histograms with log-spaced buckets (p50 / p95 / p99 estimated from bucket bounds)
+    - Time spent waiting for the shared rate limit, per stage
+    - Pipeline stages are tracked with a context variable, so they follow work into worker threads
+      (when submitted with `contextvars.copy_context().run`) and asyncio tasks
+
+Used in:
+    - `gateway.NotionGateway`: Records each attempt of each call
+    - Sync engines and `notion_utils/sync_pipeline.py`: Mark stages with `with stage("merge"): ...`
+
+Classes:
+    - LatencyHistogram: Fixed-bucket latency histogram with quantile estimates
+    - CallRecorder: Thread-safe per-stage, per-endpoint call statistics
+
+Functions:
+    - stage(): Context manager that labels the API calls made inside it
+    - current_stage(): Name of the active stage
+    - report_api_stats(): Print the summary table and append it to the log
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from notion_utils.log import LOG_DIR
+
+API_STATS_LOG_PATH = os.path.join(LOG_DIR, "api_stats.log")
+
+# Bucket upper bounds in seconds: 1 ms to ~65 s, four buckets per doubling (≈19% resolution)
+BUCKET_BOUNDS = tuple(0.001 * 2 ** (index / 4) for index in range(65))
+
+# Stage label of calls made outside any `stage()` block
+DEFAULT_STAGE = "other"
+
+_current_stage = contextvars.ContextVar("notion_stage", default=DEFAULT_STAGE)
+
+
+@contextmanager
+def stage(name):
+    """
+    Label every API call made inside the block (including worker threads and tasks started from it).
+    Nested stages are joined with '/', e.g. 'sync/merge'.
+
+    Args:
+        name (str): The stage name.
+    """
+    parent = _current_stage.get()
+    token = _current_stage.set(name if parent == DEFAULT_STAGE else f"{parent}/{name}")
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def current_stage():
+    """
+    Returns:
+        str: Name of the active stage.
+    """
+    return _current_stage.get()
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with fixed, log-spaced buckets.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile as the upper bound of the bucket holding it.
+
+        Args:
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            float or None: Latency in seconds, or None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = Counter()
+        self.retries = 0
+        self.wait = 0.0
+
+
+class CallRecorder:
+    """
+    Thread-safe statistics of API calls, keyed by stage and endpoint.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, endpoint):
+        key = (current_stage(), endpoint)
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = _EndpointStats()
+        return entry
+
+    def record_call(self, endpoint, seconds, error=None):
+        """
+        Record one attempt of an API call.
+
+        Args:
+            endpoint (str): Endpoint name such as 'pages.retrieve'.
+            seconds (float): Duration of the attempt.
+            error (Exception, optional): The error raised by the attempt, if any.
+        """
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry.latency.record(seconds)
+            if error is not None:
+                entry.errors[str(getattr(error, "status", None) or type(error).__name__)] += 1
+
+    def record_retry(self, endpoint):
+        """
+        Record that a failed call will be retried.
+        """
+        with self._lock:
+            self._entry(endpoint).retries += 1
+
+    def record_wait(self, endpoint, seconds):
+        """
+        Record time spent waiting for the shared rate limit before a call.
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._entry(endpoint).wait += seconds
+
+    def reset(self):
+        """
+        Drop all recorded statistics.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self):
+        """
+        Return the statistics as rows, one per (stage, endpoint), followed by per-endpoint totals
+        (stage 'TOTAL').
+
+        Returns:
+            List[dict]: Rows with calls, errors, retries, latency quantiles (ms) and total/wait seconds.
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            totals = {}
+            for (_, endpoint), entry in items:
+                total = totals.setdefault(endpoint, _EndpointStats())
+                for index, bucket_count in enumerate(entry.latency.counts):
+                    total.latency.counts[index] += bucket_count
+                total.latency.count += entry.latency.count
+                total.latency.total += entry.latency.total
+                total.latency.max = max(total.latency.max, entry.latency.max)
+                total.errors.update(entry.errors)
+                total.retries += entry.retries
+                total.wait += entry.wait
+            rows = [_row(stage_name, endpoint, entry) for (stage_name, endpoint), entry in items]
+            rows += [_row("TOTAL", endpoint, entry) for endpoint, entry in sorted(totals.items())]
+            return rows
+
+    def format_summary(self):
+        """
+        Render the statistics as a fixed-width table.
+
+        Returns:
+            str: The table.
+        """
+        rows = self.snapshot()
+        if not rows:
+            return "No Notion API calls recorded."
+        stage_width = max(len("stage"), *(len(row["stage"]) for row in rows)) + 2
+        header = (f"{'stage':<{stage_width}}{'endpoint':<20}{'calls':>8}{'errors':>8}{'retries':>9}"
+                  f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'total s':>10}{'wait s':>9}")
+        lines = [header, "-" * len(header)]
+        previous_stage = None
+        for row in rows:
+            if row["stage"] == "TOTAL" and previous_stage != "TOTAL":
+                lines.append("-" * len(header))
+            previous_stage = row["stage"]
+            lines.append(f"{row['stage']:<{stage_width}}{row['endpoint']:<20}{row['calls']:>8}"
+                         f"{sum(row['errors'].values()):>8}{row['retries']:>9}"
+                         f"{_ms(row['p50_ms']):>9}{_ms(row['p95_ms']):>9}{_ms(row['p99_ms']):>9}"
+                         f"{row['total_s']:>10.2f}{row['wait_s']:>9.2f}")
+        return "\n".join(lines)
+
+
+def _row(stage_name, endpoint, entry):
+    def to_ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 1)
+
+    return {
+        "stage": stage_name,
+        "endpoint": endpoint,
+        "calls": entry.latency.count,
+        "errors": dict(entry.errors),
+        "retries": entry.retries,
+        "p50_ms": to_ms(entry.latency.quantile(0.50)),
+        "p95_ms": to_ms(entry.latency.quantile(0.95)),
+        "p99_ms": to_ms(entry.latency.quantile(0.99)),
+        "total_s": round(entry.latency.total, 3),
+        "wait_s": round(entry.wait, 3),
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+# Process-wide recorder used by the shared gateway
+recorder = CallRecorder()
+
+
+def report_api_stats(reset=True):
+    """
+    Print the API call summary of this run and append it to `logs/api_stats.log`.
+
+    Args:
+        reset (bool): Clear the statistics afterwards, so the next run starts from zero.
+
+    Returns:
+        List[dict]: The summary rows (see `CallRecorder.snapshot()`).
+    """
+    rows = recorder.snapshot()
+    table = recorder.format_summary()
+    print(table)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(API_STATS_LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(f"\n==== API calls [{timestamp}] ====\n{table}\n")
+    if reset:
+        recorder.reset()
+    return rows
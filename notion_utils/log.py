@@ -8,6 +8,9 @@ Purpose:
 Features:
     - Colored console output (green: success, yellow: info/warning, red: error)
     - Log file separation: `info.log` and `error.log`
+    - File writes are queued to a single background writer thread that keeps the log files open and
+      flushes in batches, so worker threads never block on file I/O and lines never interleave
+    - Everything queued is flushed at interpreter exit (or on demand with `flush_logs()`)
     - Optional exception handling and traceback output
     - Utility to insert header markers for each run session
 
@@ -21,9 +24,14 @@ Functions:
     - log_error(): Log an error with optional exception
     - log_error_with_traceback(): Full traceback output for debugging
     - write_log_header(): Marks a new run in log files
+    - flush_logs(): Block until every queued log line is written to disk
 """
 
+import atexit
 import os
+import queue
+import sys
+import threading
 import traceback
 from datetime import datetime
 
@@ -38,13 +46,21 @@ os.makedirs(LOG_DIR, exist_ok=True)
 INFO_LOG_PATH = os.path.join(LOG_DIR, "info.log")
 ERROR_LOG_PATH = os.path.join(LOG_DIR, "error.log")
 
+# Maximum number of lines the writer handles between two flushes
+WRITE_BATCH_SIZE = 500
+
+# Queue of (path, text) lines and flush requests (threading.Event), drained by the writer thread
+_log_queue = queue.SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+
 
 def log_print_green(text):
     # Print text in bright green (for success messages)
     GREEN = "\033[92m"  # Bright Green
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     _write_to_file(INFO_LOG_PATH, f"[{timestamp}] [INFO] {text}")
-    print(f"{GREEN}{text}{RESET}")
+    _print_line(f"{GREEN}{text}{RESET}")
 
 
 def log_print_yellow(text):
@@ -52,7 +68,7 @@ def log_print_yellow(text):
     YELLOW = "\033[93m"  # Bright Yellow
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     _write_to_file(INFO_LOG_PATH, f"[{timestamp}] [INFO] {text}")
-    print(f"{YELLOW}{text}{RESET}")
+    _print_line(f"{YELLOW}{text}{RESET}")
 
 
 def log_error(message, exception=None):
@@ -67,11 +83,11 @@ def log_error(message, exception=None):
 
     # Print main error message with red color
     _write_to_file(ERROR_LOG_PATH, f"[{timestamp}] [ERROR] {message}")
-    print(f"{RED}[{timestamp}{RESET}] [ERROR] {message}")
+    _print_line(f"{RED}[{timestamp}{RESET}] [ERROR] {message}")
     if exception:
         # Print exception details if provided
         _write_to_file(ERROR_LOG_PATH, f"[{timestamp}] [DETAIL] {exception}")
-        print(f"{RED}[{timestamp}{RESET}] [DETAIL] {exception}")
+        _print_line(f"{RED}[{timestamp}{RESET}] [DETAIL] {exception}")
 
 
 def log_error_with_traceback(exception):
@@ -80,13 +96,79 @@ def log_error_with_traceback(exception):
     """
     if exception:
         traceback_str = "".join(traceback.format_exception(type(exception), exception, exception.__traceback__))
-        print(f"{RED}{traceback_str}{RESET}")
+        _print_line(f"{RED}{traceback_str}{RESET}")
         _write_to_file(ERROR_LOG_PATH, traceback_str)
 
 
 def _write_to_file(filepath, text):
-    with open(filepath, "a", encoding="utf-8") as f:
-        f.write(text + "\n")
+    # Hand the line to the background writer; the caller never waits for disk I/O
+    _ensure_writer()
+    _log_queue.put((filepath, text))
+
+
+def _print_line(text):
+    # One write call per line, so lines printed from worker threads do not interleave
+    sys.stdout.write(text + "\n")
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="log-writer", daemon=True)
+            _writer.start()
+
+
+def _writer_loop():
+    """
+    Drain the log queue forever: write up to WRITE_BATCH_SIZE lines, flush the open files, then
+    release any `flush_logs()` callers waiting on that batch.
+    """
+    files = {}
+    while True:
+        batch = [_log_queue.get()]
+        try:
+            while len(batch) < WRITE_BATCH_SIZE:
+                batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        flush_requests = []
+        try:
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    flush_requests.append(item)
+                    continue
+                filepath, text = item
+                f = files.get(filepath)
+                if f is None:
+                    f = files[filepath] = open(filepath, "a", encoding="utf-8")
+                f.write(text + "\n")
+            for f in files.values():
+                f.flush()
+        except OSError as e:
+            sys.stderr.write(f"Failed to write log files: {e}\n")
+        finally:
+            for event in flush_requests:
+                event.set()
+
+
+def flush_logs(timeout=5.0):
+    """
+    Block until every log line queued so far has been written and flushed to disk.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait.
+
+    Returns:
+        bool: True if the queue was flushed in time, False otherwise.
+    """
+    event = threading.Event()
+    _ensure_writer()
+    _log_queue.put(event)
+    return event.wait(timeout)
 
 
 def write_log_header():
@@ -95,4 +177,8 @@ def write_log_header():
     header = f"\n{separator}\nNew Run at {now}\n{separator}"
     _write_to_file(INFO_LOG_PATH, header)
     _write_to_file(ERROR_LOG_PATH, header)
-    print(f"{RED}{header}{RESET}")
+    _print_line(f"{RED}{header}{RESET}")
+
+
+# Write out everything still queued before the interpreter exits
+atexit.register(flush_logs)
@@ -0,0 +1,119 @@
+"""
+notion_utils/persistent_cache.py
+
+Purpose:
+    Implements an on-disk store for raw Notion page and database JSON, backed by SQLite.
+    Entries survive process exit, so GUI sessions and CLI runs can start warm instead of
+    re-retrieving every page they touched last time.
+
+Features:
+    - One table keyed by (kind, id), storing the raw JSON and its `last_edited_time`
+    - Cheap revalidation: compare a stored `last_edited_time` against a fresh query result
+    - Safe for use from worker threads (single connection guarded by a lock, WAL journaling)
+
+Used in:
+    - `cache.py`: Backing store for `get_page()` / `get_database()` when the persistent cache is enabled
+
+Class:
+    - SQLiteObjectStore: Persistent key-value store for Notion objects
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from notion_utils.log import LOG_DIR
+
+# Default location of the cache database
+DEFAULT_CACHE_PATH = os.path.join(LOG_DIR, "notion_cache.sqlite3")
+
+
+class SQLiteObjectStore:
+    """
+    Persistent store of Notion objects (pages and databases) keyed by kind and ID.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        """
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "kind TEXT NOT NULL, "
+                "id TEXT NOT NULL, "
+                "last_edited_time TEXT, "
+                "data TEXT NOT NULL, "
+                "PRIMARY KEY (kind, id))"
+            )
+
+    def get(self, kind, object_id):
+        """
+        Return a stored object, or None if it is not stored.
+
+        Args:
+            kind (str): 'page' or 'database'.
+            object_id (str): The Notion ID of the object.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM objects WHERE kind = ? AND id = ?", (kind, _key(object_id))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_last_edited_time(self, kind, object_id):
+        """
+        Return the stored `last_edited_time` of an object without decoding its JSON, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_edited_time FROM objects WHERE kind = ? AND id = ?", (kind, _key(object_id))
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, kind, object_id, data):
+        """
+        Store (or replace) an object.
+
+        Args:
+            kind (str): 'page' or 'database'.
+            object_id (str): The Notion ID of the object.
+            data (dict): The raw object as returned by the API.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO objects (kind, id, last_edited_time, data) VALUES (?, ?, ?, ?)",
+                (kind, _key(object_id), data.get("last_edited_time"), json.dumps(data, ensure_ascii=False))
+            )
+
+    def delete(self, kind, object_id):
+        """
+        Remove one object from the store.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM objects WHERE kind = ? AND id = ?", (kind, _key(object_id)))
+
+    def clear(self):
+        """
+        Remove every stored object.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM objects")
+
+    def close(self):
+        """
+        Close the underlying SQLite connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+def _key(object_id):
+    # Notion accepts IDs with or without hyphens; normalize so both map to the same row
+    return object_id.replace("-", "")
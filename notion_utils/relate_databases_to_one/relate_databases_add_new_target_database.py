@@ -1,14 +1,15 @@
 """
-notion_utils/relate_databases_to_one/add_new_relation.py
+notion_utils/relate_databases_to_one/relate_databases_add_new_target_database.py
 
 Purpose:
-    This module defines a utility function to dynamically add a new relation property
-    to a Notion "combination" database. The relation links to a specified target database.
+    This module defines a utility function to dynamically add new relation properties
+    to a Notion "combination" database. Each relation links to a specified target database.
 
     It ensures:
     - No duplicate relations are added.
     - No naming conflicts with existing properties.
-    - Relation field name is synchronized with the target database's title.
+    - Relation field names are synchronized with the target database titles.
+    - All new relation fields are added through the schema reconciler, in one `databases.update`.
 
 Used in:
     - Phase 5: Conditional Merge
@@ -16,52 +17,39 @@ Used in:
 """
 
 from notion_utils.log import log_print_yellow
-from notion_utils.relate_databases_to_one.relate_databases_search import get_notion_client, property_relation_id_exists
-from notion_utils.search_database import get_target_database_title
-from notion_utils.update_database import property_exists
+from notion_utils.relate_databases_to_one.relate_databases_format import build_combination_schema
+from notion_utils.relate_databases_to_one.relate_databases_search import get_notion_client
+from notion_utils.update_database import reconcile_database_schema
 
 notion = get_notion_client()
 
 
 def add_new_relate_database_property(new_target_databases_id, combination_database_id):
     """
-    Adds a new relation field to the combination database.
-    If the relation already exists, it will not be added again.
+    Adds the relation fields of new target databases to the combination database in one batched update.
+    Relations that already exist are not added again (but are renamed to follow their database title).
 
     Args:
-        new_target_databases_id (str): ID of the newly selected target database to relate.
+        new_target_databases_id (str or List[str]): ID(s) of the newly selected target database(s) to relate.
         combination_database_id (str): ID of the combination database to update.
 
     Returns:
         dict: The updated combination database dictionary.
-    """
-    # Get the intended relation field name based on the target database's title
-    new_property_title = get_target_database_title(new_target_databases_id)
-    print(f"Checking relation field: {new_property_title}")
-
-    # Skip adding if a relation to the target database already exists
-    if property_relation_id_exists(combination_database_id, target_database_id=new_target_databases_id):
-        log_print_yellow(f"Relation to target database '{new_property_title}' already exists.")
-        return
-    # If a non-relation property already uses the intended field name, force exit (to prevent conflict)
-    elif property_exists(combination_database_id, new_property_title):
-        raise ValueError(
-            f"Field name conflict: '{new_property_title}' already exists. Please rename the target database.")
 
-    # Add new relation field linking to the specified target database
-    notion.databases.update(
-        database_id=combination_database_id,
-        properties={
-            new_property_title: {
-                "type": "relation",
-                "relation": {
-                    "database_id": new_target_databases_id,
-                    "type": "single_property",
-                    "single_property": {
-                    }
-                }
-            }
-        }
+    Raises:
+        RuntimeError: If a new field name is already used by another property (rename the target database).
+    """
+    if isinstance(new_target_databases_id, str):
+        new_target_databases_id = [new_target_databases_id]
+
+    # Relation field names follow the target database titles; the reconciler skips relations that already exist
+    # and rejects names held by other properties
+    result = reconcile_database_schema(
+        combination_database_id,
+        build_combination_schema(new_target_databases_id, include_standard_fields=False)
     )
-    log_print_yellow(f"New relation field created: {new_property_title}")
-    return
+    if result["changes"]:
+        log_print_yellow(f"Relation fields updated ({len(result['batches'])} request(s)).")
+    else:
+        log_print_yellow("Relations to all target databases already exist.")
+    return result["database"]
@@ -13,19 +13,79 @@ Used in:
     - GUI validation before running synchronization
 
 Functions:
+    - build_combination_schema(): Desired schema of a combination database (standard fields + relations).
+    - reconcile_combination_database_schema(): Applies that schema in one read and as few updates as possible.
     - update_standard_database_property(): Ensures standard fields exist and are typed correctly.
     - sync_relation_names_with_database_titles(): Renames relation fields to match source database titles.
     - check_combination_database_pages_format(): Validates page relation constraints (1:1).
+    - validate_combination_schema() / validate_combination_page(): The schema and per-page rules behind it.
     - rename_title_to_name(): Renames the title field to 'Name' if necessary.
 """
 
 from notion_utils.log import log_error
 from notion_utils.log import log_print_green, log_print_yellow
-from notion_utils.search_database import get_target_database_title
-from notion_utils.update_database import update_database_property_type, get_notion_client
+from notion_utils.schema_registry import schema_registry
+from notion_utils.search_database import get_target_database_title, iter_database_pages
+from notion_utils.update_database import reconcile_database_schema, get_notion_client
 
 notion = get_notion_client()
 
+# Metadata fields every combination database carries (besides the 'Name' title field)
+STANDARD_PROPERTIES = {
+    "Database Location": "rich_text",
+    "Created Time": "date",
+    "Last Edited Time": "date",
+}
+
+
+def build_combination_schema(target_database_id_list, include_standard_fields=True):
+    """
+    Build the desired schema of a combination database.
+
+    Args:
+        target_database_id_list (List[str]): Target databases that need a relation field.
+        include_standard_fields (bool): If True, include 'Name' and the metadata fields.
+
+    Returns:
+        dict: Desired schema for `update_database.reconcile_database_schema()`.
+    """
+    schema = {
+        # Relation field names follow the target database titles
+        "relations": {target_database_id: get_target_database_title(target_database_id)
+                      for target_database_id in target_database_id_list}
+    }
+    if include_standard_fields:
+        schema["title"] = "Name"
+        schema["properties"] = dict(STANDARD_PROPERTIES)
+    return schema
+
+
+def reconcile_combination_database_schema(combination_database_id, target_database_id_list, dry_run=False):
+    """
+    Bring the combination database schema up to date in one pass: title rename, metadata fields,
+    relation renames and missing relation fields are applied together (usually one `databases.update`).
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_id_list (List[str]): Target databases that need a relation field.
+        dry_run (bool): If True, only log the planned changes.
+
+    Returns:
+        dict: The applied (or planned) changes, see `reconcile_database_schema()`.
+    """
+    try:
+        result = reconcile_database_schema(combination_database_id, build_combination_schema(target_database_id_list),
+                                           dry_run=dry_run)
+        if not result["changes"]:
+            log_print_green("Combination database schema is up to date.")
+        elif not dry_run:
+            log_print_green(f"Combination database schema updated ({len(result['changes'])} change(s), "
+                            f"{len(result['batches'])} request(s)).")
+        return result
+    except Exception as e:
+        log_error("Failed to reconcile combination database schema.")
+        raise RuntimeError("Failed to reconcile combination database schema.") from e
+
 
 def update_standard_database_property(combination_database_id):
     """
@@ -36,19 +96,11 @@ def update_standard_database_property(combination_database_id):
         combination_database_id (str): The ID of the combination Notion database.
     """
     try:
-        # Ensure the title field is named 'Name'
-
-        rename_title_to_name(combination_database_id)
+        # Title rename and all field types are checked with one read and fixed with (at most) one update
+        reconcile_database_schema(combination_database_id, {"title": "Name", "properties": STANDARD_PROPERTIES})
         log_print_yellow("Title field verified: Name")
-
-        update_database_property_type(combination_database_id, "rich_text", "Database Location")
-        log_print_yellow("Field verified: Database Location")
-
-        update_database_property_type(combination_database_id, "date", "Created Time")
-        log_print_yellow("Field verified: Created Time")
-
-        update_database_property_type(combination_database_id, "date", "Last Edited Time")
-        log_print_yellow("Field verified: Last Edited Time")
+        for property_name in STANDARD_PROPERTIES:
+            log_print_yellow(f"Field verified: {property_name}")
     except RuntimeError as re:
         log_error("Failed to update standard database properties.")
         raise RuntimeError("Failed to update standard database properties.") from re
@@ -62,24 +114,17 @@ def sync_relation_names_with_database_titles(combination_database_id):
         combination_database_id (str): ID of the combination Notion database.
     """
     try:
-        database = notion.databases.retrieve(database_id=combination_database_id)
-        updates = {}
-
-        for prop_name, prop in database["properties"].items():
-            if prop["type"] == "relation":
-                target_id = prop["relation"]["database_id"]
-                correct_name = get_target_database_title(target_id)
-                if prop_name != correct_name:
-                    log_print_yellow(f"Renaming field '{prop_name}' to '{correct_name}'...")
-                    updates[prop_name] = {
-                        "name": correct_name,
-                    }
-
-        if updates:
-            notion.databases.update(
-                database_id=combination_database_id,
-                properties=updates
-            )
+        database = schema_registry.get(combination_database_id)["database"]
+        target_id_list = [prop["relation"]["database_id"] for prop in database["properties"].values()
+                          if prop["type"] == "relation"]
+
+        # The reconciler orders chained renames so no name is claimed before it is free; swapped names form a
+        # cycle and are rejected (rename one target database to a new title first)
+        result = reconcile_database_schema(
+            combination_database_id,
+            build_combination_schema(target_id_list, include_standard_fields=False)
+        )
+        if result["changes"]:
             log_print_green("All relation field names updated successfully.")
         else:
             log_print_green("All relation field names are up to date.")
@@ -99,62 +144,80 @@ def check_combination_database_pages_format(combination_database_id):
         combination_database_id (str): ID of the combination Notion database.
     """
     try:
-        database = notion.databases.retrieve(database_id=combination_database_id)
-        properties = database["properties"]
-
-        # Check for duplicate relation field names in schema
-        seen_names = set()
-        for name, prop in properties.items():
-            if prop["type"] == "relation":
-                if name in seen_names:
-                    raise ValueError(f"Duplicate relation field name detected: {name}")
-                seen_names.add(name)
-
-        # Check if multiple relation fields point to the same target database
-        seen_targets = set()
-        for prop in properties.values():
-            if prop["type"] == "relation":
-                target_id = prop["relation"]["database_id"]
-                if target_id in seen_targets:
-                    raise ValueError(f"Multiple relations point to the same target database ID: {target_id}")
-                seen_targets.add(target_id)
-
-        has_more = True
-        start_cursor = None
-        while has_more:
-            response = notion.databases.query(
-                database_id=combination_database_id,
-                start_cursor=start_cursor
-            )
-            pages = response["results"]
-            has_more = response.get("has_more", False)
-            start_cursor = response.get("next_cursor", None)
-
-            # Collect all non-empty relation fields for this page
-            for page in pages:
-                props = page["properties"]
-                related = {}
-                for name, prop in props.items():
-                    if name in properties and properties[name]["type"] == "relation":
-                        rel_data = prop["relation"]
-                        if rel_data:
-                            related[name] = len(rel_data)
-
-                # Each page should relate to only one source; reject if more than one
-                if len(related) >= 2:
-                    raise ValueError(f"Page {page['id']} has multiple relation links: {list(related.keys())}")
-
-                if len(related) == 1:
-                    rel_name, count = next(iter(related.items()))
-                    if count > 1:
-                        raise ValueError(
-                            f"Page {page['id']} relation '{rel_name}' links to more than one page ({count})")
+        properties = schema_registry.get(combination_database_id)["database"]["properties"]
+        validate_combination_schema(properties)
+        relation_property_names = [name for name, prop in properties.items() if prop["type"] == "relation"]
+
+        for page in iter_database_pages(combination_database_id):
+            validate_combination_page(page, relation_property_names)
         log_print_green("Page format validation passed successfully.")
     except Exception as e:
         log_error("Failed to validate page format rules in the combination database")
         raise RuntimeError("Failed to sync relation field names with database titles.") from e
 
 
+def validate_combination_schema(properties):
+    """
+    Check the schema rules of a combination database.
+
+    Args:
+        properties (dict): The `properties` of the combination database object.
+
+    Raises:
+        ValueError: On duplicate relation field names or two relations to the same target database.
+    """
+    # Check for duplicate relation field names in schema
+    seen_names = set()
+    for name, prop in properties.items():
+        if prop["type"] == "relation":
+            if name in seen_names:
+                raise ValueError(f"Duplicate relation field name detected: {name}")
+            seen_names.add(name)
+
+    # Check if multiple relation fields point to the same target database
+    seen_targets = set()
+    for prop in properties.values():
+        if prop["type"] == "relation":
+            target_id = prop["relation"]["database_id"]
+            if target_id in seen_targets:
+                raise ValueError(f"Multiple relations point to the same target database ID: {target_id}")
+            seen_targets.add(target_id)
+
+
+def validate_combination_page(page, relation_property_names):
+    """
+    Check that a combination page relates to at most one source page.
+
+    Args:
+        page (dict): Page object from the combination database.
+        relation_property_names (List[str]): Relation properties of the combination database.
+
+    Returns:
+        tuple or None: (relation property name, source page ID) of the page's link, or None if unlinked.
+
+    Raises:
+        ValueError: If the page links through several relation fields or to several pages.
+    """
+    # Collect all non-empty relation fields of the page
+    related = {}
+    for name in relation_property_names:
+        rel_data = page["properties"].get(name, {}).get("relation")
+        if rel_data:
+            related[name] = rel_data
+
+    # Each page should relate to only one source; reject if more than one
+    if len(related) >= 2:
+        raise ValueError(f"Page {page['id']} has multiple relation links: {list(related.keys())}")
+
+    if len(related) == 1:
+        rel_name, rel_data = next(iter(related.items()))
+        if len(rel_data) > 1:
+            raise ValueError(
+                f"Page {page['id']} relation '{rel_name}' links to more than one page ({len(rel_data)})")
+        return rel_name, rel_data[0]["id"]
+    return None
+
+
 def rename_title_to_name(database_id: str):
     """
     Rename the database's title property to 'Name' if not already named.
@@ -163,23 +226,16 @@ def rename_title_to_name(database_id: str):
         database_id (str): ID of the Notion database.
     """
     try:
-        db = notion.databases.retrieve(database_id=database_id)
-        properties = db["properties"]
-
-        title_prop_name = None
-        # Find the first field of type 'title' (usually there's only one)
-        for prop_name, prop_info in properties.items():
-            if prop_info["type"] == "title":
-                title_prop_name = prop_name
-                break
+        # The registry precomputes the first field of type 'title' (usually there's only one)
+        title_prop_name = schema_registry.get(database_id)["title_property_name"]
 
         if not title_prop_name:
             raise ValueError("No title field found in the database.")
 
         if title_prop_name != "Name":
             log_print_yellow(f"Renaming title field '{title_prop_name}' to 'Name'...")
-            notion.databases.update(
-                database_id=database_id,
+            schema_registry.update(
+                database_id,
                 properties={
                     title_prop_name: {
                         "name": "Name",
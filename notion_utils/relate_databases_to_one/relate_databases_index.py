@@ -0,0 +1,206 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_index.py
+
+Purpose:
+    Maintains an in-memory relation index for combination databases, mapping every linked source page
+    to the combination page that points at it. The index is filled by a single paginated scan of the
+    combination database, so membership checks during a merge are O(1) dictionary lookups instead of
+    one `databases.query` per source page.
+
+    Index layout (per combination database):
+        { relation_property_name: { source_page_id: combination_page_id } }
+
+    The last known properties of combination pages (indexed, looked up, or written during the sync) are
+    kept next to the index, so a sync can tell whether a linked page already holds the right metadata
+    without retrieving it again.
+
+Used in:
+    - Phase 5: Conditional Merge (deduplication of source pages)
+    - Pages created during a sync are registered as they are written, keeping the index current
+
+Functions:
+    - build_relation_index(): Scan the combination database once and (re)build its index
+    - reset_relation_index(): Start an empty index (for callers that scan the database themselves)
+    - index_combination_page(): Register every relation of one combination page
+    - is_relation_index_built(): Check whether an index exists for a combination database
+    - find_combination_page(): Look up the combination page linked to a source page
+    - get_combination_page_properties(): Look up the last known properties of an indexed combination page
+    - set_combination_page_properties(): Store the properties of a combination page after writing it
+    - add_to_relation_index(): Register a newly linked page in the index
+    - remove_from_relation_index(): Forget the link of a source page (e.g. its combination page was archived)
+    - release_relation_index(): Drop the index of a combination database
+"""
+
+import threading
+
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+from notion_utils.search_database import iter_database_pages
+
+# Internal index store, keyed by normalized combination database ID
+_relation_index = {}
+# Combination database ID -> {combination page ID: properties}, for the pages in the index
+_page_properties = {}
+_index_lock = threading.Lock()
+
+
+def build_relation_index(combination_database_id, relation_property_name_list):
+    """
+    Build the relation index of a combination database with one paginated scan.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name_list (List[str]): Relation properties to index.
+
+    Returns:
+        dict: The freshly built index for the combination database.
+    """
+    try:
+        index = reset_relation_index(combination_database_id, relation_property_name_list)
+        for page in iter_database_pages(combination_database_id):
+            index_combination_page(combination_database_id, relation_property_name_list, page)
+        return index
+    except Exception as e:
+        raise RuntimeError(f"Failed to build relation index for database {combination_database_id}.") from e
+
+
+def reset_relation_index(combination_database_id, relation_property_name_list):
+    """
+    Replace the index of a combination database with an empty one.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name_list (List[str]): Relation properties to index.
+
+    Returns:
+        dict: The new, empty index.
+    """
+    index = {name: {} for name in relation_property_name_list}
+    with _index_lock:
+        _relation_index[normalize_uuid(combination_database_id)] = index
+        _page_properties[normalize_uuid(combination_database_id)] = {}
+    return index
+
+
+def index_combination_page(combination_database_id, relation_property_name_list, page):
+    """
+    Register the relations and properties of one combination page (as returned by `databases.query`).
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name_list (List[str]): Relation properties to index.
+        page (dict): The combination page object.
+    """
+    for relation_property_name in relation_property_name_list:
+        relation = page["properties"].get(relation_property_name, {}).get("relation")
+        if relation:
+            add_to_relation_index(combination_database_id, relation_property_name, relation[0]["id"], page["id"])
+            set_combination_page_properties(combination_database_id, page["id"], page["properties"])
+
+
+def is_relation_index_built(combination_database_id):
+    """
+    Check whether a relation index exists for the combination database.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+
+    Returns:
+        bool: True if the index has been built, False otherwise.
+    """
+    with _index_lock:
+        return normalize_uuid(combination_database_id) in _relation_index
+
+
+def find_combination_page(combination_database_id, relation_property_name, source_page_id):
+    """
+    Find the combination page linked to a source page through a relation property.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name (str): Relation property linking to the source database.
+        source_page_id (str): ID of the source page.
+
+    Returns:
+        str or None: ID of the linked combination page, or None if the source page is not linked.
+    """
+    with _index_lock:
+        index = _relation_index.get(normalize_uuid(combination_database_id), {})
+        return index.get(relation_property_name, {}).get(normalize_uuid(source_page_id))
+
+
+def get_combination_page_properties(combination_database_id, combination_page_id):
+    """
+    Get the last known properties of an indexed combination page.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        combination_page_id (str): ID of the combination page.
+
+    Returns:
+        dict or None: The page's properties, or None if they are not known (e.g. the page was created
+        during this sync and not written since).
+    """
+    with _index_lock:
+        return _page_properties.get(normalize_uuid(combination_database_id), {}).get(
+            normalize_uuid(combination_page_id))
+
+
+def set_combination_page_properties(combination_database_id, combination_page_id, properties):
+    """
+    Store the properties of a combination page, e.g. from the response of a `pages.update`.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        combination_page_id (str): ID of the combination page.
+        properties (dict): The page's current properties.
+    """
+    with _index_lock:
+        _page_properties.setdefault(normalize_uuid(combination_database_id), {})[
+            normalize_uuid(combination_page_id)] = properties
+
+
+def add_to_relation_index(combination_database_id, relation_property_name, source_page_id, combination_page_id):
+    """
+    Register a link between a source page and a combination page. Does nothing when no index was built for
+    the database: a partial index would hide every link it does not hold from `find_combination_page()`.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name (str): Relation property linking to the source database.
+        source_page_id (str): ID of the source page.
+        combination_page_id (str): ID of the combination page that links to it.
+    """
+    with _index_lock:
+        index = _relation_index.get(normalize_uuid(combination_database_id))
+        if index is None:
+            return
+        index.setdefault(relation_property_name, {})[normalize_uuid(source_page_id)] = combination_page_id
+
+
+def remove_from_relation_index(combination_database_id, relation_property_name, source_page_id):
+    """
+    Forget the link of a source page, so the next sync creates a new combination page for it.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        relation_property_name (str): Relation property linking to the source database.
+        source_page_id (str): ID of the source page.
+    """
+    with _index_lock:
+        index = _relation_index.get(normalize_uuid(combination_database_id), {})
+        combination_page_id = index.get(relation_property_name, {}).pop(normalize_uuid(source_page_id), None)
+        if combination_page_id is not None:
+            _page_properties.get(normalize_uuid(combination_database_id), {}).pop(
+                normalize_uuid(combination_page_id), None)
+
+
+def release_relation_index(combination_database_id):
+    """
+    Remove the relation index of a combination database.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+    """
+    with _index_lock:
+        _relation_index.pop(normalize_uuid(combination_database_id), None)
+        _page_properties.pop(normalize_uuid(combination_database_id), None)
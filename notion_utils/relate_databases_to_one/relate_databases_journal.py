@@ -0,0 +1,251 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_journal.py
+
+Purpose:
+    Append-only journal of the writes a sync has completed, so an interrupted sync (crash, closed window,
+    network drop) can resume instead of starting over. Every completed create, archive and metadata update
+    is appended as one JSON line and flushed right away; a resumed run skips the operations already listed.
+
+    Journal layout (JSON lines, default `logs/journal/<combination database ID>.jsonl`, directory override
+    with `NOTION_JOURNAL_DIR`):
+        {"event": "start", "run": "<run ID>", "time": "..."}
+        {"event": "op", "op": "create", "key": "<source page ID>", "created_page_id": "<ID>", "time": "..."}
+        {"event": "complete", "time": "..."}
+
+    Operation keys are normalized page IDs: the source page for creates and the combination page for
+    archives and updates. Updates also carry the source's `last_edited_time`, so a page edited after it was
+    journaled is not skipped on resume.
+
+Resuming:
+    - Plan execution and the fused reconcile (`relate_databases_plan.py`) save their plan next to the journal,
+      so a resumed run applies only the remaining operations without reading the databases again.
+    - The staged engines (threads and asyncio) re-derive their work from Notion on every run, and check the
+      journal before each write: a journaled create is linked to the page it created instead of creating a
+      duplicate, and journaled archives and metadata updates are skipped.
+
+Used in:
+    - Phase 5: Conditional Merge (`python -m notion_utils sync --resume`)
+
+Class:
+    - SyncJournal: One journal file per combination database
+
+Functions:
+    - journaling(): Context manager that makes a journal active for the sync engine (and its worker threads)
+    - record_operation(): Append a completed operation to the active journal (no-op without one)
+    - is_operation_applied(): Check whether the active journal lists an operation
+    - get_created_page_id(): Find the page a journaled create made for a source page
+"""
+
+import contextvars
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from notion_utils.log import LOG_DIR
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+
+JOURNAL_DIR = os.getenv("NOTION_JOURNAL_DIR", os.path.join(LOG_DIR, "journal"))
+
+_active_journal = contextvars.ContextVar("notion_journal", default=None)
+
+
+def _operation_key(page_id, version=None):
+    key = normalize_uuid(page_id)
+    return f"{key}@{version}" if version else key
+
+
+class SyncJournal:
+    """
+    Append-only, line-flushed journal of the operations a sync completed.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Journal file path.
+        """
+        self.path = path
+        self.plan_path = os.path.splitext(path)[0] + ".plan.json"
+        self._applied = set()
+        # Source page key -> ID of the combination page its journaled create made
+        self._created = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, combination_database_id):
+        """
+        Returns:
+            SyncJournal: The journal of a combination database (under `JOURNAL_DIR`).
+        """
+        return cls(os.path.join(JOURNAL_DIR, f"{normalize_uuid(combination_database_id)}.jsonl"))
+
+    def read_state(self):
+        """
+        Read the journal left by the previous run.
+
+        Returns:
+            dict: `run` (run ID or None), `complete` (bool) and `operations` (number of journaled operations).
+        """
+        state = {"run": None, "complete": False, "operations": 0}
+        if not os.path.exists(self.path):
+            return state
+        for entry in self._entries():
+            if entry["event"] == "start":
+                state["run"] = entry.get("run")
+            elif entry["event"] == "op":
+                state["operations"] += 1
+            elif entry["event"] == "complete":
+                state["complete"] = True
+        return state
+
+    def has_unfinished_run(self, run=None):
+        """
+        Check whether the previous run stopped before completing.
+
+        Args:
+            run (str, optional): Only count runs with this run ID.
+
+        Returns:
+            bool: True if there is an unfinished run to resume.
+        """
+        state = self.read_state()
+        return state["run"] is not None and not state["complete"] and (run is None or state["run"] == run)
+
+    def open(self, run=None, resume=False):
+        """
+        Start writing the journal.
+
+        Args:
+            run (str, optional): ID of the run (e.g. the plan's timestamp), stored in the start entry.
+            resume (bool): Keep the previous entries and skip their operations; otherwise start empty.
+
+        Returns:
+            int: Number of operations loaded from the previous run.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._applied = set()
+        self._created = {}
+        if resume and os.path.exists(self.path):
+            for entry in self._entries():
+                if entry["event"] == "op":
+                    self._applied.add((entry["op"], entry["key"]))
+                    if entry["op"] == "create" and entry.get("created_page_id"):
+                        self._created[entry["key"]] = entry["created_page_id"]
+        # Line buffering hands every entry to the OS immediately, so a crash loses at most the line being written
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8", buffering=1)
+        if resume and self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")  # Terminate a line cut off by a crash before appending
+        self._write({"event": "start", "run": run, "resumed": bool(resume)})
+        return len(self._applied)
+
+    def record(self, op, page_id, version=None, **details):
+        """
+        Append a completed operation.
+
+        Args:
+            op (str): 'create', 'archive' or 'update'.
+            page_id (str): Source page ID for creates, combination page ID otherwise.
+            version (str, optional): Source `last_edited_time` for updates.
+            **details: Extra fields to store (e.g. the created page's ID).
+        """
+        key = _operation_key(page_id, version)
+        with self._lock:
+            self._applied.add((op, key))
+            if op == "create" and details.get("created_page_id"):
+                self._created[key] = details["created_page_id"]
+        self._write({"event": "op", "op": op, "key": key, **details})
+
+    def is_applied(self, op, page_id, version=None):
+        """
+        Returns:
+            bool: True if the operation is in the journal.
+        """
+        with self._lock:
+            return (op, _operation_key(page_id, version)) in self._applied
+
+    def created_page_id(self, source_page_id):
+        """
+        Returns:
+            str or None: ID of the page the journaled create of a source page made, if any.
+        """
+        with self._lock:
+            return self._created.get(_operation_key(source_page_id))
+
+    def complete(self):
+        """
+        Mark the run as complete and close the journal.
+        """
+        self._write({"event": "complete"})
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, entry):
+        line = json.dumps({**entry, "time": datetime.now().isoformat(timespec="seconds")}, ensure_ascii=False)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _entries(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut off by a crash
+                    continue
+
+
+@contextmanager
+def journaling(journal):
+    """
+    Make `journal` the active journal inside the block (including worker threads started from it with
+    `contextvars.copy_context().run`). Passing None disables journaling.
+
+    Args:
+        journal (SyncJournal or None): The opened journal.
+    """
+    token = _active_journal.set(journal)
+    try:
+        yield journal
+    finally:
+        _active_journal.reset(token)
+
+
+def record_operation(op, page_id, version=None, **details):
+    """
+    Append a completed operation to the active journal (does nothing when no journal is active).
+    """
+    journal = _active_journal.get()
+    if journal is not None:
+        journal.record(op, page_id, version, **details)
+
+
+def is_operation_applied(op, page_id, version=None):
+    """
+    Returns:
+        bool: True if the active journal lists the operation.
+    """
+    journal = _active_journal.get()
+    return journal is not None and journal.is_applied(op, page_id, version)
+
+
+def get_created_page_id(source_page_id):
+    """
+    Returns:
+        str or None: ID of the combination page the active journal's create made for a source page, if any.
+    """
+    journal = _active_journal.get()
+    return journal.created_page_id(source_page_id) if journal is not None else None
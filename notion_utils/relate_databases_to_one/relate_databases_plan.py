@@ -0,0 +1,297 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_plan.py
+
+Purpose:
+    Splits a sync into a read-only planning step and a separate execution step. The planner snapshots the
+    combination database and scans every target database once (see `relate_databases_reconcile.py`), then
+    records everything the sync would write in a `SyncPlan`:
+    - Schema changes (title rename, metadata fields, relation renames and additions)
+    - Pages to create, archive, and metadata updates
+    - The estimated API cost of executing the plan, per endpoint, and the time it takes at the shared rate limit
+
+    Planning sends no writes, so a dry run can precede every production sync. Plans serialize to JSON, so they
+    can be reviewed, stored and executed later.
+
+    Journaled execution saves the plan next to the combination database's journal
+    (`relate_databases_journal.py`) and records every applied operation, so an interrupted run resumes with
+    the remaining operations only, without planning again.
+
+Execution order:
+    Schema first (creates depend on the relation fields), then one endpoint at a time: `pages.create`,
+    metadata `pages.update`, and archives last, so an interrupted run never removes a page before the
+    pages that replace it exist. Each group runs on the shared adaptive worker pool.
+
+Used in:
+    - Phase 5: Conditional Merge (`sync_pipeline.plan_sync()`, `--dry-run` / `--apply-plan` / `--resume`,
+      and the fused engine)
+
+Class:
+    - SyncPlan: Serializable list of planned schema changes and page operations
+
+Functions:
+    - build_sync_plan(): Read-only planner
+    - execute_sync_plan(): Apply a plan
+    - execute_journaled_plan(): Apply a plan under the journal, optionally resuming an interrupted run
+    - run_journaled_sync(): Plan and apply a sync under the journal, or resume the interrupted one
+"""
+
+import json
+import os
+from datetime import datetime
+
+import notion_utils.search_database as search_database
+from notion_utils.instrumentation import stage
+from notion_utils.log import log_print_green, log_print_yellow, log_error
+from notion_utils.relate_databases_to_one.relate_databases_format import reconcile_combination_database_schema
+from notion_utils.relate_databases_to_one.relate_databases_journal import SyncJournal, journaling
+from notion_utils.relate_databases_to_one.relate_databases_reconcile import snapshot_combination_database, \
+    plan_reconcile, apply_reconcile_operations
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+
+notion = search_database.get_notion_client()
+
+# Page operations are applied one endpoint group at a time, in this order
+EXECUTION_ORDER = ("create", "update", "archive")
+
+
+class SyncPlan:
+    """
+    Everything a sync would write to a combination database, plus its estimated API cost.
+    """
+
+    def __init__(self, combination_database_id, target_database_ids, schema_changes=None, schema_batches=0,
+                 operations=None, unchanged=0, pages_read=0, created=None):
+        """
+        Args:
+            combination_database_id (str): The ID of the combination Notion database.
+            target_database_ids (List[str]): The IDs of the target databases.
+            schema_changes (List[str], optional): Human-readable schema changes.
+            schema_batches (int): Number of `databases.update` calls the schema changes need.
+            operations (List[dict], optional): Page operations (see `relate_databases_reconcile.plan_reconcile()`).
+            unchanged (int): Number of linked pages already up to date.
+            pages_read (int): Number of pages read while planning (combination and target databases).
+            created (str, optional): ISO timestamp of the plan.
+        """
+        self.combination_database_id = combination_database_id
+        self.target_database_ids = list(target_database_ids)
+        self.schema_changes = list(schema_changes or [])
+        self.schema_batches = schema_batches
+        self.operations = list(operations or [])
+        self.unchanged = unchanged
+        self.pages_read = pages_read
+        self.created = created or datetime.now().isoformat(timespec="seconds")
+
+    def count(self, op):
+        """
+        Returns:
+            int: Number of planned operations of one kind ('create', 'update' or 'archive').
+        """
+        return sum(1 for operation in self.operations if operation["op"] == op)
+
+    def is_empty(self):
+        """
+        Returns:
+            bool: True if executing the plan would not write anything.
+        """
+        return not self.schema_changes and not self.operations
+
+    def estimated_cost(self, rate=None):
+        """
+        Estimate the API calls of executing the plan.
+
+        Args:
+            rate (float, optional): Requests per second; defaults to the shared gateway's rate limit.
+
+        Returns:
+            dict: `calls` per endpoint, `total` calls and `seconds` at the rate limit.
+        """
+        rate = rate or notion.bucket.rate
+        calls = {
+            # The executor re-reads the schema (usually from the registry) and applies it in batches
+            "databases.update": self.schema_batches,
+            "pages.create": self.count("create"),
+            "pages.update": self.count("update") + self.count("archive"),
+        }
+        calls = {endpoint: count for endpoint, count in calls.items() if count}
+        total = sum(calls.values())
+        return {"calls": calls, "total": total, "seconds": round(total / rate, 1)}
+
+    def summary(self):
+        """
+        Returns:
+            str: One-line description of the plan and its cost.
+        """
+        cost = self.estimated_cost()
+        return (f"Plan: {len(self.schema_changes)} schema change(s), {self.count('create')} create(s), "
+                f"{self.count('update')} update(s), {self.count('archive')} archive(s), {self.unchanged} unchanged; "
+                f"estimated {cost['total']} API call(s), ~{cost['seconds']}s at the rate limit.")
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON-serializable form of the plan (see `from_dict()`).
+        """
+        return {
+            "created": self.created,
+            "combination_database_id": self.combination_database_id,
+            "target_database_ids": self.target_database_ids,
+            "schema_changes": self.schema_changes,
+            "schema_batches": self.schema_batches,
+            "operations": self.operations,
+            "unchanged": self.unchanged,
+            "pages_read": self.pages_read,
+            "estimated_cost": self.estimated_cost(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a plan from `to_dict()` output.
+        """
+        return cls(data["combination_database_id"], data["target_database_ids"], data["schema_changes"],
+                   data["schema_batches"], data["operations"], data["unchanged"], data["pages_read"],
+                   data["created"])
+
+    def save(self, path):
+        """
+        Write the plan as JSON.
+
+        Args:
+            path (str): Output file path (parent directories are created).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a plan written by `save()`.
+
+        Args:
+            path (str): Plan file path.
+
+        Returns:
+            SyncPlan: The plan.
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_sync_plan(target_databases_id_list, combination_database_id):
+    """
+    Plan a sync without writing anything: read the combination database once and each target database once.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the destination (merged) Notion database.
+
+    Returns:
+        SyncPlan: The planned schema changes and page operations.
+    """
+    try:
+        with stage("plan"):
+            schema = reconcile_combination_database_schema(combination_database_id, target_databases_id_list,
+                                                           dry_run=True)
+            snapshot = snapshot_combination_database(combination_database_id)
+            operations, unchanged, scanned = plan_reconcile(target_databases_id_list, combination_database_id,
+                                                            snapshot)
+        plan = SyncPlan(combination_database_id, target_databases_id_list, schema["changes"], len(schema["batches"]),
+                        operations, unchanged, snapshot["pages"] + sum(scanned.values()))
+        log_print_green(plan.summary())
+        return plan
+    except Exception as e:
+        log_error("Failed to build the sync plan.", e)
+        raise RuntimeError("Failed to build the sync plan.") from e
+
+
+def execute_sync_plan(plan):
+    """
+    Apply a plan: the schema first, then creates, metadata updates and archives, each endpoint on the shared pool.
+
+    The plan should be executed soon after it was built; pages edited in between are picked up by the next sync.
+
+    Args:
+        plan (SyncPlan): The plan to apply.
+
+    Returns:
+        dict: Number of pages `created`, `archived`, `updated` and `unchanged`, plus `failed` operations and
+            operations `resumed` (skipped because the active journal lists them).
+    """
+    try:
+        if plan.schema_changes:
+            # Recomputed against the current schema, so re-running a partly applied plan is safe
+            with stage("schema"):
+                reconcile_combination_database_schema(plan.combination_database_id, plan.target_database_ids)
+
+        counts = {"created": 0, "archived": 0, "updated": 0, "failed": 0, "resumed": 0}
+        with stage("apply"):
+            for op in EXECUTION_ORDER:
+                group = [operation for operation in plan.operations if operation["op"] == op]
+                if group:
+                    for key, value in apply_reconcile_operations(group, plan.combination_database_id).items():
+                        counts[key] += value
+        counts["unchanged"] = plan.unchanged
+        resumed = f", {counts['resumed']} already applied" if counts["resumed"] else ""
+        log_print_green(f"Plan applied: {counts['created']} created, {counts['archived']} archived, "
+                        f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['failed']} failed"
+                        f"{resumed}.")
+        return counts
+    except Exception as e:
+        log_error("Failed to execute the sync plan.", e)
+        raise RuntimeError("Failed to execute the sync plan.") from e
+
+
+def execute_journaled_plan(plan, resume=False):
+    """
+    Apply a plan while recording every completed operation in the combination database's journal.
+
+    The journal is only marked complete when no operation failed, so `resume=True` also retries failures.
+
+    Args:
+        plan (SyncPlan): The plan to apply.
+        resume (bool): If the journal holds an unfinished run of this plan, skip the operations it lists.
+
+    Returns:
+        dict: See `execute_sync_plan()`.
+    """
+    journal = SyncJournal.for_database(plan.combination_database_id)
+    resume = resume and journal.has_unfinished_run(run=plan.created)
+    applied = journal.open(run=plan.created, resume=resume)
+    if resume:
+        log_print_yellow(f"Resuming the interrupted sync planned at {plan.created} ({applied} operation(s) done).")
+    try:
+        with journaling(journal):
+            counts = execute_sync_plan(plan)
+        if not counts["failed"]:
+            journal.complete()
+        return counts
+    finally:
+        journal.close()
+
+
+def run_journaled_sync(target_databases_id_list, combination_database_id, resume=False):
+    """
+    Plan and apply a sync under the journal. The plan is saved next to the journal, so after an interruption
+    `resume=True` continues with the remaining operations without reading the databases again.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the destination (merged) Notion database.
+        resume (bool): Resume the unfinished run of the same targets, if there is one.
+
+    Returns:
+        dict: See `execute_sync_plan()`.
+    """
+    journal = SyncJournal.for_database(combination_database_id)
+    plan = None
+    if resume and journal.has_unfinished_run() and os.path.exists(journal.plan_path):
+        plan = SyncPlan.load(journal.plan_path)
+        if sorted(map(normalize_uuid, plan.target_database_ids)) != sorted(map(normalize_uuid, target_databases_id_list)):
+            log_print_yellow("The interrupted sync used other target databases; planning a new sync.")
+            plan = None
+    if plan is None:
+        resume = False
+        plan = build_sync_plan(target_databases_id_list, combination_database_id)
+        plan.save(journal.plan_path)
+    return execute_journaled_plan(plan, resume=resume)
@@ -0,0 +1,196 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_reconcile.py
+
+Purpose:
+    Fused reconcile mode of the sync engine. The staged engine reads the combination database four times
+    (format check, relation index, orphan cleanup, metadata update). This mode reads it once into a compact
+    snapshot and derives everything from that snapshot plus one scan of each target database:
+    - 1:1 relation rules are validated while the snapshot is taken (before anything is written)
+    - Source pages without a combination page become creates (carrying their metadata right away)
+    - Linked combination pages whose metadata differs from the source page become updates
+    - Combination pages without a relation become archives
+    All operations are then applied together on one worker pool.
+
+    Source metadata (title, timestamps) comes straight from the target database query results, so no
+    `pages.retrieve` is needed for either side.
+
+Used in:
+    - Phase 5: Conditional Merge (`sync_pipeline.sync_relation_field_names(..., fused=True)`), through the
+      plan entrypoint `relate_databases_plan.run_journaled_sync()` (snapshot, plan, save, apply)
+
+Functions:
+    - snapshot_combination_database(): Read and validate the combination database once
+    - plan_reconcile(): Compare the snapshot with the target databases and list the operations
+    - apply_reconcile_operations(): Send the planned creates, archives and updates (journaled)
+    - operation_journal_key(): Journal key of a planned operation
+"""
+
+import threading
+
+import notion_utils.search_database as search_database
+from notion_utils.log import log_print_yellow, log_print_green, log_error
+from notion_utils.relate_databases_to_one.relate_databases_format import validate_combination_schema, \
+    validate_combination_page
+from notion_utils.relate_databases_to_one.relate_databases_journal import record_operation, is_operation_applied
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import run_in_pool, \
+    build_metadata_properties, page_properties_match
+from notion_utils.schema_registry import schema_registry
+
+notion = search_database.get_notion_client()
+
+# Combination page properties kept in the snapshot (everything needed to detect stale metadata)
+METADATA_PROPERTIES = ("Name", "Created Time", "Last Edited Time", "Database Location")
+
+
+def snapshot_combination_database(combination_database_id):
+    """
+    Read the combination database once, validating the 1:1 relation rules on the way.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+
+    Returns:
+        dict: `links` (target database ID -> {source page ID -> [compact pages]}), `orphans` (IDs of pages
+            without any relation) and `pages` (number of pages read). Compact pages only keep the ID and the
+            metadata properties. IDs are normalized; keying by database ID instead of relation field name
+            keeps the snapshot usable while relation renames are still pending.
+
+    Raises:
+        ValueError: If the schema or a page breaks the 1:1 relation rules.
+    """
+    properties = schema_registry.get(combination_database_id)["database"]["properties"]
+    validate_combination_schema(properties)
+    relation_databases = {name: normalize_uuid(prop["relation"]["database_id"])
+                          for name, prop in properties.items() if prop["type"] == "relation"}
+    relation_property_names = list(relation_databases)
+
+    links = {database_key: {} for database_key in relation_databases.values()}
+    orphans = []
+    page_count = 0
+    for page in search_database.iter_database_pages(combination_database_id):
+        page_count += 1
+        link = validate_combination_page(page, relation_property_names)
+        if link is None:
+            orphans.append(page["id"])
+            continue
+        relation_property_name, source_page_id = link
+        compact = {
+            "id": page["id"],
+            "properties": {name: page["properties"][name] for name in METADATA_PROPERTIES
+                           if name in page["properties"]}
+        }
+        links[relation_databases[relation_property_name]].setdefault(normalize_uuid(source_page_id), []).append(compact)
+    log_print_green("Page format validation passed successfully.")
+    return {"links": links, "orphans": orphans, "pages": page_count}
+
+
+def plan_reconcile(target_databases_id_list, combination_database_id, snapshot):
+    """
+    Compare every target database page with the snapshot and list the operations to apply.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the combination Notion database.
+        snapshot (dict): Result of `snapshot_combination_database()`.
+
+    Returns:
+        tuple: (operations, number of linked pages already up to date, {target database ID: pages read}).
+            Each operation is a dict with an `op` of 'create', 'archive' or 'update'.
+    """
+    operations = [{"op": "archive", "page_id": page_id} for page_id in snapshot["orphans"]]
+    unchanged = 0
+    scanned = {}
+
+    for target_database_id in target_databases_id_list:
+        target_database_title = search_database.get_target_database_title(target_database_id)
+        title_property = schema_registry.title_property_name(target_database_id)
+        linked = snapshot["links"].get(normalize_uuid(target_database_id), {})
+        scanned[target_database_id] = 0
+
+        for page in search_database.iter_database_pages(target_database_id):
+            scanned[target_database_id] += 1
+            page_title = "".join(part["plain_text"] for part in page["properties"][title_property]["title"])
+            metadata = (page["created_time"], page["last_edited_time"], target_database_title, page_title)
+            combination_pages = linked.get(normalize_uuid(page["id"]))
+
+            if not combination_pages:
+                # The title field is 'Name' and the relation field is named after the target database title
+                # once the standard fields and relation names are in place (a dry-run plan lists those too)
+                properties = build_metadata_properties(*metadata)
+                properties[target_database_title] = {"relation": [{"id": page["id"]}]}
+                operations.append({"op": "create", "source_page_id": page["id"], "title": page_title,
+                                   "properties": properties})
+                continue
+
+            for combination_page in combination_pages:
+                if page_properties_match(combination_page, *metadata):
+                    unchanged += 1
+                else:
+                    operations.append({"op": "update", "page_id": combination_page["id"], "title": page_title,
+                                       "properties": build_metadata_properties(*metadata)})
+    return operations, unchanged, scanned
+
+
+def apply_reconcile_operations(operations, combination_database_id):
+    """
+    Send the planned creates, archives and updates on one worker pool.
+    With an active journal, operations it already lists are skipped and completed ones are recorded.
+
+    Args:
+        operations (List[dict]): Operations from `plan_reconcile()`.
+        combination_database_id (str): The ID of the combination Notion database.
+
+    Returns:
+        dict: Number of pages `created`, `archived` and `updated`, of `failed` operations, and of operations
+            `resumed` (skipped because the journal lists them).
+    """
+    counts = {"created": 0, "archived": 0, "updated": 0, "failed": 0, "resumed": 0}
+    counts_lock = threading.Lock()
+
+    def apply(operation):
+        journal_key = operation_journal_key(operation)
+        try:
+            if is_operation_applied(*journal_key):
+                key = "resumed"
+            elif operation["op"] == "create":
+                new_page = notion.pages.create(parent={"database_id": combination_database_id},
+                                               properties=operation["properties"])
+                record_operation(*journal_key, created_page_id=new_page["id"])
+                log_print_yellow("Page '%s' has been added to the combination database." % operation["title"])
+                key = "created"
+            elif operation["op"] == "archive":
+                notion.pages.update(page_id=operation["page_id"], archived=True)
+                record_operation(*journal_key)
+                log_print_yellow(f"Deleted page: {operation['page_id']}")
+                key = "archived"
+            else:
+                notion.pages.update(page_id=operation["page_id"], properties=operation["properties"])
+                record_operation(*journal_key)
+                log_print_yellow("Page properties updated: %s." % operation["title"])
+                key = "updated"
+        except Exception as e:
+            key = "failed"
+            log_error(f"Failed to {operation['op']} page {operation.get('page_id') or operation['source_page_id']}", e)
+        with counts_lock:
+            counts[key] += 1
+
+    run_in_pool(apply, operations)
+    return counts
+
+
+def operation_journal_key(operation):
+    """
+    Return the journal key of a planned operation (see `relate_databases_journal.py`).
+
+    Args:
+        operation (dict): Operation from `plan_reconcile()`.
+
+    Returns:
+        tuple: (op, page ID, version) for `record_operation()` / `is_operation_applied()`.
+    """
+    if operation["op"] == "create":
+        return "create", operation["source_page_id"], None
+    if operation["op"] == "archive":
+        return "archive", operation["page_id"], None
+    return "update", operation["page_id"], operation["properties"]["Last Edited Time"]["date"]["start"]
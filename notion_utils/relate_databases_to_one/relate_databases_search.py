@@ -8,6 +8,7 @@ Purpose:
     Specifically:
     - Check if a relation to a given target database already exists.
     - Normalize UUIDs for consistent comparison (Notion returns hyphenated UUIDs).
+    - Build the query filter that matches pages without any relation (orphans), so Notion does the check.
 
 Used in:
     - Phase 5: Conditional Merge
@@ -17,12 +18,17 @@ Used in:
 Functions:
     - property_relation_id_exists(): Check if a relation to a target DB exists in the schema.
     - normalize_uuid(): Remove hyphens from UUIDs to normalize format for comparison.
+    - no_relation_filter(): Compound `databases.query` filter for pages whose relations are all empty.
 """
 
 from notion_utils.client import get_notion_client
+from notion_utils.schema_registry import schema_registry
 
 notion = get_notion_client()
 
+# Conditions per compound filter; larger lists are split into nested `and` groups (Notion allows two levels)
+MAX_FILTER_CONDITIONS = 100
+
 
 def property_relation_id_exists(combination_database_id, target_database_id):
     """
@@ -37,15 +43,8 @@ def property_relation_id_exists(combination_database_id, target_database_id):
         bool: True if a relation to the target database exists, False otherwise.
     """
     try:
-        database = notion.databases.retrieve(database_id=combination_database_id)
-
-        for prop in database["properties"].values():
-            if prop["type"] == "relation":
-                relation = prop["relation"]
-                # Normalize UUID format for comparison (Notion returns hyphenated UUIDs, but some APIs might not)
-                if normalize_uuid(relation["database_id"]) == target_database_id:
-                    return True
-        return False
+        # The registry keys relation targets by normalized UUID (Notion returns hyphenated UUIDs, but some APIs might not)
+        return schema_registry.relation_property_name(combination_database_id, target_database_id) is not None
     except Exception as e:
         raise RuntimeError("Failed to check relation property existence.") from e
 
@@ -61,3 +60,25 @@ def normalize_uuid(uuid_str):
         str: Normalized UUID string without hyphens.
     """
     return uuid_str.replace("-", "")
+
+
+def no_relation_filter(relation_property_name_list):
+    """
+    Build a `databases.query` filter matching pages where every given relation property is empty.
+
+    Args:
+        relation_property_name_list (List[str]): Relation properties to check.
+
+    Returns:
+        dict or None: The filter (`and` of `relation.is_empty` conditions), or None if there are no relation
+            properties (then every page matches).
+    """
+    conditions = [{"property": name, "relation": {"is_empty": True}} for name in relation_property_name_list]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    if len(conditions) <= MAX_FILTER_CONDITIONS:
+        return {"and": conditions}
+    return {"and": [{"and": conditions[start:start + MAX_FILTER_CONDITIONS]}
+                    for start in range(0, len(conditions), MAX_FILTER_CONDITIONS)]}
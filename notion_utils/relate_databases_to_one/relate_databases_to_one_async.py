@@ -0,0 +1,360 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_to_one_async.py
+
+Purpose:
+    Asyncio implementation of the sync engine, built on `notion_client.AsyncClient`.
+    It performs the same work as `relate_databases_to_one_update.update_all_target_database_to_combi()`
+    (merge, orphan cleanup, metadata update), but every page operation is a coroutine on one event loop.
+    Concurrency is bounded by the shared adaptive controller (`concurrency.py`) instead of a fixed pool of
+    OS threads, and all requests still share the process-wide rate limit of the gateway.
+
+Scheduling:
+    - All target databases are merged at the same time; their page operations interleave on the loop.
+    - Orphan cleanup and metadata updates touch disjoint pages (pages without / with a relation),
+      so both stages run concurrently once the merge is done.
+    - The merge records the metadata of every source page it reads, so the metadata update finds it with
+      an in-memory hash join instead of one `pages.retrieve` per page.
+
+Used in:
+    - Phase 5: Conditional Merge (alternative to the threaded engine)
+    - `sync_pipeline.sync_relation_field_names(..., use_async=True)`
+
+Core Functions:
+    - update_all_target_database_to_combi_async(): Async main entrypoint
+    - run_update_all_target_database_to_combi_async(): Blocking wrapper that runs the engine with `asyncio.run`
+    - aiter_database_pages(): Async paginated query iterator with next-batch prefetch
+
+Class:
+    - AdaptiveSemaphore: Bounds in-flight coroutines by the shared concurrency controller's limit
+"""
+
+import asyncio
+from collections import deque
+
+from notion_utils.client import get_async_notion_client
+from notion_utils.concurrency import concurrency_controller
+from notion_utils.instrumentation import stage
+from notion_utils.log import log_print_yellow, log_print_green, log_error
+from notion_utils.relate_databases_to_one.relate_databases_index import reset_relation_index, \
+    index_combination_page, find_combination_page, add_to_relation_index
+from notion_utils.relate_databases_to_one.relate_databases_join import join_source_metadata
+from notion_utils.relate_databases_to_one.relate_databases_journal import record_operation, \
+    is_operation_applied, get_created_page_id
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid, no_relation_filter
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import page_properties_match, \
+    build_metadata_properties
+from notion_utils.schema_registry import schema_registry
+
+
+async def aiter_database_pages(notion, database_id, filter=None, sorts=None, page_size=100):
+    """
+    Asynchronously stream every page of a Notion database, prefetching the next batch.
+
+    Args:
+        notion (AsyncNotionGateway): The async client to query with.
+        database_id (str): The ID of the Notion database.
+        filter (dict, optional): Notion query filter object.
+        sorts (list, optional): Notion query sorts list.
+        page_size (int): Number of pages per request (Notion allows at most 100).
+
+    Yields:
+        dict: Page objects as returned by `databases.query`.
+    """
+    query = {"database_id": database_id, "page_size": page_size}
+    if filter:
+        query["filter"] = filter
+    if sorts:
+        query["sorts"] = sorts
+
+    async def fetch(start_cursor):
+        if start_cursor:
+            return await notion.databases.query(**query, start_cursor=start_cursor)
+        return await notion.databases.query(**query)
+
+    next_batch = None
+    try:
+        response = await fetch(None)
+        while True:
+            next_cursor = response.get("next_cursor") if response.get("has_more") else None
+            next_batch = asyncio.ensure_future(fetch(next_cursor)) if next_cursor else None
+
+            for page in response["results"]:
+                yield page
+
+            if next_batch is None:
+                return
+            response = await next_batch
+    except Exception as e:
+        raise RuntimeError(f"Failed to query pages from database '{database_id}'") from e
+    finally:
+        if next_batch is not None and not next_batch.done():
+            next_batch.cancel()
+
+
+def run_update_all_target_database_to_combi_async(target_databases_id_list, combination_database_id):
+    """
+    Blocking wrapper: run the async sync engine on a fresh event loop.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the destination (merged) Notion database.
+    """
+    asyncio.run(update_all_target_database_to_combi_async(target_databases_id_list, combination_database_id))
+
+
+async def update_all_target_database_to_combi_async(target_databases_id_list, combination_database_id):
+    """
+    Async main controller: Synchronize all target databases into the combination database.
+    The number of in-flight page operations follows `concurrency_controller.limit`.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the destination (merged) Notion database.
+    """
+    notion = get_async_notion_client()
+    semaphore = AdaptiveSemaphore(concurrency_controller)
+    try:
+        # Load every schema once, concurrently, and share it through the registry
+        databases = await asyncio.gather(*(notion.databases.retrieve(database_id=database_id)
+                                           for database_id in [combination_database_id] + target_databases_id_list))
+        entries = [schema_registry.store(database) for database in databases]
+        combination_entry, target_entries = entries[0], entries[1:]
+        target_databases_title_list = [_database_title(entry["database"]) for entry in target_entries]
+
+        # Index existing links with one scan of the combination database
+        print("Indexing combination database relations...")
+        reset_relation_index(combination_database_id, target_databases_title_list)
+        with stage("index"):
+            async for page in aiter_database_pages(notion, combination_database_id):
+                index_combination_page(combination_database_id, target_databases_title_list, page)
+
+        # Merge every target database at once; their page operations interleave on the loop
+        source_index = {}
+        with stage("merge"):
+            await asyncio.gather(*(
+                _merge_target_database(notion, semaphore, target_database_id, target_entry, combination_database_id,
+                                       combination_entry["title_property_name"], source_index)
+                for target_database_id, target_entry in zip(target_databases_id_list, target_entries)
+            ))
+        log_print_green("All target databases merged.")
+
+        # Orphan cleanup and metadata updates work on disjoint pages, so they run together
+        print("Removing orphan pages and updating metadata...")
+        database_titles = {entry["database"]["id"].replace("-", ""): _database_title(entry["database"])
+                           for entry in target_entries}
+        await asyncio.gather(
+            _in_stage("orphans", _delete_no_relation_pages(notion, semaphore, combination_database_id,
+                                                           target_databases_title_list)),
+            _in_stage("metadata", _update_all_pages_properties(notion, semaphore, combination_database_id,
+                                                               target_databases_title_list, database_titles,
+                                                               source_index))
+        )
+        log_print_green("Orphan pages removed.")
+        log_print_green("Metadata updated.")
+    finally:
+        await notion.aclose()
+
+
+class AdaptiveSemaphore:
+    """
+    Event-loop counterpart of `AdaptiveConcurrency.acquire()` / `release()`: admits a coroutine while fewer
+    operations than the controller's current limit are in flight, so the limit it learns from the gateway
+    applies to the async engine as it does to the worker pools.
+    """
+
+    def __init__(self, controller):
+        """
+        Args:
+            controller (AdaptiveConcurrency): Controller whose `limit` bounds the in-flight operations.
+        """
+        self.controller = controller
+        self._in_flight = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        """
+        Wait until a slot is free, then take it.
+        """
+        if not self._waiters and self._in_flight < self.controller.limit:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # A slot handed over just before the cancellation goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """
+        Give back a slot taken with `acquire()` and admit waiters up to the current limit.
+        """
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self.controller.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+async def _in_stage(name, coroutine):
+    # Each gathered task has its own context, so concurrent stages are labelled independently
+    with stage(name):
+        return await coroutine
+
+
+async def _run_bounded(semaphore, coroutine_factory, items):
+    """
+    Run `coroutine_factory(item)` for every item of an async iterator with bounded concurrency.
+    A task is only created once the semaphore admits it, so streaming sources stay lazy.
+    """
+    tasks = set()
+
+    async def run(item):
+        try:
+            await coroutine_factory(item)
+        finally:
+            semaphore.release()
+
+    async for item in items:
+        await semaphore.acquire()
+        task = asyncio.ensure_future(run(item))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def _merge_target_database(notion, semaphore, target_database_id, target_entry, combination_database_id,
+                                 combination_title_property_name, source_index):
+    """
+    Add every page of one target database that is not yet linked in the combination database, and record
+    each page's metadata in `source_index` (see `relate_databases_join.build_source_metadata_index()`).
+    """
+    target_database_title = _database_title(target_entry["database"])
+    title_property = target_entry["title_property_name"]
+
+    async def merge_one(page):
+        try:
+            page_title = _plain_title(page, title_property)
+            source_index[normalize_uuid(page["id"])] = (page["created_time"], page["last_edited_time"],
+                                                        target_database_title, page_title)
+            if find_combination_page(combination_database_id, target_database_title, page["id"]) is not None:
+                log_print_yellow("Page has no updates: %s" % page_title)
+                return
+            created_page_id = get_created_page_id(page["id"])
+            if created_page_id is not None:
+                # The interrupted run already created this page; link it instead of creating a duplicate
+                add_to_relation_index(combination_database_id, target_database_title, page["id"], created_page_id)
+                return
+            new_page = await notion.pages.create(
+                parent={"database_id": combination_database_id},
+                properties={
+                    combination_title_property_name: {
+                        "type": "title",
+                        "title": [{"text": {"content": page_title}}]
+                    },
+                    target_database_title: {
+                        "type": "relation",
+                        "relation": [{"id": page["id"]}]
+                    }
+                }
+            )
+            add_to_relation_index(combination_database_id, target_database_title, page["id"], new_page["id"])
+            record_operation("create", page["id"], created_page_id=new_page["id"])
+            log_print_yellow("Page '%s' has been added to the combination database." % page_title)
+        except Exception as e:
+            log_error(f"Failed to update page {page['id']} from '{target_database_title}'", e)
+
+    try:
+        await _run_bounded(semaphore, merge_one, aiter_database_pages(notion, target_database_id))
+        log_print_green(f"Database '{target_database_title}' merged.")
+    except Exception as e:
+        log_error(f"Error full merging database {target_database_id}.", e)
+        raise
+
+
+async def _delete_no_relation_pages(notion, semaphore, combination_database_id, relation_property_name_list):
+    """
+    Archive combination pages that have no relation to any source page.
+    A server-side filter returns only the orphans, so a healthy database costs a single query.
+    """
+
+    async def archive_single_page(page):
+        try:
+            if is_operation_applied("archive", page["id"]):
+                return
+            await notion.pages.update(page_id=page["id"], archived=True)
+            record_operation("archive", page["id"])
+            log_print_yellow(f"Deleted page: {page['id']}")
+        except Exception as e:
+            log_error(f"Failed to delete page {page['id']}", e)
+
+    async def queued(pages):
+        for page in pages:
+            yield page
+
+    try:
+        # Collect first: archiving removes pages from the filtered result set while it is paginated
+        orphans = [page async for page in aiter_database_pages(
+            notion, combination_database_id, filter=no_relation_filter(relation_property_name_list))]
+        await _run_bounded(semaphore, archive_single_page, queued(orphans))
+    except Exception as e:
+        raise RuntimeError("Failed to delete all unlinked pages.") from e
+
+
+async def _update_all_pages_properties(notion, semaphore, combination_database_id, relation_property_name_list,
+                                       database_titles, source_index):
+    """
+    Copy metadata (title, timestamps, source database) from each linked source page into its combination page.
+    Source metadata comes from `source_index`; only source pages missing from it are retrieved.
+    Pages whose metadata already matches their source page are skipped without a write.
+    """
+
+    async def update_single_page(page):
+        try:
+            link = join_source_metadata(page, relation_property_name_list, source_index)
+            if link is None:
+                return
+            source_page_id, metadata = link
+            if metadata is None:
+                source_page = await notion.pages.retrieve(page_id=source_page_id)
+                database_id = source_page["parent"]["database_id"].replace("-", "")
+                metadata = (source_page["created_time"], source_page["last_edited_time"],
+                            database_titles[database_id], _plain_title(source_page))
+            create_time, last_edited_time, database_title, page_title = metadata
+            if page_properties_match(page, create_time, last_edited_time, database_title, page_title) \
+                    or is_operation_applied("update", page["id"], last_edited_time):
+                return
+            await notion.pages.update(
+                page_id=page["id"],
+                properties=build_metadata_properties(create_time, last_edited_time, database_title, page_title)
+            )
+            record_operation("update", page["id"], last_edited_time)
+            log_print_yellow("Page properties updated: %s." % page_title)
+        except Exception as e:
+            log_error(f"Failed to update page metadata: {page['id']}", e)
+
+    try:
+        await _run_bounded(semaphore, update_single_page, aiter_database_pages(notion, combination_database_id))
+    except Exception as e:
+        raise RuntimeError("Failed to update page properties.") from e
+
+
+def _database_title(database):
+    # Display title of a database object
+    title_list = database["title"]
+    if not title_list:
+        raise ValueError(f"Failed to get title of database '{database['id']}'")
+    return title_list[0]["plain_text"]
+
+
+def _plain_title(page, title_property=None):
+    # Plain-text title of a page object; auto-detects the title property when none is given
+    for name, prop in page["properties"].items():
+        if (title_property is None and prop["type"] == "title") or name == title_property:
+            return "".join(part["plain_text"] for part in prop["title"])
+    raise ValueError(f"Failed to get title from page '{page['id']}'")
@@ -1,14 +1,15 @@
 """
-notion_utils/update_all_target_database_to_combi.py
+notion_utils/relate_databases_to_one/relate_databases_to_one_update.py
 
 Purpose:
     This module acts as the core controller to synchronize and integrate multiple source Notion databases
     into a centralized combination database. It handles syncing page content, relations, metadata,
-    and removes orphaned pages. All major actions are multi-threaded for performance.
+    and removes orphaned pages. All major actions are multi-threaded for performance, with the number of
+    concurrent operations set by a shared adaptive controller (`concurrency.py`) instead of a fixed pool size.
 
 Key Features:
     - Merge multiple target databases into one central database.
-    - Deduplicate entries via relation checking.
+    - Deduplicate entries via relation checking, backed by an in-memory relation index built once per sync.
     - Auto-update metadata: creation time, last edited time, source database, and page title.
     - Remove pages with no valid source reference (orphan cleanup).
     - Multithreaded for high performance across all page operations.
@@ -20,53 +21,168 @@ Used in:
 
 Core Functions:
     - update_all_target_database_to_combi(): Main entrypoint to sync all target DBs into the combination DB.
+    - update_all_target_database_to_combi_incremental(): Syncs only pages edited since the last watermark.
     - update_single_target_database_to_combi(): Syncs one target DB with relation-based deduplication.
+    - run_target_jobs(): Runs the pages of several target DBs on one shared pool, round-robin across targets.
+    - build_merge_job() / build_incremental_job(): The per-target work (a TargetJob) for run_target_jobs().
+    - sync_changed_page(): Links one changed source page and refreshes its metadata (incremental and watch mode).
     - update_page_to_combi(): Adds or skips a page based on whether it already exists.
-    - delete_no_relation_pages(): Deletes pages that lack source linkage.
-    - update_all_pages_properties(): Copies metadata from source pages into merged records.
+    - delete_no_relation_pages(): Deletes pages that lack source linkage (found by a server-side filter).
+    - update_all_pages_properties(): Copies metadata from source pages into merged records (hash join by default).
+    - get_source_metadata(): Per-page metadata lookup used when a source page is not in the join.
     - update_page_properties(): Updates a single page's metadata (title, timestamps, origin).
+    - page_properties_match(): Checks whether a page already holds the desired metadata (skips no-op writes).
     - Helper functions like add_new_page(), is_page_id_in_combi_relation_id() assist in structure & validation.
+
+Pagination:
+    Every database read streams through `search_database.iter_database_pages()`, so databases larger than
+    one query batch (100 pages) are processed completely while only a bounded window of pages is in flight.
 """
 
-from asyncio import as_completed
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import contextvars
+import threading
+from collections import deque
+from datetime import datetime
+
+from notion_client import APIErrorCode
 
 import notion_utils.search_database as search_database
-from notion_utils.cache import get_page
+from notion_utils.cache import get_page, seed_page
+from notion_utils.concurrency import concurrency_controller
+from notion_utils.instrumentation import stage
 from notion_utils.log import log_print_yellow, log_print_green, log_error
-from notion_utils.search_page import get_parent_of_page_id, get_page_title, get_page_create_time, \
-    get_page_last_edited_time
+from notion_utils.relate_databases_to_one.relate_databases_journal import record_operation, \
+    is_operation_applied, get_created_page_id
+from notion_utils.relate_databases_to_one.relate_databases_join import build_source_metadata_index, \
+    join_source_metadata
+from notion_utils.relate_databases_to_one.relate_databases_index import build_relation_index, \
+    is_relation_index_built, find_combination_page, add_to_relation_index, release_relation_index, \
+    get_combination_page_properties, set_combination_page_properties, remove_from_relation_index
+from notion_utils.relate_databases_to_one.relate_databases_search import no_relation_filter
+from notion_utils.relate_databases_to_one.relate_databases_watermark import load_watermark, save_watermark, \
+    last_edited_filter, next_watermark
+from notion_utils.schema_registry import schema_registry
+from notion_utils.search_page import extract_page_title, extract_parent_database_id
 
 notion = search_database.get_notion_client()
 
 
-def update_all_target_database_to_combi(target_databases_id_list, combination_database_id):
+def run_in_pool(func, items, controller=concurrency_controller):
+    """
+    Apply `func` to every item with a thread pool, consuming `items` lazily.
+
+    How many tasks run at once follows the adaptive concurrency controller (shared by every stage by default),
+    which grows while Notion answers quickly and halves on 429s or timeouts. At most `max_limit * 2` tasks are
+    queued at once, so streaming iterators are never materialized into a full list. Each task runs in a copy
+    of the caller's context, so API calls made by workers are attributed to the caller's instrumentation stage.
+
+    Args:
+        func (Callable): Function applied to each item.
+        items (Iterable): Items to process (may be a generator).
+        controller (AdaptiveConcurrency): Controller deciding how many tasks may run at once.
+    """
+    max_workers = controller.max_limit
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for item in items:
+            # Wait for a free slot under the current limit before handing out more work
+            controller.acquire()
+            pending.add(executor.submit(contextvars.copy_context().run, _run_in_slot, controller, func, item))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in pending:
+            future.result()
+
+
+def _run_in_slot(controller, func, item):
+    # Run one task and give its concurrency slot back, even if it fails
+    try:
+        return func(item)
+    finally:
+        controller.release()
+
+
+def update_all_target_database_to_combi(target_databases_id_list, combination_database_id, incremental=False):
     """
     Main controller: Synchronize all target databases into the combination database.
 
     Args:
         target_databases_id_list (List[str]): List of Notion database IDs to merge from.
         combination_database_id (str): The ID of the destination (merged) Notion database.
+        incremental (bool): If True, only merge and refresh pages edited since the last successful sync.
     """
-    target_databases_title_list = []
-    # Merge each target database into the combination database
-    for target_database_id in target_databases_id_list:
-        update_single_target_database_to_combi(target_database_id, combination_database_id)
-        target_databases_title_list.append(search_database.get_target_database_title(target_database_id))
+    if incremental:
+        update_all_target_database_to_combi_incremental(target_databases_id_list, combination_database_id)
+        return
+
+    target_databases_title_list = [search_database.get_target_database_title(target_database_id)
+                                   for target_database_id in target_databases_id_list]
+
+    # Index existing links once, so merging never re-queries the combination database per page
+    print("Indexing combination database relations...")
+    with stage("index"):
+        build_relation_index(combination_database_id, target_databases_title_list)
+
+    # Merge all target databases at once on one shared pool, so small databases don't wait behind large ones
+    with stage("merge"):
+        run_target_jobs([build_merge_job(target_database_id, combination_database_id)
+                         for target_database_id in target_databases_id_list])
 
     log_print_green("All target databases merged.")
 
     # Delete pages that are no longer linked to any source
     print("Removing orphan pages...")
-    delete_no_relation_pages(combination_database_id, target_databases_title_list)
+    with stage("orphans"):
+        delete_no_relation_pages(combination_database_id, target_databases_title_list)
     log_print_green("Orphan pages removed.")
 
     # Update metadata like creation time, last edited time, etc.
     print("Updating metadata...")
-    update_all_pages_properties(combination_database_id, target_databases_title_list)
+    with stage("metadata"):
+        update_all_pages_properties(combination_database_id, target_databases_title_list)
     log_print_green("Metadata updated.")
 
 
+def update_all_target_database_to_combi_incremental(target_databases_id_list, combination_database_id):
+    """
+    Incremental controller: Merge and refresh only source pages edited since each target's watermark.
+
+    Each changed page costs one lookup, plus one create if it is new, plus one metadata update unless the
+    linked page already holds the same metadata. Targets without a watermark are synced in full (through a
+    one-time relation index). A watermark never advances past a failed page, so it is retried next run.
+
+    Args:
+        target_databases_id_list (List[str]): List of Notion database IDs to merge from.
+        combination_database_id (str): The ID of the destination (merged) Notion database.
+    """
+    target_databases_title_list = [search_database.get_target_database_title(target_database_id)
+                                   for target_database_id in target_databases_id_list]
+    watermarks = [load_watermark(combination_database_id, target_database_id)
+                  for target_database_id in target_databases_id_list]
+
+    # An index from an earlier run may be stale; only pay for a fresh one if some target needs a full pass
+    release_relation_index(combination_database_id)
+    if None in watermarks:
+        print("Indexing combination database relations...")
+        with stage("index"):
+            build_relation_index(combination_database_id, target_databases_title_list)
+
+    with stage("merge"):
+        run_target_jobs([build_incremental_job(target_database_id, combination_database_id, watermark)
+                         for target_database_id, watermark in zip(target_databases_id_list, watermarks)])
+    log_print_green("All changed pages merged.")
+
+    # Deleting a source page does not touch its database's watermark, so orphans still need a full check
+    print("Removing orphan pages...")
+    with stage("orphans"):
+        delete_no_relation_pages(combination_database_id, target_databases_title_list)
+    log_print_green("Orphan pages removed.")
+
+
 def update_single_target_database_to_combi(target_database_id, combination_database_id):
     """
     Synchronize a single target database into the combination database.
@@ -75,31 +191,234 @@ def update_single_target_database_to_combi(target_database_id, combination_datab
         target_database_id (str): The ID of the target Notion database.
         combination_database_id (str): The ID of the combination Notion database.
     """
-    try:
-        pages_id = get_page_id_list(target_database_id)
-        target_database_title = search_database.get_target_database_title(target_database_id)
-        #     for page in pages_id["results"]:
-        #         # Update each page
-        #         update_page_to_combi(page["id"], combination_database_id, target_database_title, target_database_id)
-        #     log_print_green(f"Database '{target_database_title}' merged.")
-        # except Exception as e:
-        #     log_error(f"Error merging database {target_database_id}.", e)
-        pages = pages_id["results"]
-
-        def update_one(page):
-            try:
-                update_page_to_combi(page["id"], combination_database_id, target_database_title, target_database_id)
-            except Exception as e:
-                log_error(f"Failed to update page {page['id']} from '{target_database_title}'", e)
+    run_target_jobs([build_merge_job(target_database_id, combination_database_id)])
+
+
+class TargetJob:
+    """
+    The per-page work of one target database, for running several targets on one shared pool.
+
+    Tracks how many of its pages are still queued or running, so `on_done` runs exactly once, right after
+    the last page of this target finished (even while other targets are still being processed).
+    """
+
+    def __init__(self, name, pages, task, on_done=None):
+        """
+        Args:
+            name (str): Label used in error messages (usually the target database title).
+            pages (Iterable[dict]): Pages to process (may be a generator).
+            task (Callable): Function applied to each page; it should handle its own errors.
+            on_done (Callable, optional): Called once when every page has been processed.
+        """
+        self.name = name
+        self.pages = pages
+        self.task = task
+        self.on_done = on_done
+        self._pending = 0
+        self._exhausted = False
+        self._lock = threading.Lock()
+
+    def items(self):
+        """
+        Yield `(job, page)` pairs for the shared pool.
+
+        Raises:
+            RuntimeError: If the pages of this target could not be read.
+        """
+        try:
+            for page in self.pages:
+                with self._lock:
+                    self._pending += 1
+                yield self, page
+        except Exception as e:
+            log_error(f"Error reading pages of '{self.name}'.", e)
+            raise RuntimeError(f"Failed to read pages of '{self.name}'.") from e
+        with self._lock:
+            self._exhausted = True
+            done = self._pending == 0
+        if done:
+            self._finish()
+
+    def run(self, page):
+        """
+        Process one page of this target.
+        """
+        try:
+            self.task(page)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                done = self._exhausted and self._pending == 0
+            if done:
+                self._finish()
+
+    def _finish(self):
+        if self.on_done is not None:
+            self.on_done()
+
+
+def interleave_round_robin(iterables):
+    """
+    Yield one item from each iterable in turn, dropping iterables as they run out.
+
+    Args:
+        iterables (Iterable[Iterable]): The iterables to interleave (consumed lazily).
+
+    Returns:
+        Generator: The interleaved items.
+    """
+    iterators = deque(iter(iterable) for iterable in iterables)
+    while iterators:
+        iterator = iterators.popleft()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            continue
+        iterators.append(iterator)
+        yield item
+
+
+def run_target_jobs(jobs):
+    """
+    Run the pages of several target databases on one shared, bounded pool.
+
+    Pages are handed out round-robin across the targets, so every target gets an equal share of the free
+    slots: a huge target can't starve the others, small targets finish early, and the total time approaches
+    that of the largest target rather than the sum of all of them.
+
+    Args:
+        jobs (List[TargetJob]): One job per target database.
+    """
+    run_in_pool(_run_job_item, interleave_round_robin(job.items() for job in jobs))
+
+
+def _run_job_item(job_and_page):
+    job, page = job_and_page
+    job.run(page)
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(update_one, page) for page in pages]
-            for future in as_completed(futures):
-                future.result()
+
+def build_merge_job(target_database_id, combination_database_id):
+    """
+    Build the full-merge job of one target database: link every page to the combination database.
+
+    Args:
+        target_database_id (str): The ID of the target Notion database.
+        combination_database_id (str): The ID of the combination Notion database.
+
+    Returns:
+        TargetJob: The job, to run with `run_target_jobs()`.
+    """
+    target_database_title = search_database.get_target_database_title(target_database_id)
+
+    def update_one(page):
+        try:
+            # The query result is a full page object; caching it spares the later stages a `pages.retrieve`
+            seed_page(page)
+            update_page_to_combi(page["id"], combination_database_id, target_database_title, target_database_id)
+        except Exception as e:
+            log_error(f"Failed to update page {page['id']} from '{target_database_title}'", e)
+
+    def on_done():
         log_print_green(f"Database '{target_database_title}' merged.")
+
+    return TargetJob(target_database_title, get_page_id_list(target_database_id), update_one, on_done)
+
+
+def build_incremental_job(target_database_id, combination_database_id, watermark):
+    """
+    Build the incremental job of one target database: merge the pages edited since the watermark and
+    refresh their metadata. The watermark advances to the newest synced page, or is held at the oldest
+    failed page so it is retried next run (see `next_watermark()`).
+
+    Args:
+        target_database_id (str): The ID of the target Notion database.
+        combination_database_id (str): The ID of the combination Notion database.
+        watermark (str or None): Last synced `last_edited_time`, or None for a full pass.
+
+    Returns:
+        TargetJob: The job, to run with `run_target_jobs()`.
+    """
+    target_database_title = search_database.get_target_database_title(target_database_id)
+    title_property = search_database.get_target_database_title_property_name(target_database_id)
+    pages = search_database.iter_database_pages(
+        target_database_id,
+        filter=last_edited_filter(watermark) if watermark else None
+    )
+    synced_times = []
+    failed_times = []
+    state_lock = threading.Lock()
+
+    def sync_one(page):
+        try:
+            sync_changed_page(page, combination_database_id, target_database_title, title_property)
+            with state_lock:
+                synced_times.append(page["last_edited_time"])
+        except Exception as e:
+            with state_lock:
+                failed_times.append(page["last_edited_time"])
+            log_error(f"Failed to sync page {page['id']} from '{target_database_title}'", e)
+
+    def on_done():
+        new_watermark = next_watermark(watermark, synced_times, failed_times)
+        if new_watermark != watermark:
+            save_watermark(combination_database_id, target_database_id, new_watermark)
+        if failed_times:
+            log_error(f"{len(failed_times)} page(s) of '{target_database_title}' failed; "
+                      f"watermark held at {new_watermark}.")
+        log_print_green(f"Database '{target_database_title}' merged incrementally ({len(synced_times)} changed).")
+
+    return TargetJob(target_database_title, pages, sync_one, on_done)
+
+
+def sync_changed_page(page, combination_database_id, target_database_title, title_property):
+    """
+    Link one changed source page to the combination database (creating its page if needed) and refresh
+    the linked page's metadata from the query result. The write is skipped when the relation index
+    already knows the linked page holds the same metadata. If the linked page turns out to be archived or
+    deleted, its link is dropped from the index so the next pass creates a new page.
+
+    Args:
+        page (dict): Source page object (from a query result).
+        combination_database_id (str): The ID of the combination Notion database.
+        target_database_title (str): The title of the source database (its relation property).
+        title_property (str): Name of the title property in the source database.
+
+    Returns:
+        str: ID of the linked combination page.
+    """
+    try:
+        seed_page(page)
+        # The query result already carries the title; no need to retrieve the page again
+        page_title = _plain_text(page["properties"][title_property]["title"])
+        combination_page_id = find_linked_combination_page_id(page["id"], combination_database_id,
+                                                              target_database_title)
+        if combination_page_id is None:
+            new_page = add_new_page_helper(page["id"], combination_database_id, target_database_title,
+                                           title_property)
+            combination_page_id = new_page["id"]
+        else:
+            properties = get_combination_page_properties(combination_database_id, combination_page_id)
+            if properties is not None and page_properties_match({"properties": properties}, page["created_time"],
+                                                                page["last_edited_time"], target_database_title,
+                                                                page_title):
+                log_print_yellow("Page has no updates: %s" % page_title)
+                return combination_page_id
+        if is_operation_applied("update", combination_page_id, page["last_edited_time"]):
+            # Journaled by the interrupted run this one resumes
+            return combination_page_id
+        try:
+            updated = update_page_properties(combination_page_id, page["created_time"], page["last_edited_time"],
+                                             target_database_title, page_title)
+        except RuntimeError as e:
+            if _is_archived_or_missing(e):
+                # Archived or deleted by hand: forget the link so the next pass creates a new page
+                remove_from_relation_index(combination_database_id, target_database_title, page["id"])
+            raise
+        set_combination_page_properties(combination_database_id, combination_page_id, updated["properties"])
+        log_print_yellow("Page synced: %s." % page_title)
+        return combination_page_id
     except Exception as e:
-        log_error(f"Error full merging database {target_database_id}.", e)
-        raise
+        raise RuntimeError(f"Failed to sync changed page {page['id']}.") from e
 
 
 def update_page_to_combi(page_id, combination_database_id, target_database_title, target_database_id):
@@ -132,24 +451,20 @@ def update_page_to_combi(page_id, combination_database_id, target_database_title
 
 def get_page_id_list(database_id):
     """
-    Retrieves all page IDs from the specified Notion database.
+    Streams all pages from the specified Notion database, following pagination.
 
     Args:
         database_id (str): The ID of the Notion database.
 
-    Returns:
-        List[str]: List of page IDs.
+    Yields:
+        dict: Lazily fetched page objects.
+
+    Raises:
+        RuntimeError: While iterating, if a query fails.
     """
     try:
-        all_page_ids = []
-        response = notion.databases.query(database_id=database_id)
-        # for page in response["results"]:
-        #     # Collect page IDs
-        #     all_page_ids.append(page["id"])
-        #
-        # print("Retrieved %d pages for a database." % len(all_page_ids))
-        # return all_page_ids
-        return response
+        # A generator, so query errors surface here while the caller iterates
+        yield from search_database.iter_database_pages(database_id)
     except Exception as e:
         raise RuntimeError(f"Failed to retrieve pages from database {database_id}.") from e
 
@@ -167,19 +482,45 @@ def is_page_id_in_combi_relation_id(page_id, combination_database_id, target_dat
         bool: True if already linked, False otherwise.
     """
     try:
-        response = notion.databases.query(database_id=combination_database_id)
-
-        for page in response["results"]:
-            # Check if relation field is not empty
-            if not page["properties"][target_database_title]["relation"] == []:
-                # Compare relation ID with source page ID
-                if page_id == page["properties"][target_database_title]["relation"][0]["id"]:
-                    return True
-        return False
+        return find_linked_combination_page_id(page_id, combination_database_id, target_database_title) is not None
     except Exception as e:
         raise RuntimeError(f"Failed to check relation for page {page_id}.") from e
 
 
+def find_linked_combination_page_id(page_id, combination_database_id, target_database_title):
+    """
+    Finds the combination page that relates to the given source page.
+    Uses the relation index when one has been built for this sync; otherwise asks Notion directly.
+
+    Args:
+        page_id (str): ID of the source page.
+        combination_database_id (str): ID of the destination database.
+        target_database_title (str): Property name used for the relation.
+
+    Returns:
+        str or None: ID of the linked combination page, or None if not linked.
+    """
+    try:
+        if is_relation_index_built(combination_database_id):
+            return find_combination_page(combination_database_id, target_database_title, page_id)
+
+        # Let Notion find the linked page instead of scanning the whole combination database
+        matches = search_database.iter_database_pages(
+            combination_database_id,
+            filter={"property": target_database_title, "relation": {"contains": page_id}},
+            page_size=1,
+            prefetch=False
+        )
+        match = next(matches, None)
+        if match is None:
+            return None
+        # Keep the match's properties so an unchanged page is not written again
+        set_combination_page_properties(combination_database_id, match["id"], match["properties"])
+        return match["id"]
+    except Exception as e:
+        raise RuntimeError(f"Failed to find linked page for {page_id}.") from e
+
+
 def add_new_page(page_id, database_id, database_title_property_name, database_relation_property_name, title_property):
     """
     Creates a new page in the destination database with appropriate title and relation.
@@ -190,12 +531,15 @@ def add_new_page(page_id, database_id, database_title_property_name, database_re
         database_title_property_name (str): Name of the title property in the target database.
         database_relation_property_name (str): Name of the relation property in the target database.
         title_property (str): Name of the title property in the source page.
+
+    Returns:
+        dict: The created page object.
     """
     try:
         page_title = search_database.get_target_page_title(page_id, title_property)
 
         # Construct new page payload
-        notion.pages.create(
+        return notion.pages.create(
             parent={"database_id": database_id},
             properties={
                 database_title_property_name: {
@@ -229,117 +573,148 @@ def add_new_page_helper(page_id, database_id, target_database_title, title_prope
         database_id (str): ID of the destination database.
         target_database_title (str): Title of the source database used as relation field.
         title_property (str): Name of the page title property.
+
+    Returns:
+        dict: The created page object (only its `id` when a resumed run finds the create in the journal).
     """
     try:
+        created_page_id = get_created_page_id(page_id)
+        if created_page_id is not None:
+            # The interrupted run already created this page; link it instead of creating a duplicate
+            add_to_relation_index(database_id, target_database_title, page_id, created_page_id)
+            return {"id": created_page_id}
         # Get the title field name for the combination database
         database_title_property_name = search_database.get_target_database_title_property_name(database_id)
         database_relation_property_name = target_database_title
-        add_new_page(page_id, database_id, database_title_property_name, database_relation_property_name,
-                     title_property)
+        new_page = add_new_page(page_id, database_id, database_title_property_name, database_relation_property_name,
+                                title_property)
+        # Keep the relation index current so later checks see this page without another query
+        add_to_relation_index(database_id, database_relation_property_name, page_id, new_page["id"])
+        record_operation("create", page_id, created_page_id=new_page["id"])
+        return new_page
     except Exception as e:
         log_error(f"Failed to invoke page helper for {page_id}.", e)
         raise RuntimeError(f"Failed to invoke page helper for {page_id}.") from e
 
 
-def delete_page(page_id):
-    """
-    Archives a page in Notion (soft delete).
-
-    Args:
-        page_id (str): ID of the page to archive.
-    """
-    try:
-        page = get_page(page_id)
-        if page.get("archived"):
-            return  # Already archived, skip
-        notion.pages.update(
-            page_id=page_id,
-            archived=True
-        )
-    except Exception as e:
-        raise RuntimeError(f"Failed to archive page {page_id}.") from e
-
-
 def delete_no_relation_pages(combination_database_id, relation_property_name_list):
     """
     Multithreaded: Delete pages in the combination database that have no relation.
 
+    Notion evaluates the "no relation" predicate, so only orphans are returned: a healthy database costs one
+    query, however many pages it holds. The orphans are archived on the shared adaptive pool.
+
     Args:
         combination_database_id (str): The ID of the destination database.
         relation_property_name_list (List[str]): List of relation property names to check.
+
+    Returns:
+        int: Number of orphan pages found.
     """
     try:
-        pages_id_list = get_page_id_list(combination_database_id)
-        pages = pages_id_list["results"]
-
-        def process_single_page(page):
+        # Collect first: archiving removes pages from the filtered result set while it is paginated
+        orphans = list(search_database.iter_database_pages(
+            combination_database_id,
+            filter=no_relation_filter(relation_property_name_list),
+            prefetch=False
+        ))
+
+        def archive_single_page(page):
             try:
-                full_page = get_page(page["id"])
-                for relation_property_name in relation_property_name_list:
-                    if full_page["properties"].get(relation_property_name, {}).get("relation"):
-                        log_print_yellow(f"Keep page: {get_page_title(page["id"])}")
-                        return  # Page has at least one relation → skip
-
-                delete_page(page["id"])
-                log_print_yellow(f"Deleted page: {get_page_title(page['id'])}")
+                if is_operation_applied("archive", page["id"]):
+                    return
+                notion.pages.update(page_id=page["id"], archived=True)
+                record_operation("archive", page["id"])
+                log_print_yellow(f"Deleted page: {_combination_page_title(page)}")
             except Exception as e:
-                log_error(f"Failed to process/delete page {page['id']}", e)
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(process_single_page, page) for page in pages]
-            for future in as_completed(futures):
-                future.result()
-
+                log_error(f"Failed to delete page {page['id']}", e)
 
+        run_in_pool(archive_single_page, orphans)
+        return len(orphans)
     except Exception as e:
         raise RuntimeError(f"Failed to delete all unlinked pages.") from e
 
 
-def update_all_pages_properties(combination_database_id, relation_property_name_list):
+def update_all_pages_properties(combination_database_id, relation_property_name_list, join=True):
     """
     Multithreaded: Update metadata fields for all pages in the combination database.
+    Pages whose metadata already matches their source page are skipped without a write.
+
+    With `join=True`, every target database is queried once and the desired metadata of each page is found
+    with an in-memory hash join (see `relate_databases_join.py`), so reads cost about one query per 100
+    source pages. Source pages missing from the join, and every page with `join=False`, are looked up one
+    by one through the page cache.
 
     Args:
         combination_database_id (str): ID of the merged database.
         relation_property_name_list (List[str]): Relation properties to check for mapping.
+        join (bool): If True, bulk-load the source metadata before updating.
+
+    Returns:
+        dict: Number of pages `updated` and `skipped` (already up to date).
     """
     try:
-        pages_id_list = get_page_id_list(combination_database_id)
-        pages = pages_id_list["results"]
+        source_index = {}
+        if join:
+            properties = schema_registry.get(combination_database_id)["database"]["properties"]
+            target_database_id_list = [properties[name]["relation"]["database_id"]
+                                       for name in relation_property_name_list
+                                       if properties.get(name, {}).get("type") == "relation"]
+            source_index = build_source_metadata_index(target_database_id_list)
+
+        pages = get_page_id_list(combination_database_id)
+        counts = {"updated": 0, "skipped": 0}
+        counts_lock = threading.Lock()
 
         def update_single_page(page):
-            # for page in pages_id_list["results"]:
             try:
-                for relation_property_name in relation_property_name_list:
-                    # Find the related source page via relation
-                    response = get_page(page["id"], True)
-                    if response["properties"][relation_property_name]["relation"]:
-                        relate_page_id = response["properties"][relation_property_name]["relation"][0]["id"]
-
-                        # Extract metadata from source page
-                        create_time = get_page_create_time(relate_page_id)
-
-                        last_edited_time = get_page_last_edited_time(relate_page_id)
+                # Find the related source page via relation (the query result already holds it)
+                link = join_source_metadata(page, relation_property_name_list, source_index)
+                if link is None:
+                    return
+                relate_page_id, metadata = link
+                if metadata is None:
+                    metadata = get_source_metadata(relate_page_id)
+                create_time, last_edited_time, database_title, page_title = metadata
+
+                # The query result holds the combined page's current values; only write on a difference.
+                # A resumed run also skips the updates the interrupted run journaled.
+                if page_properties_match(page, create_time, last_edited_time, database_title, page_title) \
+                        or is_operation_applied("update", page["id"], last_edited_time):
+                    with counts_lock:
+                        counts["skipped"] += 1
+                    return
+
+                # Apply metadata to combined page
+                update_page_properties(page["id"], create_time, last_edited_time, database_title, page_title)
+                with counts_lock:
+                    counts["updated"] += 1
+                log_print_yellow("Page properties updated: %s." % page_title)
+            except Exception as e:
+                log_error(f"Failed to update page metadata: {page['id']}", e)
 
-                        database_id = get_parent_of_page_id(relate_page_id)
-                        database_title = search_database.get_target_database_title(database_id)
+        run_in_pool(update_single_page, pages)
+        log_print_green(f"Metadata writes: {counts['updated']} sent, {counts['skipped']} skipped (already up to date).")
+        return counts
+    except Exception as e:
+        raise RuntimeError("Failed to update page properties.") from e
 
-                        page_title = get_page_title(relate_page_id)
 
-                        # Apply metadata to combined page
-                        update_page_properties(page["id"], create_time, last_edited_time, database_title, page_title)
-                        log_print_yellow("Page properties updated: %s." % page_title)
-                        return
-            except Exception as e:
-                log_error(f"Failed to update page metadata: {page['id']}", e)
+def get_source_metadata(source_page_id):
+    """
+    Look up the metadata of one source page through the page cache.
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(update_single_page, page) for page in pages]
-            for future in as_completed(futures):
-                future.result()
+    Args:
+        source_page_id (str): ID of the source page.
 
-    except Exception as e:
-        raise RuntimeError("Failed to update page properties.", e)
+    Returns:
+        tuple: (created_time, last_edited_time, database_title, page_title).
+    """
+    # Source pages were cached from the merge stage's queries, so this is usually no API call
+    source_page = get_page(source_page_id)
+    database_title = search_database.get_target_database_title(extract_parent_database_id(source_page))
+    return (source_page["created_time"], source_page["last_edited_time"], database_title,
+            extract_page_title(source_page))
 
 
 def update_page_properties(page_id, create_time, update_time, location, title):
@@ -352,41 +727,118 @@ def update_page_properties(page_id, create_time, update_time, location, title):
         update_time (str): ISO timestamp of last edit.
         location (str): Source database title.
         title (str): Title of the original page.
+
+    Returns:
+        dict: The updated page object.
     """
     try:
         # Send update to Notion
-        notion.pages.update(
+        page = notion.pages.update(
             page_id=page_id,
-            properties={
-                "Created Time": {
-                    "date": {
-                        "start": create_time
+            properties=build_metadata_properties(create_time, update_time, location, title)
+        )
+        record_operation("update", page_id, update_time)
+        return page
+    except Exception as e:
+        raise RuntimeError(f"Failed to update properties for page {page_id}.") from e
+
+
+def build_metadata_properties(create_time, update_time, location, title):
+    """
+    Builds the property payload holding a combination page's metadata.
+
+    Args:
+        create_time (str): ISO timestamp of page creation.
+        update_time (str): ISO timestamp of last edit.
+        location (str): Source database title.
+        title (str): Title of the original page.
+
+    Returns:
+        dict: Properties for `pages.update` / `pages.create`.
+    """
+    return {
+        "Created Time": {
+            "date": {
+                "start": create_time
+            }
+        },
+        "Last Edited Time": {
+            "date": {
+                "start": update_time
+            }
+        },
+        "Database Location": {
+            "rich_text": [
+                {
+                    "text": {
+                        "content": location
                     }
-                },
-                "Last Edited Time": {
-                    "date": {
-                        "start": update_time
+                }
+            ]
+        },
+        "Name": {
+            "title": [
+                {
+                    "text": {
+                        "content": title
                     }
-                },
-                "Database Location": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": location
-                            }
-                        }
-                    ]
-                },
-                "Name": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": title
-                            }
-                        }
-                    ]
                 }
-            }
+            ]
+        }
+    }
+
+
+def page_properties_match(page, create_time, update_time, location, title):
+    """
+    Checks whether a page already holds the given metadata values.
+
+    Args:
+        page (dict): The page object (e.g. from a query result) with its current properties.
+        create_time (str): ISO timestamp of page creation.
+        update_time (str): ISO timestamp of last edit.
+        location (str): Source database title.
+        title (str): Title of the original page.
+
+    Returns:
+        bool: True if all four metadata properties already match, False otherwise.
+    """
+    properties = page["properties"]
+    try:
+        return (
+                _same_instant(properties["Created Time"]["date"], create_time)
+                and _same_instant(properties["Last Edited Time"]["date"], update_time)
+                and _plain_text(properties["Database Location"]["rich_text"]) == location
+                and _plain_text(properties["Name"]["title"]) == title
         )
-    except Exception as e:
-        raise RuntimeError(f"Failed to update properties for page {page_id}.") from e
+    except (KeyError, TypeError):
+        # Missing or differently typed properties always need a write
+        return False
+
+
+def _combination_page_title(page):
+    # Orphans may have an empty title; fall back to the ID for logging
+    try:
+        return extract_page_title(page) or page["id"]
+    except (KeyError, ValueError):
+        return page["id"]
+
+
+def _is_archived_or_missing(error):
+    # Notion answers a write to a deleted page with 404 and to an archived page with a validation error
+    while error is not None:
+        code = getattr(error, "code", None)
+        if code == APIErrorCode.ObjectNotFound or (code == APIErrorCode.ValidationError and "archived" in str(error)):
+            return True
+        error = error.__cause__
+    return False
+
+
+def _same_instant(date_value, timestamp):
+    # Notion echoes dates back with an offset ("+00:00") where the API timestamps use "Z"
+    if not date_value or not date_value.get("start") or not timestamp:
+        return False
+    return datetime.fromisoformat(date_value["start"]) == datetime.fromisoformat(timestamp)
+
+
+def _plain_text(rich_text):
+    return "".join(part["plain_text"] for part in rich_text)
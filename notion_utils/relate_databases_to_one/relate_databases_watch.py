@@ -0,0 +1,210 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_watch.py
+
+Purpose:
+    Continuous (daemon) sync. A `SyncWatcher` polls every target database of one combination database at a
+    fixed interval and applies only the detected changes, so merged views stay near-real-time.
+
+    Each poll is one `databases.query` per target database, filtered to pages edited on or after the target's
+    watermark and sorted by `last_edited_time` (newest first). Notion rounds `last_edited_time` to the minute,
+    so the poll always returns the pages of the watermark's minute again; the watcher remembers which
+    (page, `last_edited_time`) pairs it already synced and only applies the rest. An idle cycle therefore
+    costs one small query per target database and no writes.
+
+    State kept warm between cycles:
+    - The relation index of the combination database (`relate_databases_index.py`), built once at start and
+      kept current as pages are created, so a changed page is matched without querying the combination database
+    - Schemas and database titles (`schema_registry.py`, database cache)
+    - Watermarks, in memory and in the sync state file (`relate_databases_watermark.py`), so a restarted
+      daemon continues where it stopped
+
+    A page that fails to sync is not remembered and holds the watermark at its `last_edited_time`, so it is
+    applied again on the next cycle while the pages after it are not. A combination page archived by hand
+    is dropped from the index when its update fails, so the next cycle creates a new one.
+
+    Deleting a source page does not change its database's watermark, so orphaned combination pages are removed
+    by a full sweep every `sweep_every` cycles instead of on every poll.
+
+Used in:
+    - Watch mode (`python -m notion_utils watch`, see `notion_utils/cli.py`)
+
+Class:
+    - SyncWatcher: Polls the target databases of one combination database and applies their changes
+
+Functions:
+    - watch(): Run watchers in a loop until stopped
+"""
+
+import threading
+import time
+
+import notion_utils.search_database as search_database
+from notion_utils.instrumentation import stage
+from notion_utils.log import log_print_green, log_error
+from notion_utils.relate_databases_to_one.relate_databases_index import build_relation_index, \
+    is_relation_index_built
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import TargetJob, run_target_jobs, \
+    sync_changed_page, delete_no_relation_pages
+from notion_utils.relate_databases_to_one.relate_databases_watermark import load_watermark, save_watermark, \
+    last_edited_filter, next_watermark
+
+# Full orphan sweep of the combination database every this many cycles (0 disables it)
+SWEEP_EVERY = 60
+
+NEWEST_FIRST = [{"timestamp": "last_edited_time", "direction": "descending"}]
+
+
+class SyncWatcher:
+    """
+    Polls the target databases of one combination database and applies their changes.
+    """
+
+    def __init__(self, combination_database_id, target_database_ids, sweep_every=SWEEP_EVERY):
+        """
+        Args:
+            combination_database_id (str): The ID of the combination Notion database.
+            target_database_ids (List[str]): The IDs of the target databases to watch.
+            sweep_every (int): Remove orphaned combination pages every this many cycles (0 never).
+        """
+        self.combination_database_id = combination_database_id
+        self.target_database_ids = list(target_database_ids)
+        self.sweep_every = sweep_every
+        self.cycles = 0
+        self.stats = {"polls": 0, "changed": 0, "failed": 0, "sweeps": 0}
+        self._watermarks = {}
+        # Target ID -> {page ID: last_edited_time} of pages synced at or after the watermark
+        self._synced = {}
+        self._titles = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Load the watermarks and warm the relation index. Call once, after the initial sync.
+        """
+        try:
+            self._titles = [search_database.get_target_database_title(target_database_id)
+                            for target_database_id in self.target_database_ids]
+            for target_database_id in self.target_database_ids:
+                self._watermarks[target_database_id] = load_watermark(self.combination_database_id,
+                                                                      target_database_id)
+                self._synced[target_database_id] = {}
+            if not is_relation_index_built(self.combination_database_id):
+                with stage("index"):
+                    build_relation_index(self.combination_database_id, self._titles)
+        except Exception as e:
+            raise RuntimeError(f"Failed to start watching database {self.combination_database_id}.") from e
+
+    def poll(self, target_database_id):
+        """
+        Find the pages of a target database changed since they were last synced (one query when few changed).
+
+        Args:
+            target_database_id (str): The ID of the target database.
+
+        Returns:
+            List[dict]: Changed page objects, newest first.
+        """
+        watermark = self._watermarks[target_database_id]
+        synced = self._synced[target_database_id]
+        pages = search_database.iter_database_pages(
+            target_database_id,
+            filter=last_edited_filter(watermark) if watermark else None,
+            sorts=NEWEST_FIRST,
+            prefetch=False
+        )
+        self.stats["polls"] += 1
+        return [page for page in pages
+                if synced.get(normalize_uuid(page["id"])) != page["last_edited_time"]]
+
+    def run_cycle(self):
+        """
+        Poll every target database and apply the changes on the shared pool.
+
+        Returns:
+            int: Number of changed pages synced in this cycle.
+        """
+        self.cycles += 1
+        with stage("poll"):
+            changes = {target_database_id: self.poll(target_database_id)
+                       for target_database_id in self.target_database_ids}
+        jobs = [self._build_job(target_database_id, title, changes[target_database_id])
+                for target_database_id, title in zip(self.target_database_ids, self._titles)
+                if changes[target_database_id]]
+        before = self.stats["changed"]
+        if jobs:
+            with stage("apply"):
+                run_target_jobs(jobs)
+        if self.sweep_every and self.cycles % self.sweep_every == 0:
+            with stage("orphans"):
+                delete_no_relation_pages(self.combination_database_id, self._titles)
+            self.stats["sweeps"] += 1
+        return self.stats["changed"] - before
+
+    def _build_job(self, target_database_id, target_database_title, pages):
+        # Sync the changed pages; the watermark stops at the oldest failed page so it is polled again
+        title_property = search_database.get_target_database_title_property_name(target_database_id)
+        synced = []
+        failed_times = []
+        state_lock = threading.Lock()
+
+        def sync_one(page):
+            try:
+                sync_changed_page(page, self.combination_database_id, target_database_title, title_property)
+                with state_lock:
+                    synced.append(page)
+            except Exception as e:
+                with state_lock:
+                    failed_times.append(page["last_edited_time"])
+                log_error(f"Failed to sync page {page['id']} from '{target_database_title}'", e)
+
+        def on_done():
+            watermark = next_watermark(self._watermarks[target_database_id],
+                                       [page["last_edited_time"] for page in synced], failed_times)
+            if watermark != self._watermarks[target_database_id]:
+                self._watermarks[target_database_id] = watermark
+                save_watermark(self.combination_database_id, target_database_id, watermark)
+            # Only pages at or after the watermark come back from the next poll; failed ones are not
+            # remembered, so they are applied again
+            remembered = {page_id: edited for page_id, edited in self._synced[target_database_id].items()
+                          if watermark is None or edited >= watermark}
+            remembered.update((normalize_uuid(page["id"]), page["last_edited_time"]) for page in synced)
+            self._synced[target_database_id] = remembered
+            # Targets finish on different pool threads
+            with self._lock:
+                self.stats["changed"] += len(synced)
+                self.stats["failed"] += len(failed_times)
+            if failed_times:
+                log_error(f"{len(failed_times)} page(s) of '{target_database_title}' failed; retrying next cycle.")
+            log_print_green(f"Database '{target_database_title}': {len(synced)} changed page(s) synced.")
+
+        return TargetJob(target_database_title, pages, sync_one, on_done)
+
+
+def watch(watchers, interval, cycles=None, stop_event=None):
+    """
+    Run the watchers' cycles every `interval` seconds until `cycles` cycles ran or `stop_event` is set.
+    A failing cycle is logged and retried on the next one.
+
+    Args:
+        watchers (List[SyncWatcher]): Started watchers.
+        interval (float): Seconds between the starts of two cycles.
+        cycles (int, optional): Stop after this many cycles (default: run until stopped).
+        stop_event (threading.Event, optional): Set it to stop after the current cycle.
+    """
+    stop_event = stop_event or threading.Event()
+    count = 0
+    while not stop_event.is_set() and (cycles is None or count < cycles):
+        started = time.time()
+        count += 1
+        changed = 0
+        for watcher in watchers:
+            try:
+                changed += watcher.run_cycle()
+            except Exception as e:
+                log_error(f"Watch cycle of database {watcher.combination_database_id} failed.", e)
+        if changed:
+            log_print_green(f"Cycle {count}: {changed} changed page(s) synced in {time.time() - started:.2f}s.")
+        if cycles is not None and count >= cycles:
+            break
+        stop_event.wait(max(0.0, interval - (time.time() - started)))
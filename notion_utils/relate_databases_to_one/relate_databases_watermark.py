@@ -0,0 +1,118 @@
+"""
+notion_utils/relate_databases_to_one/relate_databases_watermark.py
+
+Purpose:
+    Persists per-target-database watermarks for incremental syncs. A watermark is the latest
+    `last_edited_time` seen in a target database during the last successful sync into a given
+    combination database. The next incremental run only queries pages edited on or after it.
+
+    State file layout (JSON, default `logs/sync_state.json`, override with `NOTION_SYNC_STATE_PATH`):
+        { combination_database_id: { target_database_id: "2025-06-26T10:00:00.000Z" } }
+
+Used in:
+    - Phase 5: Incremental Conditional Merge (`update_all_target_database_to_combi(..., incremental=True)`)
+
+Functions:
+    - load_watermark(): Read the watermark of a target database
+    - save_watermark(): Store the watermark of a target database
+    - next_watermark(): Compute the watermark after a sync pass, holding it at the oldest failed page
+    - last_edited_filter(): Build the `databases.query` filter for pages edited since a watermark
+"""
+
+import json
+import os
+import threading
+
+from notion_utils.log import LOG_DIR
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+
+STATE_PATH = os.getenv("NOTION_SYNC_STATE_PATH", os.path.join(LOG_DIR, "sync_state.json"))
+
+_state_lock = threading.Lock()
+
+
+def _read_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_watermark(combination_database_id, target_database_id):
+    """
+    Read the watermark of a target database for a combination database.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_id (str): ID of the target Notion database.
+
+    Returns:
+        str or None: ISO timestamp of the last synced edit, or None if the target was never synced.
+    """
+    with _state_lock:
+        state = _read_state()
+    return state.get(normalize_uuid(combination_database_id), {}).get(normalize_uuid(target_database_id))
+
+
+def save_watermark(combination_database_id, target_database_id, watermark):
+    """
+    Store the watermark of a target database for a combination database.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_id (str): ID of the target Notion database.
+        watermark (str): ISO timestamp of the latest synced edit.
+    """
+    with _state_lock:
+        state = _read_state()
+        state.setdefault(normalize_uuid(combination_database_id), {})[normalize_uuid(target_database_id)] = watermark
+        # Write to a temporary file first so an interrupted run never leaves a truncated state file
+        temp_path = STATE_PATH + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        os.replace(temp_path, STATE_PATH)
+
+
+def last_edited_filter(watermark):
+    """
+    Build a query filter matching pages edited on or after the watermark.
+
+    Notion rounds `last_edited_time` to the minute, so "on or after" (rather than "after") guarantees
+    edits made in the same minute as the watermark are not missed; re-syncing them is harmless.
+
+    Args:
+        watermark (str): ISO timestamp.
+
+    Returns:
+        dict: A `databases.query` filter object.
+    """
+    return {
+        "timestamp": "last_edited_time",
+        "last_edited_time": {"on_or_after": watermark}
+    }
+
+
+def next_watermark(watermark, synced_times, failed_times):
+    """
+    Compute the watermark after a sync pass over the pages edited since `watermark`.
+
+    Every page edited before the oldest failed page has synced, so the watermark moves up to that page's
+    `last_edited_time`: the next run retries it (the filter is "on or after") without re-reading the pages
+    before it. A page that keeps failing holds the watermark at its time until it syncs (or is edited again);
+    pages edited after it are re-read on each run meanwhile, but never skipped. Without failures the
+    watermark moves to the newest synced page. It never moves backwards.
+
+    Args:
+        watermark (str or None): The watermark the pass started from.
+        synced_times (Iterable[str]): `last_edited_time` of the pages that synced.
+        failed_times (Iterable[str]): `last_edited_time` of the pages that failed.
+
+    Returns:
+        str or None: The new watermark.
+    """
+    # ISO timestamps in the same format compare correctly as strings
+    failed_times = list(failed_times)
+    candidate = min(failed_times) if failed_times else max(synced_times, default=None)
+    if candidate is None or (watermark is not None and candidate <= watermark):
+        return watermark
+    return candidate
@@ -0,0 +1,179 @@
+"""
+notion_utils/schema_registry.py
+
+Purpose:
+    Provides a shared, time-limited registry of Notion database schemas. Each database is retrieved once
+    and the lookups the sync engine needs over and over are precomputed:
+    - The name of the 'title' property
+    - A map from relation target database ID to the relation property name
+    - A map from property name to property type
+
+Features:
+    - One `databases.retrieve` per database per TTL window instead of one per lookup
+    - Thread-safe, so worker pools can share a single registry; concurrent misses for the same database
+      share one fetch (single-flight)
+    - Schema updates made through `SchemaRegistry.update()` invalidate the cached entry immediately
+
+Used in:
+    - Phase 3–5: Schema validation, relation checks and page creation during merges
+    - All modules that previously called `notion.databases.retrieve` for schema inspection
+
+Class:
+    - SchemaRegistry: TTL cache of database schemas with derived lookups
+
+Module instance:
+    - schema_registry: The registry shared by the whole package (TTL from `NOTION_SCHEMA_TTL`, default 300s)
+"""
+
+import os
+import threading
+import time
+
+from notion_utils.cache import SingleFlight, get_database, release_database
+from notion_utils.client import get_notion_client
+
+notion = get_notion_client()
+
+
+def _key(database_id):
+    # Notion accepts IDs with or without hyphens; normalize so both map to the same entry
+    return database_id.replace("-", "")
+
+
+class SchemaRegistry:
+    """
+    TTL cache of database schemas with precomputed title, relation and type lookups.
+    """
+
+    def __init__(self, ttl=300.0):
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid before it is fetched again.
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get(self, database_id):
+        """
+        Return the registry entry of a database, fetching it if missing or expired.
+
+        Args:
+            database_id (str): The ID of the Notion database.
+
+        Returns:
+            dict: Entry with keys `database`, `title_property_name`, `relation_properties`
+                (normalized target database ID -> property name) and `property_types`
+                (property name -> type).
+        """
+        with self._lock:
+            entry = self._entries.get(_key(database_id))
+        if entry and time.monotonic() - entry["fetched_at"] < self.ttl:
+            return entry
+        try:
+            return self._flights.do(_key(database_id),
+                                    lambda: self.store(get_database(database_id, use_cache=False)))
+        except Exception as e:
+            raise RuntimeError(f"Failed to retrieve schema of database '{database_id}'") from e
+
+    def store(self, database):
+        """
+        Build and store a registry entry from a database object that was already retrieved.
+
+        Args:
+            database (dict): Database object as returned by `databases.retrieve`.
+
+        Returns:
+            dict: The new registry entry.
+        """
+        title_property_name = None
+        relation_properties = {}
+        property_types = {}
+        for prop_name, prop in database["properties"].items():
+            property_types[prop_name] = prop["type"]
+            if prop["type"] == "title" and title_property_name is None:
+                title_property_name = prop_name
+            elif prop["type"] == "relation":
+                relation_properties[_key(prop["relation"]["database_id"])] = prop_name
+
+        entry = {
+            "database": database,
+            "title_property_name": title_property_name,
+            "relation_properties": relation_properties,
+            "property_types": property_types,
+            "fetched_at": time.monotonic(),
+        }
+        with self._lock:
+            self._entries[_key(database["id"])] = entry
+        return entry
+
+    def title_property_name(self, database_id):
+        """
+        Return the name of the 'title' property of a database.
+
+        Raises:
+            ValueError: If the database has no title property.
+        """
+        name = self.get(database_id)["title_property_name"]
+        if name is None:
+            raise ValueError(f"Failed to find 'title' property in database '{database_id}'")
+        return name
+
+    def relation_property_name(self, database_id, target_database_id):
+        """
+        Return the name of the relation property pointing at the target database, or None.
+        """
+        return self.get(database_id)["relation_properties"].get(_key(target_database_id))
+
+    def property_types(self, database_id):
+        """
+        Return a map of property name to property type for a database.
+        """
+        return self.get(database_id)["property_types"]
+
+    def update(self, database_id, **kwargs):
+        """
+        Update a database through the Notion API and invalidate its cached schema.
+
+        Args:
+            database_id (str): The ID of the Notion database.
+            **kwargs: Arguments forwarded to `notion.databases.update` (e.g. `properties`, `title`).
+
+        Returns:
+            dict: The updated database object.
+        """
+        try:
+            return notion.databases.update(database_id=database_id, **kwargs)
+        finally:
+            # Invalidate even on failure: a partially applied update leaves the cached schema unreliable
+            self.invalidate(database_id)
+
+    def invalidate(self, database_id):
+        """
+        Drop the cached schema of a database (and its copy in the database cache).
+        """
+        with self._lock:
+            self._entries.pop(_key(database_id), None)
+        # A fetch started before the change must not be shared with callers asking after it
+        self._flights.forget(_key(database_id))
+        release_database(database_id)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of cached `entries` and of `coalesced` fetches saved by single-flight.
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "coalesced": self._flights.coalesced}
+
+    def clear(self):
+        """
+        Drop every cached schema.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# Registry shared by the whole package
+schema_registry = SchemaRegistry(ttl=float(os.getenv("NOTION_SCHEMA_TTL", "300")))
@@ -19,6 +19,7 @@ Used in:
 
 Functions:
     - get_target_database_dict(): Return full database schema
+    - iter_database_pages(): Stream every page of a database, following pagination cursors
     - get_target_database_title(): Extract the display title of a database
     - get_target_database_title_property_name(): Find the name of the 'title' property field
     - property_exists(): Check if a property exists in a database
@@ -27,8 +28,12 @@ Functions:
     - is_valid_database(): Validate a database ID (returns True/False)
 """
 
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
 from notion_utils.cache import get_page, get_database
 from notion_utils.client import get_notion_client
+from notion_utils.schema_registry import schema_registry
 
 # Initialize the Notion client using the auth token
 notion = get_notion_client()
@@ -39,11 +44,63 @@ def get_target_database_dict(database_id):
     Retrieve the full database object by ID.
     """
     try:
-        return notion.databases.retrieve(database_id=database_id)  # Fetch the database metadata
+        return schema_registry.get(database_id)["database"]  # Fetch the database metadata
     except Exception as e:
         raise RuntimeError(f"Failed to retrieve database '{database_id}'") from e
 
 
+def iter_database_pages(database_id, filter=None, sorts=None, page_size=100, prefetch=True):
+    """
+    Lazily stream every page of a Notion database, following `next_cursor` until exhausted.
+
+    Only the current batch (and, with prefetch, the next one) is held in memory, so callers can walk
+    databases of any size with flat memory usage.
+
+    Args:
+        database_id (str): The ID of the Notion database to query.
+        filter (dict, optional): Notion query filter object.
+        sorts (list, optional): Notion query sorts list.
+        page_size (int): Number of pages per request (Notion allows at most 100).
+        prefetch (bool): If True, request the next batch in the background while the caller
+            processes the current one.
+
+    Yields:
+        dict: Page objects as returned by `databases.query`.
+    """
+    query = {"database_id": database_id, "page_size": page_size}
+    if filter:
+        query["filter"] = filter
+    if sorts:
+        query["sorts"] = sorts
+
+    def fetch(start_cursor):
+        if start_cursor:
+            return notion.databases.query(**query, start_cursor=start_cursor)
+        return notion.databases.query(**query)
+
+    # A single background worker is enough: only one cursor can be in flight at a time
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        response = fetch(None)
+        while True:
+            next_cursor = response.get("next_cursor") if response.get("has_more") else None
+            # Run the prefetch in the caller's context so it is attributed to the caller's stage
+            next_batch = executor.submit(contextvars.copy_context().run, fetch, next_cursor) \
+                if executor and next_cursor else None
+
+            for page in response["results"]:
+                yield page
+
+            if not next_cursor:
+                return
+            response = next_batch.result() if next_batch else fetch(next_cursor)
+    except Exception as e:
+        raise RuntimeError(f"Failed to query pages from database '{database_id}'") from e
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 def get_target_database_title(database_id):
     """
     Get the display title of a Notion database.
@@ -63,11 +120,7 @@ def get_target_database_title_property_name(database_id):
     Get the name of the 'title' property field in a database.
     """
     try:
-        response = notion.databases.retrieve(database_id=database_id)  # Get full schema
-        for prop_name, prop_data in response["properties"].items():  # Check if this property is of type 'title'
-            if prop_data["type"] == "title":
-                return prop_name
-        raise ValueError(f"Failed to find 'title' property in database '{database_id}'")
+        return schema_registry.title_property_name(database_id)  # Resolved once per schema fetch
     except Exception as e:
         raise RuntimeError(f"Failed to get title property name from database '{database_id}'") from e
 
@@ -80,8 +133,7 @@ def property_exists(database_id, property_name):
         bool: True if property exists, False otherwise.
     """
     try:
-        database = notion.databases.retrieve(database_id=database_id)
-        return property_name in database["properties"]  # Check for existence of the property
+        return property_name in schema_registry.property_types(database_id)  # Check for existence of the property
     except Exception as e:
         raise RuntimeError(f"Failed to check property '{property_name}' in database '{database_id}'")from e
 
@@ -92,7 +144,8 @@ def get_target_page_title(page_id, title_property):
     """
     try:
         response = get_page(page_id, True)
-        title = response["properties"][title_property]["title"][0]["plain_text"]  # Extract title plain text
+        # Join every rich text part; an untitled page has none
+        title = "".join(part["plain_text"] for part in response["properties"][title_property]["title"])
         return title
     except Exception as e:
         raise RuntimeError(f"Failed to get title from page '{page_id}'") from e
@@ -24,6 +24,7 @@ Functions:
     - get_page_create_time(): Return creation timestamp
     - get_page_last_edited_time(): Return last modified timestamp
     - get_parent_of_page_id(): Return parent database ID of a page
+    - extract_page_title() / extract_parent_database_id(): Same, from a page object already at hand
 """
 
 from notion_utils.cache import get_page
@@ -47,7 +48,7 @@ def get_target_page_title(page_id, title_property):
 
     try:
         response = get_page(page_id, True)
-        title = response["properties"][title_property]["title"][0]["plain_text"]
+        title = "".join(part["plain_text"] for part in response["properties"][title_property]["title"])
         return title
     except Exception as e:
         raise RuntimeError(f"Failed to get title from page '{page_id}'") from e
@@ -142,11 +143,7 @@ def get_parent_of_page_id(page_id):
     """
 
     try:
-        page = get_page(page_id, True)
-        parent = page["parent"]  # Get parent info
-        if parent["type"] == "database_id":
-            return parent["database_id"]
-        raise ValueError("Failed to find parent id")
+        return extract_parent_database_id(get_page(page_id, True))
     except Exception as e:
         raise RuntimeError(f"Failed to get parent of page '{page_id}'") from e
 
@@ -163,13 +160,46 @@ def get_page_title(page_id):
     """
 
     try:
-        page = get_page(page_id, True)
-        properties = page["properties"]  # All fields in the page
-        for name, prop in properties.items():
-            if prop["type"] == "title":  # Look for the field with type 'title'
-                title_list = prop["title"]
-                if title_list:
-                    return title_list[0]["text"]["content"]  # Return raw title string
-        raise ValueError(f"Failed to get title from page '{page_id}'")
+        return extract_page_title(get_page(page_id, True))
     except Exception as e:
         raise RuntimeError(f"Failed to auto-detect title for page '{page_id}'") from e
+
+
+def extract_page_title(page):
+    """
+    Auto-detect and return the title of a page object (e.g. from a query result), without any API call.
+
+    Args:
+        page (dict): The page object.
+
+    Returns:
+        str: The plain text of all title parts, or an empty string for an untitled page.
+
+    Raises:
+        ValueError: If the page has no title field.
+    """
+    properties = page["properties"]  # All fields in the page
+    for name, prop in properties.items():
+        if prop["type"] == "title":  # Look for the field with type 'title'
+            # Mentions, equations and styled runs split a title into several parts
+            return "".join(part["plain_text"] for part in prop["title"])
+    raise ValueError(f"Failed to get title from page '{page['id']}'")
+
+
+def extract_parent_database_id(page):
+    """
+    Return the database ID that owns a page object, without any API call.
+
+    Args:
+        page (dict): The page object.
+
+    Returns:
+        str: Database ID of the parent.
+
+    Raises:
+        ValueError: If the parent is not a database.
+    """
+    parent = page["parent"]  # Get parent info
+    if parent["type"] == "database_id":
+        return parent["database_id"]
+    raise ValueError("Failed to find parent id")
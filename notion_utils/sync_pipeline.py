@@ -0,0 +1,213 @@
+"""
+notion_utils/sync_pipeline.py
+
+Purpose:
+    The complete sync of one combination database, as run by the GUI, the command line and the benchmarks:
+    - Part 1 (`ensure_standard_fields()`): relation fields for every target database
+    - Part 2 (`sync_relation_field_names()`): relation names, format check, metadata fields, then the merge
+      with one of the engines (staged threads, asyncio, incremental or fused), journaled for `--resume`
+    - Dry runs (`plan_sync()`) and saved plans (`apply_sync_plan()`)
+
+Used in:
+    - `final_app/ui_app.py` (GUI), `final_app/main.py` and `notion_utils/cli.py` (command line)
+    - `benchmarks/bench_sync.py`
+
+Functions:
+    - ensure_standard_fields(): Part 1, relation fields
+    - sync_relation_field_names(): Part 2, validation and merge
+    - plan_sync(): Plan a sync without writing
+    - apply_sync_plan(): Apply a saved plan
+"""
+
+import os
+import time
+
+from notion_utils.cache import cache_stats
+from notion_utils.instrumentation import stage
+from notion_utils.log import LOG_DIR, log_print_green, log_print_yellow, log_error, log_error_with_traceback
+from notion_utils.relate_databases_to_one.relate_databases_format import reconcile_combination_database_schema, \
+    sync_relation_names_with_database_titles, check_combination_database_pages_format, \
+    update_standard_database_property
+from notion_utils.relate_databases_to_one.relate_databases_journal import SyncJournal, journaling
+from notion_utils.relate_databases_to_one.relate_databases_plan import SyncPlan, build_sync_plan, \
+    execute_journaled_plan, run_journaled_sync
+from notion_utils.relate_databases_to_one.relate_databases_search import normalize_uuid
+from notion_utils.relate_databases_to_one.relate_databases_to_one_async import \
+    run_update_all_target_database_to_combi_async
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import update_all_target_database_to_combi
+from notion_utils.search_database import get_target_database_title
+
+# Run ID of the staged engines in the journal (the fused engine uses its plan's timestamp); any staged engine may
+# resume another's run, since they journal the same operations
+STAGED_RUN = "staged"
+
+
+def ensure_standard_fields(combination_database_id, target_database_list, update_callback):
+    """
+    Part 1: Resolve the target database titles and add/rename the relation fields of the combination database.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_list (List[str]): IDs of the target databases.
+        update_callback (Callable[[float], None]): Progress callback (0 to 50).
+    """
+    try:
+        start1 = time.time()
+        total_callback_first_half = len(target_database_list) + 1
+        count = 0
+        print("Resolving target database titles...")
+        with stage("setup"):
+            for target_database in target_database_list:
+                # Titles are cached, so the reconciler below reuses them without new requests
+                count += 1
+                get_target_database_title(target_database)
+                update_callback(count / total_callback_first_half / 2)
+
+            # Rename mismatched relation fields and add missing ones in a single schema update
+            print("Adding relation fields...(Make sure all target database titles are unique!)")
+            reconcile_combination_database_schema(combination_database_id, target_database_list)
+        update_callback((1 + count) / total_callback_first_half / 2)
+        log_print_green(f"All relation fields successfully added to database {combination_database_id}")
+        end1 = time.time()
+        log_print_green(f"Setting runtime：{end1 - start1:.4f} seconds.")
+        update_callback(50)
+    except Exception as re:
+        log_error("Part 1: Ensure standard fields failed.")
+        log_error_with_traceback(re)
+        raise RuntimeError("Ensure standard fields failed.") from re
+
+
+def sync_relation_field_names(combination_database_id, target_database_list, update_callback, use_async=False,
+                              incremental=False, fused=False, resume=False):
+    """
+    Part 2: Validate the combination database and merge every target database into it.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_list (List[str]): IDs of the target databases.
+        update_callback (Callable[[float], None]): Progress callback (50 to 100).
+        use_async (bool): Use the asyncio engine.
+        incremental (bool): Only merge pages edited since the last successful sync.
+        fused (bool): Use the fused single-scan reconcile (journaled plan and apply).
+        resume (bool): Skip the operations an interrupted run already applied (ignored after a completed run).
+
+    Returns:
+        dict or None: Operation counts of the fused engine (see `relate_databases_plan.execute_sync_plan()`),
+            None for the other engines.
+    """
+    try:
+        start2 = time.time()
+        # Make sure relation field names match the corresponding database titles
+        print("Re-syncing relation names to ensure accuracy...")
+        with stage("relation_names"):
+            sync_relation_names_with_database_titles(combination_database_id)
+        update_callback(50 + 12.5)
+
+        # Validate that each page has at most one valid relation and no duplicate names
+        # (the fused reconcile validates while it reads its snapshot, so it skips this extra scan)
+        if not fused:
+            print("Validating combination database structure...")
+            with stage("format_check"):
+                check_combination_database_pages_format(combination_database_id)
+        update_callback(75)
+        # Ensure required fields like Name, Database Address, Created/Edited Time exist
+        print("Ensuring required dynamic fields exist...")
+        with stage("standard_fields"):
+            update_standard_database_property(combination_database_id)
+        log_print_green("Field check complete. Renamed fields will be preserved and new ones created if needed.")
+        update_callback(75 + 12.5)
+        # Merge all pages from target databases into the combination database
+        print("Updating combination database with all target data...")
+        counts = None
+        if fused:
+            # One combination scan: validate, then create, archive and update in a single pass. The plan is saved
+            # next to the journal, so an interrupted run resumes without scanning again
+            counts = run_journaled_sync(target_database_list, combination_database_id, resume=resume)
+        else:
+            # The staged engines re-read the databases, but skip the writes the journal lists when resuming
+            journal = SyncJournal.for_database(combination_database_id)
+            # A completed run leaves nothing to skip; reusing its creates would link pages archived since
+            resume = resume and journal.has_unfinished_run()
+            applied = journal.open(run=STAGED_RUN, resume=resume)
+            if resume:
+                log_print_yellow(f"Resuming the interrupted sync ({applied} operation(s) done).")
+            try:
+                with journaling(journal):
+                    if incremental:
+                        # Only pages edited since the last successful sync are merged and refreshed
+                        update_all_target_database_to_combi(target_database_list, combination_database_id,
+                                                            incremental=True)
+                    elif use_async:
+                        # Event-loop engine: all target databases and stages interleave under one concurrency bound
+                        run_update_all_target_database_to_combi_async(target_database_list, combination_database_id)
+                    else:
+                        update_all_target_database_to_combi(target_database_list, combination_database_id)
+                journal.complete()
+            finally:
+                journal.close()
+        log_print_green("✅ Merge process complete.")
+        stats = cache_stats()
+        log_print_green(f"Cache: pages {stats['pages']['hits']} hits, {stats['pages']['coalesced']} coalesced; "
+                        f"databases {stats['databases']['hits']} hits, {stats['databases']['coalesced']} coalesced.")
+        end2 = time.time()
+        log_print_green(f"Sync runtime：{end2 - start2:.4f} seconds.")
+        update_callback(100)
+        return counts
+    except Exception as ve:
+        log_error("Part 2: Sync relation field names failed.")
+        log_error_with_traceback(ve)
+        raise RuntimeError(f"Sync relation field names failed.") from ve
+
+
+def plan_sync(combination_database_id, target_database_list, output=None):
+    """
+    Dry run: plan the sync without writing and save the plan as JSON.
+
+    Args:
+        combination_database_id (str): ID of the combination Notion database.
+        target_database_list (List[str]): IDs of the target databases.
+        output (str, optional): Plan path (default: logs/plans/plan_<combination ID>_<timestamp>.json).
+
+    Returns:
+        SyncPlan: The plan.
+    """
+    try:
+        start = time.time()
+        # Read-only: snapshot the combination database, scan each target once, write nothing
+        print("Planning sync (dry run, nothing is written)...")
+        plan = build_sync_plan(target_database_list, combination_database_id)
+        output = output or os.path.join(LOG_DIR, "plans", f"plan_{normalize_uuid(combination_database_id)}_"
+                                                          f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+        plan.save(output)
+        log_print_green(f"Sync plan saved to {output}")
+        log_print_green(f"Planning runtime：{time.time() - start:.4f} seconds.")
+        return plan
+    except Exception as e:
+        log_error("Sync planning failed.")
+        log_error_with_traceback(e)
+        raise RuntimeError("Sync planning failed.") from e
+
+
+def apply_sync_plan(plan_path, resume=False):
+    """
+    Apply a plan saved by `plan_sync()` under the journal.
+
+    Args:
+        plan_path (str): Plan path.
+        resume (bool): Skip the operations an interrupted run of this plan already applied.
+
+    Returns:
+        dict: Operation counts (see `relate_databases_plan.execute_sync_plan()`).
+    """
+    try:
+        start = time.time()
+        plan = SyncPlan.load(plan_path)
+        print(f"Applying sync plan {plan_path}...")
+        log_print_green(plan.summary())
+        counts = execute_journaled_plan(plan, resume=resume)
+        log_print_green(f"Plan runtime：{time.time() - start:.4f} seconds.")
+        return counts
+    except Exception as e:
+        log_error("Applying the sync plan failed.")
+        log_error_with_traceback(e)
+        raise RuntimeError("Applying the sync plan failed.") from e
@@ -6,12 +6,22 @@ Purpose:
     - Renaming properties
     - Changing property types
     - Adding new properties safely (with name conflict resolution)
+    - Declarative schema reconciliation (desired schema in, minimal set of updates out)
 
 Features:
     - Safe property name updates with conflict avoidance
     - Automatic type update only when necessary
-    - Add property with rollback support if name collision occurs
-    - Built-in checks using `property_exists` and current schema inspection
+    - Add property in place, changing the type of an existing property with the same name
+    - Built-in checks through current schema inspection (schema registry)
+    - Schema reconciler: reads the schema once, diffs it against the desired schema and applies every rename,
+      type change and addition in as few `databases.update` calls as possible (with a dry-run mode)
+
+Desired schema format (all keys optional):
+    {
+        "title": "Name",                                   # Name of the title property
+        "properties": {"Created Time": "date", ...},       # Property name -> type
+        "relations": {target_database_id: "Source A", ...} # Target database -> relation property name
+    }
 
 Used in:
     - Phase 3–5: To prepare combination database schema before syncing
@@ -21,12 +31,14 @@ Used in:
 Functions:
     - update_database_property_name(): Rename an existing property
     - update_database_property_type(): Change the type of a property
-    - add_new_property(): Add new property with collision-safe fallback
+    - add_new_property(): Add new property, or fix the type of an existing one with that name
+    - plan_schema_changes(): Compute the batched `databases.update` payloads for a desired schema
+    - reconcile_database_schema(): Apply (or dry-run) a desired schema
 """
 
-from notion_utils.cache import get_database
 from notion_utils.client import get_notion_client
-from notion_utils.search_database import property_exists
+from notion_utils.log import log_print_yellow
+from notion_utils.schema_registry import schema_registry
 
 notion = get_notion_client()
 
@@ -45,13 +57,13 @@ def update_database_property_name(database_id, target_context, new_context):
     """
 
     try:
-        database = get_database(database_id, False)
+        database = schema_registry.get(database_id)["database"]
         if target_context not in database["properties"]:
             raise ValueError(f"Property '{target_context}' not found.")
         if target_context == new_context:
             return database  # No change needed
-        response = notion.databases.update(
-            database_id=database_id,
+        response = schema_registry.update(
+            database_id,
             properties={
                 target_context: {
                     "name": new_context,  # Cannot change "name" and "type" at the same time
@@ -75,14 +87,12 @@ def update_database_property_type(database_id, new_property_type, target_propert
     Returns:
         dict or None: Updated database object if successful, otherwise None.
     """
-    schema = notion.databases.retrieve(database_id=database_id)["properties"]
-    if target_property_name in schema:
-        current_type = schema[target_property_name]["type"]
-        if current_type == new_property_type:
-            return
+    schema = schema_registry.property_types(database_id)
+    if schema.get(target_property_name) == new_property_type:
+        return
     try:
-        notion.databases.update(
-            database_id=database_id,
+        schema_registry.update(
+            database_id,
             properties={
                 target_property_name: {
                     new_property_type: {},  # Notion API will automatically detect type from the property format
@@ -96,7 +106,8 @@ def update_database_property_type(database_id, new_property_type, target_propert
 
 def add_new_property(database_id, new_property_name, new_property_type):
     """
-    Add a new property to a Notion database. If it already exists, temporarily rename it to avoid conflict.
+    Add a new property to a Notion database. If a property with that name already exists,
+    its type is changed in place instead, so the whole operation is a single update.
 
     Args:
         database_id (str): The ID of the Notion database.
@@ -108,33 +119,136 @@ def add_new_property(database_id, new_property_name, new_property_type):
     """
 
     try:
-        if property_exists(database_id, new_property_name):
-            # Rename existing conflicting property temporarily
-            update_database_property_name(database_id, new_property_name, new_property_name + "1")
-
-            # Add the new property with the desired name
-            response = notion.databases.update(
-                database_id=database_id,
-                properties={
-                    new_property_name: {
-                        new_property_type: {}
-                    }
-                }
-            )
-
-            # Restore the original name to the temporarily renamed property
-            update_database_property_name(database_id, new_property_name + "1", new_property_name)  # 再改回原本的名字
-        else:
-            # Property doesn't exist; directly add the new property
-            response = notion.databases.update(
-                database_id=database_id,
-                properties={
-                    new_property_name: {
-                        new_property_type: {}
-                    }
+        result = reconcile_database_schema(database_id, {"properties": {new_property_name: new_property_type}})
+        return result["database"]
+    except Exception as e:
+        raise RuntimeError(f"Failed to add property '{new_property_name}'") from e
+
+
+def plan_schema_changes(database, desired_schema):
+    """
+    Diff a database schema against a desired schema and group the changes into update batches.
+
+    Existing properties are addressed by property ID, so renames, type changes and additions can share
+    one request. A name currently held by a property that is itself being renamed is only claimed in a
+    later batch, once the old holder has moved away. Renaming and retyping the same property
+    at once is not allowed by Notion and never needed here.
+
+    Args:
+        database (dict): Database object as returned by `databases.retrieve`.
+        desired_schema (dict): Desired schema (see module docstring).
+
+    Returns:
+        dict: `batches` (list of `properties` payloads, in order) and `changes` (readable descriptions).
+
+    Raises:
+        ValueError: On name conflicts that cannot be resolved without touching unrelated properties.
+    """
+    properties = database["properties"]
+    title_name = next((name for name, prop in properties.items() if prop["type"] == "title"), None)
+    if title_name is None:
+        raise ValueError("No title field found in the database.")
+
+    # Each operation: (name it claims, property key, payload, description)
+    renames = []
+    operations = []
+
+    desired_title = desired_schema.get("title")
+    if desired_title and title_name != desired_title:
+        renames.append((title_name, desired_title))
+
+    relation_by_target = {prop["relation"]["database_id"].replace("-", ""): name
+                          for name, prop in properties.items() if prop["type"] == "relation"}
+    additions = {}
+    for target_database_id, relation_name in desired_schema.get("relations", {}).items():
+        current_name = relation_by_target.get(target_database_id.replace("-", ""))
+        if current_name is None:
+            additions[relation_name] = {
+                "relation": {
+                    "database_id": target_database_id,
+                    "type": "single_property",
+                    "single_property": {}
                 }
-            )
-        return response
+            }
+        elif current_name != relation_name:
+            renames.append((current_name, relation_name))
+
+    renamed_away = {old_name for old_name, _ in renames}
+    for name, property_type in desired_schema.get("properties", {}).items():
+        holder = properties.get(name)
+        if holder is None or name in renamed_away:
+            additions[name] = {property_type: {}}
+        elif holder["type"] != property_type:
+            if holder["type"] == "title":
+                raise ValueError(f"Field name conflict: '{name}' is the title field and cannot become {property_type}.")
+            operations.append((None, holder["id"], {property_type: {}}, f"Change type of '{name}' to {property_type}"))
+
+    for old_name, new_name in renames:
+        operations.append((new_name, properties[old_name]["id"], {"name": new_name},
+                           f"Rename '{old_name}' to '{new_name}'"))
+    for name, config in additions.items():
+        kind = "relation" if "relation" in config else next(iter(config))
+        operations.append((name, name, config, f"Add {kind} field '{name}'"))
+
+    # Reject names claimed twice, or held by a property that is not moving away
+    claimed = [name for name, _, _, _ in operations if name is not None]
+    for name in claimed:
+        if claimed.count(name) > 1:
+            raise ValueError(f"Field name conflict: '{name}' is requested for more than one field.")
+        if name in properties and name not in renamed_away:
+            raise ValueError(f"Field name conflict: '{name}' already exists. Please rename the target database.")
+
+    # Layer the operations: a claim on a name waits until the batch after its current holder moved away
+    rename_target_of = {old_name: new_name for old_name, new_name in renames}
+    batch_of = {}
+
+    def batch_index(name):
+        if name is None or name not in rename_target_of:
+            return 0
+        if name in batch_of:
+            if batch_of[name] is None:
+                raise ValueError(f"Field name conflict: renames around '{name}' form a cycle.")
+            return batch_of[name]
+        batch_of[name] = None
+        # The holder of `name` is renamed to rename_target_of[name]; it must move first
+        batch_of[name] = batch_index(rename_target_of[name]) + 1
+        return batch_of[name]
+
+    batches = []
+    changes = []
+    for name, key, payload, description in operations:
+        index = batch_index(name)
+        while len(batches) <= index:
+            batches.append({})
+        batches[index][key] = payload
+        changes.append(description)
+    return {"batches": [batch for batch in batches if batch], "changes": changes}
+
+
+def reconcile_database_schema(database_id, desired_schema, dry_run=False):
+    """
+    Bring a database schema in line with a desired schema using as few API calls as possible:
+    one schema read (shared through the registry) and one `databases.update` per batch (usually one).
+
+    Args:
+        database_id (str): The ID of the Notion database.
+        desired_schema (dict): Desired schema (see module docstring).
+        dry_run (bool): If True, only log the planned changes.
 
+    Returns:
+        dict: `changes`, `batches` and `database` (the latest database object).
+    """
+    try:
+        database = schema_registry.get(database_id)["database"]
+        plan = plan_schema_changes(database, desired_schema)
+        if dry_run:
+            for change in plan["changes"]:
+                log_print_yellow(f"[dry-run] {change}")
+            return {**plan, "database": database}
+        for batch in plan["batches"]:
+            database = schema_registry.update(database_id, properties=batch)
+        for change in plan["changes"]:
+            log_print_yellow(change)
+        return {**plan, "database": database}
     except Exception as e:
-        raise RuntimeError(f"Failed to add property '{new_property_name}'") from e
+        raise RuntimeError(f"Failed to reconcile schema of database '{database_id}'") from e
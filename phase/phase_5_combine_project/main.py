@@ -16,9 +16,8 @@ def main():
     target_database_list.append(target_databases_B_id)
     target_database_list.append("205b82c9b09480a79deaec0b8c3a6369")
     # 更新匯集資料庫欄位
-    for target_database in target_database_list:
-        response = add_new_relate_database_property(target_database, combination_database_C_id)
-        if response: print("✅ 資料庫連結標題成功！Database ID:", response["id"])
+    response = add_new_relate_database_property(target_database_list, combination_database_C_id)
+    if response: print("✅ 資料庫連結標題成功！Database ID:", response["id"])
     print("請務必目標資料庫不要重名字，不然無法新增上去")
     # -------------------------------------------------------------------------------
     # 確定匯集資料庫格式正確
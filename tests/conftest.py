@@ -0,0 +1,46 @@
+"""
+tests/conftest.py
+
+Purpose:
+    Shared setup for the test suite. Every test runs offline against the in-memory fake Notion backend
+    (`notion_utils/fake_notion.py`); the environment is set before `notion_utils` is first imported,
+    because the shared client and the state file paths are read at import time.
+
+Fixtures:
+    - workspace: A fresh, empty fake workspace behind the shared client
+    - state_dir: Journal and watermark files redirected to a temporary directory
+    - no_progress: Progress callback for the sync pipeline that ignores its updates
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+os.environ["NOTION_BACKEND"] = "fake"
+os.environ["NOTION_RATE_LIMIT"] = "100000"
+os.environ.pop("NOTION_PERSISTENT_CACHE", None)
+
+from notion_utils.client import use_fake_backend  # noqa: E402
+from notion_utils.relate_databases_to_one import relate_databases_journal, relate_databases_watermark  # noqa: E402
+
+
+@pytest.fixture
+def workspace():
+    # IDs are random, so caches and indexes left by earlier tests never match this workspace's objects
+    return use_fake_backend()
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(relate_databases_journal, "JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setattr(relate_databases_watermark, "STATE_PATH", str(tmp_path / "sync_state.json"))
+    return tmp_path
+
+
+@pytest.fixture
+def no_progress():
+    return lambda *_: None
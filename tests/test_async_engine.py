@@ -0,0 +1,54 @@
+import asyncio
+
+from notion_utils.concurrency import AdaptiveConcurrency
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one.relate_databases_to_one_async import AdaptiveSemaphore, _run_bounded, \
+    run_update_all_target_database_to_combi_async
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields
+
+
+async def _items(count):
+    for index in range(count):
+        yield index
+
+
+def _peak_in_flight(semaphore, count):
+    running = [0, 0]
+
+    async def task(_):
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.001)
+        running[0] -= 1
+
+    asyncio.run(_run_bounded(semaphore, task, _items(count)))
+    return running[1]
+
+
+def test_semaphore_follows_the_controller_limit():
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial=3)
+
+    assert _peak_in_flight(AdaptiveSemaphore(controller), 30) == 3
+
+    controller.configure(max_limit=2)
+    assert _peak_in_flight(AdaptiveSemaphore(controller), 30) == 2
+
+
+def test_async_engine_merges_and_fills_metadata(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [30, 10])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+
+    run_update_all_target_database_to_combi_async(target_ids, combination_database_id)
+
+    pages = list(iter_database_pages(combination_database_id))
+    assert len(pages) == 40
+    locations = sorted(page["properties"]["Database Location"]["rich_text"][0]["plain_text"] for page in pages)
+    assert locations == ["Source 1"] * 30 + ["Source 2"] * 10
+    assert all(page["properties"]["Created Time"]["date"] for page in pages)
+
+    # A second run finds every page linked and every metadata field current
+    workspace.reset_counters()
+    run_update_all_target_database_to_combi_async(target_ids, combination_database_id)
+    assert workspace.calls["pages.create"] == 0
+    assert workspace.calls["pages.update"] == 0
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+
+from notion_utils import cache
+from notion_utils.cache import LRUCache, SingleFlight
+
+
+def _value(size):
+    # A string of `size` characters is `size + 2` bytes as JSON
+    return "x" * (size - 2)
+
+
+def test_lru_evicts_least_recently_used_entry():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.put("c", 3)
+
+    assert "b" not in lru
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["evicted_entries"] == 1
+
+
+def test_lru_byte_budget_evicts_until_it_fits():
+    lru = LRUCache(max_entries=100, max_bytes=100)
+    lru.put("a", _value(40))
+    lru.put("b", _value(40))
+    assert lru.stats()["bytes"] == 80
+
+    lru.put("c", _value(40))
+
+    stats = lru.stats()
+    assert "a" not in lru and "b" in lru and "c" in lru
+    assert stats["bytes"] == 80
+    assert stats["evicted_bytes"] == 1
+
+
+def test_lru_skips_values_larger_than_the_byte_budget():
+    lru = LRUCache(max_entries=100, max_bytes=100)
+    lru.put("a", _value(40))
+    lru.put("huge", _value(101))
+
+    assert "huge" not in lru
+    assert "a" in lru
+    assert lru.stats()["bytes"] == 40
+
+
+def test_lru_replacing_a_value_updates_its_size():
+    lru = LRUCache(max_entries=100, max_bytes=100)
+    lru.put("a", _value(40))
+    lru.put("a", _value(10))
+
+    assert len(lru) == 1
+    assert lru.stats()["bytes"] == 10
+
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(max_entries=10, ttl=30)
+    lru.put("a", 1)
+
+    now[0] += 29
+    assert lru.get("a") == 1
+    now[0] += 2
+    assert lru.get("a") is None
+
+    stats = lru.stats()
+    assert stats["expired"] == 1
+    assert stats["entries"] == 0
+
+
+def test_single_flight_coalesces_concurrent_fetches():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "page"
+
+    def caller():
+        results.append(flights.do("page-id", fetch))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    # Wait until every follower joined the flight before letting the fetch finish
+    while flights.coalesced < len(followers):
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["page"] * 5
+    assert flights.coalesced == 4
+
+
+def test_single_flight_shares_the_error_and_then_retries():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing_fetch():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    def caller():
+        try:
+            flights.do("page-id", failing_fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=caller)
+    follower.start()
+    while flights.coalesced < 1:
+        threading.Event().wait(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["boom", "boom"]
+    # A finished flight is not reused: the next caller fetches again
+    assert flights.do("page-id", lambda: "fresh") == "fresh"
+
+
+def test_single_flight_keeps_keys_apart():
+    flights = SingleFlight()
+
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    assert flights.coalesced == 0
+
+
+@pytest.mark.parametrize("max_bytes", [None, 1000])
+def test_lru_peek_does_not_touch_recency(max_bytes):
+    lru = LRUCache(max_entries=2, max_bytes=max_bytes)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.peek("a") == 1
+    lru.put("c", 3)
+
+    assert "a" not in lru
+    assert lru.stats()["hits"] == 0
@@ -0,0 +1,99 @@
+import json
+import uuid
+
+import pytest
+
+from notion_utils.cli import EXIT_JOB_FAILED, EXIT_OK, EXIT_USAGE, load_config, main
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.instrumentation import recorder
+from notion_utils.search_database import iter_database_pages
+
+
+def _config(tmp_path, jobs, **settings):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"jobs": jobs, **settings}), encoding="utf-8")
+    return str(path)
+
+
+def _summary(capsys):
+    # The JSON stats are the last line of stdout
+    return json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+
+
+def test_config_expands_variables_and_fills_defaults(tmp_path, monkeypatch):
+    monkeypatch.setenv("COMBINATION_ID", "a" * 32)
+    config = load_config(_config(tmp_path, [{"name": "projects", "combination": "${COMBINATION_ID}",
+                                             "targets": ["b" * 32]}], rate_limit=5))
+
+    assert config["rate_limit"] == 5
+    assert config["jobs"] == [{"name": "projects", "combination": "a" * 32, "targets": ["b" * 32],
+                               "mode": "staged", "dry_run": False, "resume": False, "plan_output": None}]
+
+
+@pytest.mark.parametrize("jobs, message", [
+    ([{"combination": "${UNSET_COMBINATION_ID}", "targets": ["b" * 32]}], "not a Notion database ID"),
+    ([{"combination": "a" * 32, "targets": ["b" * 32], "mode": "turbo"}], "unknown mode"),
+    ([{"combination": "a" * 32, "targets": ["b" * 32]}, {"combination": "a" * 32, "targets": ["c" * 32]}],
+     "already syncs"),
+    ([], "non-empty 'jobs'"),
+])
+def test_invalid_config_is_rejected(tmp_path, jobs, message):
+    with pytest.raises(ValueError, match=message):
+        load_config(_config(tmp_path, jobs))
+
+
+def test_usage_errors_exit_with_2(tmp_path, capsys):
+    assert main(["sync", str(tmp_path / "missing.json")]) == EXIT_USAGE
+    assert main(["sync", _config(tmp_path, [{"combination": "nope", "targets": []}])]) == EXIT_USAGE
+    assert main(["sync"]) == EXIT_USAGE
+
+
+def test_jobs_run_and_report_json_stats(workspace, state_dir, tmp_path, capsys):
+    first_combination, first_targets = build_synthetic_workspace(workspace, 2, [4, 2])
+    second_combination, second_targets = build_synthetic_workspace(workspace, 1, [3])
+    output = tmp_path / "stats.json"
+    # The recorder is process-wide; start from what a fresh process would see
+    recorder.reset()
+    config = _config(tmp_path, [
+        {"name": "staged", "combination": first_combination, "targets": first_targets},
+        {"name": "fused", "combination": second_combination, "targets": second_targets, "mode": "fused"},
+    ])
+
+    assert main(["sync", config, "--output", str(output)]) == EXIT_OK
+
+    summary = _summary(capsys)
+    assert summary == json.loads(output.read_text(encoding="utf-8"))
+    assert (summary["ok"], summary["failed"], summary["interrupted"]) == (2, 0, False)
+    jobs = {job["name"]: job for job in summary["jobs"]}
+    assert jobs["fused"]["operations"]["created"] == 3
+    assert jobs["staged"]["api_calls"]["pages.create"] == 6
+    assert summary["api_calls_total"] == sum(job["api_calls_total"] for job in summary["jobs"])
+    assert sum(1 for _ in iter_database_pages(first_combination)) == 6
+
+
+def test_failed_job_exits_with_1_and_reports_its_error(workspace, state_dir, tmp_path, capsys):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 1, [2])
+    config = _config(tmp_path, [
+        {"name": "good", "combination": combination_database_id, "targets": target_ids},
+        {"name": "missing", "combination": uuid.uuid4().hex, "targets": target_ids},
+    ])
+
+    assert main(["sync", config]) == EXIT_JOB_FAILED
+
+    summary = _summary(capsys)
+    jobs = {job["name"]: job for job in summary["jobs"]}
+    assert jobs["good"]["status"] == "ok"
+    assert jobs["missing"]["status"] == "failed"
+    assert jobs["missing"]["error"]
+
+
+def test_dry_run_plans_without_writing(workspace, state_dir, tmp_path, capsys):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 1, [5])
+    workspace.reset_counters()
+
+    assert main(["sync", "--combination", combination_database_id, "--target", target_ids[0], "--dry-run",
+                 "--plan-output", str(tmp_path / "plan.json")]) == EXIT_OK
+
+    job = _summary(capsys)["jobs"][0]
+    assert job["plan"]["creates"] == 5
+    assert not any(workspace.calls[endpoint] for endpoint in ("databases.update", "pages.create", "pages.update"))
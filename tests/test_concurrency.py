@@ -0,0 +1,76 @@
+import pytest
+
+from notion_utils import concurrency
+from notion_utils.concurrency import AdaptiveConcurrency
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(concurrency.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limit_grows_about_one_slot_per_window_of_healthy_calls():
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=32, initial=4)
+    # Each healthy call adds 1 / limit
+    for _ in range(4):
+        controller.observe(0.1)
+    assert controller.limit == 4
+    controller.observe(0.1)
+
+    assert controller.limit == 5
+    assert controller.stats()["increases"] == 1
+
+
+def test_limit_never_grows_past_the_maximum():
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=6, initial=4)
+    for _ in range(200):
+        controller.observe(0.1)
+
+    assert controller.limit == 6
+    assert controller.stats()["peak_limit"] == 6
+
+
+def test_limit_stops_growing_while_latency_is_degraded():
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=32, initial=4, latency_tolerance=2.0)
+    controller.observe(0.1)
+    for _ in range(50):
+        controller.observe(5.0)
+    limit = controller.limit
+    controller.observe(5.0)
+
+    assert controller.limit == limit < 32
+
+
+def test_congestion_halves_the_limit_once_per_cooldown(clock):
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=32, initial=16, cooldown=1.0)
+    controller.observe(0.1, congested=True)
+    assert controller.limit == 8
+
+    # The rest of the same burst of 429s counts as one congestion event
+    controller.observe(0.1, congested=True)
+    assert controller.limit == 8
+
+    clock[0] += 1.5
+    controller.observe(0.1, congested=True)
+    assert controller.limit == 4
+    assert controller.stats()["decreases"] == 2
+
+
+def test_limit_never_drops_below_the_minimum(clock):
+    controller = AdaptiveConcurrency(min_limit=3, max_limit=32, initial=4, cooldown=1.0)
+    for _ in range(5):
+        clock[0] += 2
+        controller.observe(0.1, congested=True)
+
+    assert controller.limit == 3
+
+
+def test_configure_clamps_the_current_limit():
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=32, initial=20)
+    controller.configure(max_limit=8)
+    assert controller.limit == 8
+
+    with pytest.raises(ValueError):
+        controller.configure(min_limit=10)
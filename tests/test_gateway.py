@@ -0,0 +1,94 @@
+import pytest
+from notion_client import APIErrorCode, APIResponseError
+
+from notion_utils import gateway
+from notion_utils.fake_notion import FakeNotionClient, FakeWorkspace, _api_error
+from notion_utils.gateway import NotionGateway
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Record the retry delays (kept short by the tests) and take the jitter out of them
+    delays = []
+    sleep = gateway.time.sleep
+
+    def recording_sleep(seconds):
+        delays.append(seconds)
+        sleep(seconds)
+
+    monkeypatch.setattr(gateway.time, "sleep", recording_sleep)
+    monkeypatch.setattr(gateway.random, "uniform", lambda low, high: 0.0)
+    return delays
+
+
+def _gateway(errors):
+    # The first calls to each endpoint fail with the listed (status, headers), the rest go through
+    workspace = FakeWorkspace()
+    database = workspace.create_database(properties={"Title": {"title": {}}})
+    admit = workspace.admit
+
+    def failing_admit(endpoint):
+        admit(endpoint)
+        if errors.get(endpoint):
+            status, headers = errors[endpoint].pop(0)
+            code = APIErrorCode.RateLimited if status == 429 else APIErrorCode.InternalServerError
+            raise _api_error(status, code, "injected", headers)
+        return 0.0
+
+    workspace.admit = failing_admit
+    client = NotionGateway(FakeNotionClient(workspace), rate=1000, burst=1000, max_retries=2, base_delay=0.001)
+    return client, workspace, database["id"]
+
+
+def test_429_waits_for_retry_after_and_pauses_the_bucket(sleeps):
+    client, workspace, database_id = _gateway({"databases.retrieve": [(429, {"Retry-After": "0.05"})]})
+    pauses = []
+    pause = client.bucket.pause
+    client.bucket.pause = lambda seconds: (pauses.append(seconds), pause(seconds))
+
+    assert client.databases.retrieve(database_id=database_id)["id"] == database_id
+
+    assert sleeps[0] == 0.05
+    # Every caller waits out the pause, not only the throttled one
+    assert pauses == [0.05]
+    assert client.stats() == {"calls": 2, "throttled": 1, "retried": 1, "failed": 0}
+
+
+def test_server_error_is_retried_for_idempotent_calls(sleeps):
+    client, workspace, database_id = _gateway({"databases.retrieve": [(502, None)]})
+
+    client.databases.retrieve(database_id=database_id)
+
+    assert workspace.calls["databases.retrieve"] == 2
+    assert client.stats()["retried"] == 1
+
+
+def test_server_error_is_not_retried_for_page_creates(sleeps):
+    client, workspace, database_id = _gateway({"pages.create": [(502, None)]})
+
+    with pytest.raises(APIResponseError):
+        client.pages.create(parent={"database_id": database_id}, properties={})
+
+    # The page may have been created before the error, so sending it again could duplicate it
+    assert workspace.calls["pages.create"] == 1
+    assert client.stats()["failed"] == 1
+    assert sleeps == []
+
+
+def test_429_is_retried_for_page_creates(sleeps):
+    # A 429 means the request was not processed, so even a create is safe to send again
+    client, workspace, database_id = _gateway({"pages.create": [(429, {"Retry-After": "0.01"})]})
+
+    client.pages.create(parent={"database_id": database_id}, properties={})
+
+    assert workspace.calls["pages.create"] == 2
+
+
+def test_retries_stop_after_max_retries(sleeps):
+    client, workspace, database_id = _gateway({"databases.retrieve": [(503, None)] * 5})
+
+    with pytest.raises(APIResponseError):
+        client.databases.retrieve(database_id=database_id)
+
+    assert workspace.calls["databases.retrieve"] == 3
+    assert client.stats()["failed"] == 1
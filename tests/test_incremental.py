@@ -0,0 +1,114 @@
+import time
+
+from notion_utils.concurrency import concurrency_controller, configure_concurrency
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one import relate_databases_to_one_update
+from notion_utils.relate_databases_to_one.relate_databases_watermark import load_watermark, next_watermark
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+
+def _titles(database_id):
+    return sorted("".join(part["plain_text"] for part in page["properties"]["Name"]["title"])
+                  for page in iter_database_pages(database_id))
+
+
+def _rename(workspace, page_id, title):
+    workspace.update_page(page_id, properties={"Title": {"title": [{"text": {"content": title}}]}})
+    # Keep the edits of a test on distinct `last_edited_time` values
+    time.sleep(0.005)
+
+
+def _setup(workspace, no_progress, pages=5):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 1, [pages])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    return combination_database_id, target_ids[0]
+
+
+def test_untitled_page_syncs_and_advances_the_watermark(workspace, state_dir, no_progress):
+    combination_database_id, target_id = _setup(workspace, no_progress)
+    untitled = workspace.create_page(parent={"database_id": target_id}, properties={"Title": {"title": []}})
+
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+
+    assert len(_titles(combination_database_id)) == 6
+    assert "" in _titles(combination_database_id)
+    assert load_watermark(combination_database_id, target_id) == untitled["last_edited_time"]
+
+
+def test_unchanged_pages_are_not_written_again(workspace, state_dir, no_progress):
+    combination_database_id, target_id = _setup(workspace, no_progress)
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+
+    workspace.reset_counters()
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+
+    assert workspace.calls["pages.create"] == 0
+    assert workspace.calls["pages.update"] == 0
+
+
+def test_failed_page_holds_the_watermark_without_pinning_it(workspace, state_dir, no_progress, monkeypatch):
+    combination_database_id, target_id = _setup(workspace, no_progress)
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+    first_watermark = load_watermark(combination_database_id, target_id)
+
+    sources = workspace.query_database(target_id)["results"]
+    _rename(workspace, sources[0]["id"], "bad")
+    _rename(workspace, sources[1]["id"], "good")
+    bad_edit = workspace.retrieve_page(sources[0]["id"])["last_edited_time"]
+
+    update_page_properties = relate_databases_to_one_update.update_page_properties
+
+    def failing_update(page_id, create_time, update_time, location, title):
+        if title == "bad":
+            raise RuntimeError("Failed to update properties.")
+        return update_page_properties(page_id, create_time, update_time, location, title)
+
+    monkeypatch.setattr(relate_databases_to_one_update, "update_page_properties", failing_update)
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+
+    # The pages before the failed one are done; the failed one is retried next run
+    assert first_watermark < load_watermark(combination_database_id, target_id) == bad_edit
+    assert "good" in _titles(combination_database_id)
+    assert "bad" not in _titles(combination_database_id)
+
+    monkeypatch.setattr(relate_databases_to_one_update, "update_page_properties", update_page_properties)
+    sync_relation_field_names(combination_database_id, [target_id], no_progress, incremental=True)
+
+    assert "bad" in _titles(combination_database_id)
+    assert load_watermark(combination_database_id, target_id) > bad_edit
+
+
+def test_next_watermark():
+    assert next_watermark(None, ["2025-01-02", "2025-01-03"], []) == "2025-01-03"
+    assert next_watermark("2025-01-01", ["2025-01-02", "2025-01-05"], ["2025-01-04", "2025-01-03"]) == "2025-01-03"
+    # Never backwards, and nothing synced keeps it
+    assert next_watermark("2025-01-04", [], ["2025-01-04"]) == "2025-01-04"
+    assert next_watermark("2025-01-04", [], []) == "2025-01-04"
+    assert next_watermark(None, [], []) is None
+
+
+def test_new_page_does_not_hide_linked_pages_from_the_lookup(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [3, 3])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, incremental=True)
+    assert len(_titles(combination_database_id)) == 6
+
+    # Every target has a watermark, so this run builds no relation index
+    workspace.create_page(parent={"database_id": target_ids[0]},
+                          properties={"Title": {"title": [{"text": {"content": "new"}}]}})
+    time.sleep(0.005)
+    for page in workspace.query_database(target_ids[1])["results"]:
+        _rename(workspace, page["id"], f"edited {page['id'][:8]}")
+
+    # One slot at a time, so the new page is created before the linked pages of the other target are looked up
+    min_limit, max_limit = concurrency_controller.min_limit, concurrency_controller.max_limit
+    configure_concurrency(1, 1)
+    try:
+        sync_relation_field_names(combination_database_id, target_ids, no_progress, incremental=True)
+    finally:
+        configure_concurrency(min_limit, max_limit)
+
+    titles = _titles(combination_database_id)
+    assert len(titles) == 7
+    assert "new" in titles
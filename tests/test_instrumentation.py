@@ -0,0 +1,70 @@
+import asyncio
+
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.instrumentation import CallRecorder, LatencyHistogram, current_stage, recorder, stage
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+
+def _rows(call_recorder):
+    return {(row["stage"], row["endpoint"]): row for row in call_recorder.snapshot()}
+
+
+def test_stages_nest_and_follow_asyncio_tasks():
+    async def labels():
+        with stage("apply"):
+            return await asyncio.gather(asyncio.sleep(0, current_stage()), asyncio.to_thread(current_stage))
+
+    assert current_stage() == "other"
+    with stage("sync"):
+        assert current_stage() == "sync"
+        assert asyncio.run(labels()) == ["sync/apply", "sync/apply"]
+    assert current_stage() == "other"
+
+
+def test_recorder_counts_per_stage_with_totals():
+    call_recorder = CallRecorder()
+    with stage("merge"):
+        call_recorder.record_call("pages.create", 0.010)
+        call_recorder.record_call("pages.create", 0.020, error=RuntimeError("boom"))
+        call_recorder.record_retry("pages.create")
+        call_recorder.record_wait("pages.create", 0.5)
+    with stage("metadata"):
+        call_recorder.record_call("pages.create", 0.030)
+
+    rows = _rows(call_recorder)
+    merge = rows[("merge", "pages.create")]
+    assert merge["calls"] == 2
+    assert merge["errors"] == {"RuntimeError": 1}
+    assert merge["retries"] == 1
+    assert merge["wait_s"] == 0.5
+    total = rows[("TOTAL", "pages.create")]
+    assert total["calls"] == 3
+    assert total["total_s"] == 0.06
+
+
+def test_latency_quantiles_come_from_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(99):
+        histogram.record(0.010)
+    histogram.record(2.0)
+
+    # Buckets are about 19% wide, and an estimate never exceeds the largest recorded value
+    assert 0.010 <= histogram.quantile(0.50) < 0.012
+    assert histogram.quantile(0.99) < 0.012
+    assert histogram.quantile(1.0) == 2.0
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_sync_calls_are_recorded_under_their_stage(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [5, 3])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    recorder.reset()
+
+    sync_relation_field_names(combination_database_id, target_ids, no_progress)
+
+    rows = _rows(recorder)
+    # Creates run on worker threads, yet keep the stage they were submitted from
+    assert rows[("merge", "pages.create")]["calls"] == 8
+    assert rows[("metadata", "pages.update")]["calls"] == 8
+    assert rows[("TOTAL", "pages.create")]["calls"] == workspace.calls["pages.create"]
+    recorder.reset()
@@ -0,0 +1,60 @@
+from notion_utils.cache import clear_all_cache
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one.relate_databases_join import build_source_metadata_index, \
+    join_source_metadata
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import update_all_pages_properties
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+
+def _combination_page(**relations):
+    return {"id": "combination-page", "properties": {
+        name: {"type": "relation", "relation": [{"id": page_id}] if page_id else []}
+        for name, page_id in relations.items()
+    }}
+
+
+def test_index_holds_every_page_of_every_target(workspace):
+    _, target_ids = build_synthetic_workspace(workspace, 2, [150, 3])
+    source = workspace.query_database(target_ids[1])["results"][0]
+    # A title split into several parts is joined, like Notion shows it
+    workspace.update_page(source["id"], properties={"Title": {"title": [{"text": {"content": "Part "}},
+                                                                        {"text": {"content": "two"}}]}})
+    workspace.reset_counters()
+
+    index = build_source_metadata_index(target_ids)
+
+    assert len(index) == 153
+    # One query per 100 pages of each target
+    assert workspace.calls["databases.query"] == 3
+    created_time, last_edited_time, database_title, page_title = index[source["id"].replace("-", "")]
+    assert (database_title, page_title) == ("Source 2", "Part two")
+    assert created_time == source["created_time"]
+
+
+def test_join_follows_the_first_non_empty_relation():
+    index = {"source1": ("2025-01-01", "2025-01-02", "Source 1", "Page")}
+
+    assert join_source_metadata(_combination_page(A=None, B="source-1"), ["A", "B"], index) == \
+        ("source-1", index["source1"])
+    # A source page missing from the index is returned for a one-off lookup; an orphan has no link at all
+    assert join_source_metadata(_combination_page(A="other"), ["A"], index) == ("other", None)
+    assert join_source_metadata(_combination_page(A=None), ["A"], index) is None
+
+
+def test_metadata_stage_reads_no_source_page_one_by_one(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [20, 5])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress)
+    for page in workspace.query_database(target_ids[0])["results"][:4]:
+        workspace.update_page(page["id"], properties={"Title": {"title": [{"text": {"content": "renamed"}}]}})
+    clear_all_cache()
+    workspace.reset_counters()
+
+    counts = update_all_pages_properties(combination_database_id, ["Source 1", "Source 2"])
+
+    assert counts == {"updated": 4, "skipped": 21}
+    assert workspace.calls["pages.retrieve"] == 0
+    titles = ["".join(part["plain_text"] for part in page["properties"]["Name"]["title"])
+              for page in iter_database_pages(combination_database_id)]
+    assert titles.count("renamed") == 4
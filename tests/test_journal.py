@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one import relate_databases_to_one_update
+from notion_utils.relate_databases_to_one.relate_databases_journal import SyncJournal
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+
+def _journaled(combination_database_id, op):
+    journal = SyncJournal.for_database(combination_database_id)
+    with open(journal.path, encoding="utf-8") as f:
+        return sum(1 for line in f if json.loads(line).get("op") == op)
+
+
+def _interrupt_after(workspace, endpoint, count):
+    # Simulate a crash (e.g. a closed window) once `count` calls to `endpoint` went through
+    admit = workspace.admit
+    seen = [0]
+
+    def interrupting_admit(name):
+        if name == endpoint:
+            seen[0] += 1
+            if seen[0] > count:
+                raise KeyboardInterrupt("interrupted")
+        return admit(name)
+
+    workspace.admit = interrupting_admit
+    return lambda: setattr(workspace, "admit", admit)
+
+
+def test_journal_resume_loads_completed_operations(state_dir):
+    journal = SyncJournal.for_database("combination")
+    journal.open(run="plan-1")
+    journal.record("create", "source-1", created_page_id="page-1")
+    journal.record("update", "page-2", "2025-01-01T00:00:00.000Z")
+    journal.close()
+    # A crash can cut off the line being written
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "op", "op": "upd')
+
+    resumed = SyncJournal.for_database("combination")
+    assert resumed.has_unfinished_run(run="plan-1")
+    assert resumed.open(resume=True) == 2
+    assert resumed.is_applied("create", "source-1")
+    assert resumed.created_page_id("source-1") == "page-1"
+    assert resumed.is_applied("update", "page-2", "2025-01-01T00:00:00.000Z")
+    # An update journaled for an older edit of the source does not count
+    assert not resumed.is_applied("update", "page-2", "2025-02-01T00:00:00.000Z")
+    resumed.complete()
+    assert not resumed.has_unfinished_run()
+
+
+def test_journal_without_resume_starts_empty(state_dir):
+    journal = SyncJournal.for_database("combination")
+    journal.open()
+    journal.record("archive", "page-1")
+    journal.close()
+
+    fresh = SyncJournal.for_database("combination")
+    assert fresh.open() == 0
+    assert not fresh.is_applied("archive", "page-1")
+    fresh.close()
+
+
+def test_fused_sync_resumes_without_duplicate_creates(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [40, 20])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+
+    restore = _interrupt_after(workspace, "pages.create", 25)
+    with pytest.raises(KeyboardInterrupt):
+        sync_relation_field_names(combination_database_id, target_ids, no_progress, fused=True)
+    restore()
+    created = _journaled(combination_database_id, "create")
+    assert 0 < created < 60
+
+    workspace.reset_counters()
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, fused=True, resume=True)
+
+    assert workspace.calls["pages.create"] == 60 - created
+    assert sum(1 for _ in iter_database_pages(combination_database_id)) == 60
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_staged_sync_resume_skips_journaled_updates(workspace, state_dir, no_progress, monkeypatch, use_async):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [30, 10])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+
+    # Interrupt the threaded engine (a KeyboardInterrupt inside the event loop only adds noise), then resume
+    # with the engine under test
+    restore = _interrupt_after(workspace, "pages.update", 15)
+    with pytest.raises(KeyboardInterrupt):
+        sync_relation_field_names(combination_database_id, target_ids, no_progress)
+    restore()
+    updated = _journaled(combination_database_id, "update")
+    assert _journaled(combination_database_id, "create") == 40
+    assert 0 < updated < 40
+
+    # Only the journal can tell which updates already landed
+    never_matches = lambda *args: False
+    monkeypatch.setattr(relate_databases_to_one_update, "page_properties_match", never_matches)
+    monkeypatch.setattr("notion_utils.relate_databases_to_one.relate_databases_to_one_async.page_properties_match",
+                        never_matches)
+    workspace.reset_counters()
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, use_async=use_async, resume=True)
+
+    assert workspace.calls["pages.create"] == 0
+    assert workspace.calls["pages.update"] == 40 - updated
+
+
+def test_resume_after_a_completed_run_starts_a_new_journal(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 1, [5])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress)
+    journal = SyncJournal.for_database(combination_database_id)
+    with open(journal.path, encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+
+    # The created page is archived by hand after the run completed
+    archived = next(iter_database_pages(combination_database_id))
+    workspace.update_page(archived["id"], archived=True)
+    workspace.reset_counters()
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, resume=True)
+
+    # The finished run's creates are not reused, so the source gets a new page instead of the archived one
+    assert workspace.calls["pages.create"] == 1
+    assert sum(1 for _ in iter_database_pages(combination_database_id)) == 5
+    with open(journal.path, encoding="utf-8") as f:
+        assert sum(1 for _ in f) < lines
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import threading
+
+from notion_utils import log
+
+
+def test_lines_from_many_threads_are_all_written_whole(tmp_path, monkeypatch):
+    path = str(tmp_path / "info.log")
+    monkeypatch.setattr(log, "INFO_LOG_PATH", path)
+
+    def worker(index):
+        for line in range(200):
+            log._write_to_file(log.INFO_LOG_PATH, f"worker {index} line {line}")
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert log.flush_logs()
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert sorted(lines) == sorted(f"worker {index} line {line}" for index in range(8) for line in range(200))
+
+
+def test_queued_lines_are_flushed_at_exit(tmp_path):
+    # The writer is a daemon thread, so only the exit hook saves what is still queued
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = "from notion_utils.log import log_print_yellow\nfor i in range(2000): log_print_yellow(f'line {i}')\n"
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env={**os.environ, "PYTHONPATH": root, "NOTION_BACKEND": "fake"},
+                   check=True, capture_output=True)
+
+    with open(tmp_path / "logs" / "info.log", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 2000
+    assert lines[-1].endswith("[INFO] line 1999")
@@ -0,0 +1,41 @@
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one.relate_databases_search import MAX_FILTER_CONDITIONS, no_relation_filter
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import delete_no_relation_pages
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+
+def _empty(name):
+    return {"property": name, "relation": {"is_empty": True}}
+
+
+def test_no_relation_filter_shapes():
+    assert no_relation_filter([]) is None
+    assert no_relation_filter(["A"]) == _empty("A")
+    assert no_relation_filter(["A", "B"]) == {"and": [_empty("A"), _empty("B")]}
+
+
+def test_no_relation_filter_splits_long_lists_into_nested_groups():
+    names = [f"Source {index}" for index in range(2 * MAX_FILTER_CONDITIONS + 50)]
+
+    groups = no_relation_filter(names)["and"]
+
+    assert [len(group["and"]) for group in groups] == [MAX_FILTER_CONDITIONS, MAX_FILTER_CONDITIONS, 50]
+    # Two levels at most, with every condition kept in order
+    assert [condition["property"] for group in groups for condition in group["and"]] == names
+
+
+def test_only_pages_without_any_relation_are_archived(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [5, 3])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress)
+    orphan = workspace.create_page(parent={"database_id": combination_database_id},
+                                   properties={"Name": {"title": [{"text": {"content": "orphan"}}]}})
+    workspace.reset_counters()
+
+    delete_no_relation_pages(combination_database_id, ["Source 1", "Source 2"])
+
+    # Notion filters out the linked pages, so one query finds the orphan
+    assert workspace.calls["databases.query"] == 1
+    assert workspace.retrieve_page(orphan["id"])["archived"]
+    assert sum(1 for _ in iter_database_pages(combination_database_id)) == 8
@@ -0,0 +1,59 @@
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one.relate_databases_plan import SyncPlan
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import apply_sync_plan, ensure_standard_fields, plan_sync, sync_relation_field_names
+
+WRITES = ("databases.update", "pages.create", "pages.update")
+
+
+def _writes(workspace):
+    return {endpoint: workspace.calls[endpoint] for endpoint in WRITES if workspace.calls[endpoint]}
+
+
+def test_plan_writes_nothing_and_round_trips(workspace, state_dir):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [6, 4])
+    workspace.reset_counters()
+
+    plan = plan_sync(combination_database_id, target_ids, output=str(state_dir / "plan.json"))
+
+    assert _writes(workspace) == {}
+    assert plan.count("create") == 10
+    # The combination database still lacks the relation and metadata fields
+    assert plan.schema_changes and plan.schema_batches == 1
+    loaded = SyncPlan.load(str(state_dir / "plan.json"))
+    assert loaded.to_dict() == plan.to_dict()
+
+
+def test_applied_plan_costs_what_it_estimated(workspace, state_dir):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [6, 4])
+    plan = plan_sync(combination_database_id, target_ids, output=str(state_dir / "plan.json"))
+    workspace.reset_counters()
+
+    counts = apply_sync_plan(str(state_dir / "plan.json"))
+
+    assert counts["created"] == 10 and counts["failed"] == 0
+    assert _writes(workspace) == plan.estimated_cost()["calls"]
+    assert sum(1 for _ in iter_database_pages(combination_database_id)) == 10
+    assert plan_sync(combination_database_id, target_ids, output=str(state_dir / "again.json")).is_empty()
+
+
+def test_fused_sync_archives_orphans_and_refreshes_stale_metadata(workspace, state_dir, no_progress):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 1, [8])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, fused=True)
+
+    sources = workspace.query_database(target_ids[0])["results"]
+    workspace.update_page(sources[0]["id"], properties={"Title": {"title": [{"text": {"content": "renamed"}}]}})
+    # Its relation disappears with the source page, which leaves the combination page an orphan
+    workspace.update_page(sources[1]["id"], archived=True)
+    workspace.reset_counters()
+
+    counts = sync_relation_field_names(combination_database_id, target_ids, no_progress, fused=True)
+
+    assert {key: counts[key] for key in ("created", "archived", "updated", "unchanged", "failed")} == \
+        {"created": 0, "archived": 1, "updated": 1, "unchanged": 6, "failed": 0}
+    # One read of the combination database and one of the target, however many pages they hold
+    assert workspace.calls["databases.query"] == 2
+    titles = ["".join(part["plain_text"] for part in page["properties"]["Name"]["title"])
+              for page in iter_database_pages(combination_database_id)]
+    assert len(titles) == 7 and "renamed" in titles
@@ -0,0 +1,23 @@
+import pytest
+
+from notion_utils.search_page import extract_page_title
+
+
+def _page(properties):
+    return {"id": "page-1", "properties": properties}
+
+
+def test_extract_page_title_joins_every_part():
+    parts = [{"type": "text", "text": {"content": "Q3 "}, "plain_text": "Q3 "},
+             {"type": "mention", "mention": {"type": "date"}, "plain_text": "2025-07-01"}]
+
+    assert extract_page_title(_page({"Name": {"type": "title", "title": parts}})) == "Q3 2025-07-01"
+
+
+def test_extract_page_title_of_an_untitled_page_is_empty():
+    assert extract_page_title(_page({"Name": {"type": "title", "title": []}})) == ""
+
+
+def test_extract_page_title_needs_a_title_property():
+    with pytest.raises(ValueError):
+        extract_page_title(_page({"Notes": {"type": "rich_text", "rich_text": []}}))
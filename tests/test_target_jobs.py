@@ -0,0 +1,80 @@
+import threading
+
+from notion_utils.relate_databases_to_one.relate_databases_to_one_update import TargetJob, interleave_round_robin, \
+    run_target_jobs
+
+
+def test_interleave_round_robin_takes_one_item_from_each_in_turn():
+    items = interleave_round_robin([[1, 2, 3], ["a"], [], ["x", "y"]])
+
+    assert list(items) == [1, "a", "x", 2, "y", 3]
+
+
+def test_interleave_round_robin_consumes_lazily():
+    pulled = []
+
+    def numbers(name, count):
+        for index in range(count):
+            pulled.append((name, index))
+            yield name, index
+
+    items = interleave_round_robin([numbers("big", 1000), numbers("small", 2)])
+
+    assert [next(items) for _ in range(4)] == [("big", 0), ("small", 0), ("big", 1), ("small", 1)]
+    assert len(pulled) == 4
+
+
+def test_run_target_jobs_processes_every_page_and_finishes_each_job_once():
+    lock = threading.Lock()
+    processed = {}
+    finished = []
+
+    def build(name, count):
+        def task(page):
+            with lock:
+                processed.setdefault(name, []).append(page)
+
+        def on_done():
+            with lock:
+                # Every page of this target has been processed when its job finishes
+                finished.append((name, len(processed.get(name, []))))
+
+        return TargetJob(name, (f"{name}-{index}" for index in range(count)), task, on_done)
+
+    run_target_jobs([build("large", 300), build("small", 3), build("empty", 0)])
+
+    assert sorted(processed["large"]) == sorted(f"large-{index}" for index in range(300))
+    assert sorted(processed["small"]) == ["small-0", "small-1", "small-2"]
+    assert sorted(finished) == [("empty", 0), ("large", 300), ("small", 3)]
+
+
+def test_small_target_finishes_before_a_large_one():
+    order = []
+
+    def build(name, count):
+        return TargetJob(name, range(count), lambda page: None, lambda: order.append(name))
+
+    run_target_jobs([build("large", 2000), build("small", 5)])
+
+    assert order == ["small", "large"]
+
+
+def test_failing_page_does_not_stop_its_job():
+    done = []
+
+    def task(page):
+        if page == 2:
+            raise RuntimeError("boom")
+
+    job = TargetJob("target", range(5), lambda page: _swallow(task, page), lambda: done.append(True))
+    run_target_jobs([job])
+
+    assert done == [True]
+
+
+def _swallow(task, page):
+    # Jobs handle their own errors, like the merge jobs do
+    try:
+        task(page)
+    except RuntimeError:
+        pass
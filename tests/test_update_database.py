@@ -0,0 +1,79 @@
+import pytest
+
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one.relate_databases_add_new_target_database import \
+    add_new_relate_database_property
+from notion_utils.update_database import plan_schema_changes
+
+
+def _database(**relations):
+    # Relation property name -> target database ID
+    properties = {
+        "Name": {"id": "title", "type": "title", "title": {}},
+        "Notes": {"id": "notes", "type": "rich_text", "rich_text": {}},
+    }
+    for name, target_database_id in relations.items():
+        properties[name] = {"id": f"rel-{name}", "type": "relation",
+                            "relation": {"database_id": target_database_id}}
+    return {"id": "combination", "properties": properties}
+
+
+def test_independent_changes_share_one_batch():
+    database = _database(Old="db1")
+    plan = plan_schema_changes(database, {
+        "title": "Title",
+        "properties": {"Notes": "number", "Created Time": "date"},
+        "relations": {"db1": "Source 1", "db2": "Source 2"},
+    })
+
+    assert len(plan["batches"]) == 1
+    batch = plan["batches"][0]
+    assert batch["title"] == {"name": "Title"}
+    assert batch["notes"] == {"number": {}}
+    assert batch["rel-Old"] == {"name": "Source 1"}
+    assert batch["Created Time"] == {"date": {}}
+    assert batch["Source 2"]["relation"]["database_id"] == "db2"
+    assert len(plan["changes"]) == 5
+
+
+def test_unchanged_schema_needs_no_batch():
+    plan = plan_schema_changes(_database(A="db1"), {"title": "Name", "properties": {"Notes": "rich_text"},
+                                                    "relations": {"db1": "A"}})
+
+    assert plan == {"batches": [], "changes": []}
+
+
+def test_rename_chain_frees_each_name_before_it_is_claimed():
+    # A -> B while the current B moves on to C: B must leave first
+    plan = plan_schema_changes(_database(A="db1", B="db2"), {"relations": {"db1": "B", "db2": "C"}})
+
+    assert plan["batches"] == [{"rel-B": {"name": "C"}}, {"rel-A": {"name": "B"}}]
+
+
+def test_rename_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        plan_schema_changes(_database(A="db1", B="db2"), {"relations": {"db1": "B", "db2": "A"}})
+
+
+def test_name_held_by_a_property_that_stays_is_rejected():
+    with pytest.raises(ValueError, match="already exists"):
+        plan_schema_changes(_database(A="db1"), {"relations": {"db1": "Notes"}})
+
+
+def test_title_field_cannot_change_type():
+    with pytest.raises(ValueError, match="title field"):
+        plan_schema_changes(_database(), {"properties": {"Name": "date"}})
+
+
+def test_new_relation_fields_are_added_in_one_update(workspace):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 3, 0)
+    workspace.reset_counters()
+
+    database = add_new_relate_database_property(target_ids, combination_database_id)
+
+    assert workspace.calls["databases.update"] == 1
+    assert {"Source 1", "Source 2", "Source 3"} <= set(database["properties"])
+
+    workspace.reset_counters()
+    add_new_relate_database_property(target_ids[0], combination_database_id)
+    assert workspace.calls["databases.update"] == 0
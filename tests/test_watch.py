@@ -0,0 +1,104 @@
+import threading
+import time
+
+from notion_utils.fake_notion import build_synthetic_workspace
+from notion_utils.relate_databases_to_one import relate_databases_watch
+from notion_utils.relate_databases_to_one.relate_databases_watch import SyncWatcher, watch
+from notion_utils.relate_databases_to_one.relate_databases_watermark import load_watermark
+from notion_utils.search_database import iter_database_pages
+from notion_utils.sync_pipeline import ensure_standard_fields, sync_relation_field_names
+
+WRITES = ("pages.create", "pages.update")
+
+
+def _titles(database_id):
+    return sorted("".join(part["plain_text"] for part in page["properties"]["Name"]["title"])
+                  for page in iter_database_pages(database_id))
+
+
+def _rename(workspace, page_id, title):
+    workspace.update_page(page_id, properties={"Title": {"title": [{"text": {"content": title}}]}})
+    time.sleep(0.005)
+
+
+def _watcher(workspace, no_progress, sweep_every=0):
+    combination_database_id, target_ids = build_synthetic_workspace(workspace, 2, [4, 2])
+    ensure_standard_fields(combination_database_id, target_ids, no_progress)
+    sync_relation_field_names(combination_database_id, target_ids, no_progress, incremental=True)
+    watcher = SyncWatcher(combination_database_id, target_ids, sweep_every=sweep_every)
+    watcher.start()
+    watcher.run_cycle()  # Settles the pages of the watermark's instant
+    workspace.reset_counters()
+    return watcher, combination_database_id, target_ids
+
+
+def test_idle_cycle_is_one_query_per_target(workspace, state_dir, no_progress):
+    watcher, _, target_ids = _watcher(workspace, no_progress)
+
+    assert watcher.run_cycle() == 0
+
+    assert workspace.calls["databases.query"] == len(target_ids)
+    assert not any(workspace.calls[endpoint] for endpoint in WRITES)
+
+
+def test_cycle_applies_changes_and_advances_the_watermark(workspace, state_dir, no_progress):
+    watcher, combination_database_id, target_ids = _watcher(workspace, no_progress)
+    _rename(workspace, workspace.query_database(target_ids[0])["results"][0]["id"], "renamed")
+    new_page = workspace.create_page(parent={"database_id": target_ids[1]},
+                                     properties={"Title": {"title": [{"text": {"content": "new"}}]}})
+
+    assert watcher.run_cycle() == 2
+
+    assert {"renamed", "new"} <= set(_titles(combination_database_id))
+    assert len(_titles(combination_database_id)) == 7
+    # Saved, so a restarted watcher continues from here
+    assert load_watermark(combination_database_id, target_ids[1]) == new_page["last_edited_time"]
+    workspace.reset_counters()
+    assert watcher.run_cycle() == 0
+
+
+def test_failed_page_is_retried_next_cycle(workspace, state_dir, no_progress, monkeypatch):
+    watcher, combination_database_id, target_ids = _watcher(workspace, no_progress)
+    sources = workspace.query_database(target_ids[0])["results"]
+    _rename(workspace, sources[0]["id"], "bad")
+    _rename(workspace, sources[1]["id"], "good")
+    bad_edit = workspace.retrieve_page(sources[0]["id"])["last_edited_time"]
+    sync_changed_page = relate_databases_watch.sync_changed_page
+
+    def failing_sync(page, *args):
+        if page["id"] == sources[0]["id"]:
+            raise RuntimeError("Failed to sync page.")
+        return sync_changed_page(page, *args)
+
+    monkeypatch.setattr(relate_databases_watch, "sync_changed_page", failing_sync)
+    assert watcher.run_cycle() == 1
+    assert watcher.stats["failed"] == 1
+    assert load_watermark(combination_database_id, target_ids[0]) == bad_edit
+
+    monkeypatch.setattr(relate_databases_watch, "sync_changed_page", sync_changed_page)
+    # Only the failed page is applied again; "good" was remembered
+    assert watcher.run_cycle() == 1
+    assert {"bad", "good"} <= set(_titles(combination_database_id))
+
+
+def test_orphans_are_swept_every_few_cycles(workspace, state_dir, no_progress):
+    watcher, combination_database_id, target_ids = _watcher(workspace, no_progress, sweep_every=2)
+    workspace.update_page(workspace.query_database(target_ids[0])["results"][0]["id"], archived=True)
+
+    # The setup ran cycle 1, so cycle 2 sweeps
+    watcher.run_cycle()
+
+    assert watcher.stats["sweeps"] == 1
+    assert len(_titles(combination_database_id)) == 5
+
+
+def test_watch_stops_after_the_given_cycles_or_on_the_stop_event(workspace, state_dir, no_progress):
+    watcher, _, _ = _watcher(workspace, no_progress)
+
+    watch([watcher], interval=0, cycles=3)
+    assert watcher.cycles == 4
+
+    stop_event = threading.Event()
+    stop_event.set()
+    watch([watcher], interval=0, stop_event=stop_event)
+    assert watcher.cycles == 4